@@ -1,67 +1,139 @@
 """
 Microsoft Account Authentication Helper
 Script hỗ trợ đăng nhập Microsoft account nếu cần
+
+Crawler dùng lại session qua AuthSession thay vì đăng nhập mỗi lần chạy:
+- storage_state: file .auth/microsoft_session.json (cookies + localStorage) nạp vào context mới
+- user_data_dir: persistent context của Chromium, cookies được giữ lại giữa các lần chạy
+Khi mở browser, session được kiểm tra (cookie đăng nhập còn hạn + 1 request tới Learn);
+chỉ khi hết hạn mới đăng nhập lại bằng MS_EMAIL/MS_PASSWORD và lưu lại session.
 """
 
 import asyncio
-from playwright.async_api import async_playwright
 import json
 import os
+import tempfile
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
 
+from dotenv import load_dotenv
+from launch_profiles import launch_options, context_options
 
-async def login_microsoft(email: str = None, password: str = None):
+
+SESSION_FILE = '.auth/microsoft_session.json'
+LOGIN_URL = "https://login.microsoftonline.com"
+LOGIN_HOSTS = {'login.microsoftonline.com', 'login.live.com', 'login.microsoft.com'}
+# Cookie đăng nhập của Microsoft Entra ID / Microsoft account
+AUTH_COOKIES = {'ESTSAUTH', 'ESTSAUTHPERSISTENT', 'ESTSAUTHLIGHT', '__Host-MSAAUTHP', 'MSPAuth'}
+# Request kiểm tra session còn sống: 200 = đã đăng nhập, 401/403 = hết hạn.
+# Status khác (404, lỗi mạng) thì chỉ dựa vào hạn của cookie
+SESSION_CHECK_URL = "https://learn.microsoft.com/api/profiles/me"
+# Bước "Stay signed in?" sau khi nhập password
+KMSI_SELECTOR = 'input[name="DontShowAgain"], #KmsiCheckboxField'
+KMSI_YES_SELECTOR = '#idSIButton9'
+LOGIN_ERROR_SELECTOR = '#passwordError, #usernameError'
+
+
+async def wait_for_login(page, timeout: float = 120) -> bool:
     """
-    Đăng nhập Microsoft account và lưu session
+    Đợi tín hiệu đăng nhập xong thay vì sleep cố định: page rời khỏi trang login
+    (tự bấm "Yes" ở bước Stay signed in). Timeout đủ dài để duyệt MFA trên điện thoại.
     """
-    
-    if not email or not password:
-        print("⚠️  Chưa cấu hình email/password")
-        print("Bạn cần tạo file .env với:")
-        print("MS_EMAIL=your_email@example.com")
-        print("MS_PASSWORD=your_password")
-        return False
-        
-    playwright = await async_playwright().start()
-    browser = await playwright.chromium.launch(headless=False)
-    context = await browser.new_context()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        host = urlparse(page.url).hostname or ''
+        if host not in LOGIN_HOSTS:
+            return True
+        try:
+            if await page.query_selector(LOGIN_ERROR_SELECTOR):
+                print("❌ Email hoặc password không đúng")
+                return False
+            if await page.query_selector(KMSI_SELECTOR):
+                await page.click(KMSI_YES_SELECTOR)
+        except Exception:
+            pass  # Page đang chuyển trang
+        await asyncio.sleep(0.5)
+    print(f"⚠️  Quá {timeout:.0f}s chưa đăng nhập xong")
+    return False
+
+
+def save_session(storage_state: Dict[str, Any], session_file: str = SESSION_FILE):
+    """
+    Ghi storage state qua file tạm rồi os.replace: nhiều worker (batch_crawl) cùng làm mới
+    session thì file luôn là 1 bản đầy đủ, không bị ghi xen kẽ.
+    """
+    save_dir = os.path.dirname(session_file) or '.'
+    os.makedirs(save_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.session-', suffix='.tmp', dir=save_dir)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(storage_state, f)
+        os.replace(tmp_path, session_file)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+async def login_in_context(context, email: str, password: str,
+                           session_file: str = SESSION_FILE, timeout: float = 120) -> bool:
+    """Đăng nhập trong context có sẵn, thành công thì lưu storage state ra session_file"""
     page = await context.new_page()
-    
     try:
         print("🔐 Đang đăng nhập Microsoft...")
         
         # Truy cập trang login
-        await page.goto("https://login.microsoftonline.com")
-        await asyncio.sleep(2)
+        await page.goto(LOGIN_URL)
         
         # Nhập email
-        email_input = await page.query_selector('input[type="email"]')
-        if email_input:
-            await email_input.fill(email)
-            await page.click('input[type="submit"]')
-            await asyncio.sleep(2)
-            
+        email_input = await page.wait_for_selector('input[type="email"]', timeout=15000)
+        await email_input.fill(email)
+        await page.click('input[type="submit"]')
+        
         # Nhập password
-        password_input = await page.query_selector('input[type="password"]')
-        if password_input:
-            await password_input.fill(password)
-            await page.click('input[type="submit"]')
-            await asyncio.sleep(30)
-            
+        password_input = await page.wait_for_selector('input[type="password"]:visible', timeout=15000)
+        await password_input.fill(password)
+        await page.click('input[type="submit"]')
+        
+        if not await wait_for_login(page, timeout):
+            return False
+        
         # Lưu cookies/storage state
-        storage_state = await context.storage_state()
+        if session_file:
+            save_session(await context.storage_state(), session_file)
         
-        os.makedirs('.auth', exist_ok=True)
-        with open('.auth/microsoft_session.json', 'w') as f:
-            json.dump(storage_state, f)
-            
         print("✅ Đăng nhập thành công! Session đã được lưu.")
-        
         return True
-        
+    
     except Exception as e:
         print(f"❌ Lỗi đăng nhập: {e}")
         return False
-        
+    
+    finally:
+        await page.close()
+
+
+async def login_microsoft(email: str = None, password: str = None):
+    """
+    Đăng nhập Microsoft account và lưu session
+    """
+    
+    if not email or not password:
+        print("⚠️  Chưa cấu hình email/password")
+        print("Bạn cần tạo file .env với:")
+        print("MS_EMAIL=your_email@example.com")
+        print("MS_PASSWORD=your_password")
+        return False
+    
+    from playwright.async_api import async_playwright  # batch_crawl import module này trong process cha
+    
+    playwright = await async_playwright().start()
+    browser = await playwright.chromium.launch(headless=False)
+    context = await browser.new_context()
+    
+    try:
+        return await login_in_context(context, email, password)
+    
     finally:
         await browser.close()
         await playwright.stop()
@@ -69,7 +141,7 @@ async def login_microsoft(email: str = None, password: str = None):
 
 async def load_session():
     """Load session đã lưu"""
-    session_file = '.auth/microsoft_session.json'
+    session_file = SESSION_FILE
     
     if os.path.exists(session_file):
         with open(session_file, 'r') as f:
@@ -77,6 +149,116 @@ async def load_session():
     return None
 
 
+def auth_cookies_valid(cookies) -> bool:
+    """Còn ít nhất 1 cookie đăng nhập chưa hết hạn (expires = -1: cookie phiên, coi là còn)"""
+    now = time.time()
+    return any(c['name'] in AUTH_COOKIES and (c.get('expires', -1) == -1 or c['expires'] > now)
+               for c in cookies)
+
+
+class AuthSession:
+    """
+    Mở browser context đã đăng nhập từ session lưu trước đó, kiểm tra session còn sống
+    và chỉ đăng nhập lại khi đã hết hạn.
+
+        auth = AuthSession(storage_state='.auth/microsoft_session.json')
+        browser, context = await auth.launch(playwright, profile)
+        await auth.ensure(context)
+    """
+    
+    def __init__(self, storage_state: str = None, user_data_dir: str = None,
+                 email: str = None, password: str = None, login_timeout: float = 120,
+                 relogin: bool = True):
+        if not storage_state and not user_data_dir:
+            storage_state = SESSION_FILE
+        self.storage_state = storage_state  # Với user_data_dir: None, không nạp/ghi file session
+        self.user_data_dir = user_data_dir  # Persistent context: cookies nằm trong profile Chromium
+        # Không truyền thì lấy từ môi trường (.env) khi cần đăng nhập lại
+        load_dotenv()
+        self.email = email or os.getenv('MS_EMAIL')
+        self.password = password or os.getenv('MS_PASSWORD')
+        self.login_timeout = login_timeout
+        self.relogin = relogin  # False: chỉ nạp session, việc làm mới đã do process khác lo (batch_crawl)
+    
+    async def launch(self, playwright, profile: Dict[str, Any]) -> Tuple[Optional[Any], Any]:
+        """
+        Mở context theo launch profile kèm session. Trả về (browser, context);
+        browser = None với persistent context (đóng context là đóng browser).
+        """
+        if self.user_data_dir:
+            os.makedirs(self.user_data_dir, exist_ok=True)
+            context = await playwright.chromium.launch_persistent_context(
+                self.user_data_dir, **launch_options(profile), **context_options(profile))
+            return None, context
+        
+        browser = await playwright.chromium.launch(**launch_options(profile))
+        options = context_options(profile)
+        if self.storage_state and os.path.exists(self.storage_state):
+            options['storage_state'] = self.storage_state
+        return browser, await browser.new_context(**options)
+    
+    def saved_cookies(self) -> Optional[list]:
+        """
+        Cookies trong file storage state nếu cookie đăng nhập còn hạn (không cần mở browser),
+        None nếu chưa có file / đã hết hạn / dùng persistent context.
+        """
+        if not self.storage_state or not os.path.exists(self.storage_state):
+            return None
+        with open(self.storage_state, 'r') as f:
+            cookies = json.load(f).get('cookies', [])
+        return cookies if auth_cookies_valid(cookies) else None
+    
+    async def is_live(self, context) -> bool:
+        """Kiểm tra session: cookie đăng nhập còn hạn, rồi 1 request tới Learn (không mở page)"""
+        if not auth_cookies_valid(await context.cookies()):
+            return False
+        try:
+            response = await context.request.get(SESSION_CHECK_URL, timeout=10000)
+            if response.status in (401, 403):
+                return False
+        except Exception:
+            pass  # Lỗi mạng: tin vào cookie
+        return True
+    
+    async def ensure(self, context) -> bool:
+        """Session còn sống thì dùng luôn, hết hạn thì đăng nhập lại (nếu có email/password) và lưu lại"""
+        if await self.is_live(context):
+            print("🔑 Dùng lại session đã đăng nhập")
+            return True
+        
+        if not self.relogin:
+            print("⚠️  Session đã hết hạn, crawl không đăng nhập")
+            return False
+        
+        if not self.email or not self.password:
+            print("⚠️  Session đã hết hạn và chưa cấu hình MS_EMAIL/MS_PASSWORD, crawl không đăng nhập")
+            return False
+        
+        print("🔑 Session đã hết hạn, đăng nhập lại...")
+        # Persistent context tự giữ cookies trong user_data_dir, không cần ghi file
+        return await login_in_context(context, self.email, self.password, self.storage_state, self.login_timeout)
+
+
+async def refresh_session(storage_state: str = SESSION_FILE, launch_profile: str = None) -> bool:
+    """
+    Mở browser 1 lần để kiểm tra session, hết hạn thì đăng nhập lại và ghi file.
+    batch_crawl gọi trước khi chia courses cho các worker process, workers chỉ nạp file này.
+    """
+    from playwright.async_api import async_playwright
+    from launch_profiles import get_launch_profile
+    
+    auth = AuthSession(storage_state)
+    playwright = await async_playwright().start()
+    try:
+        browser, context = await auth.launch(playwright, get_launch_profile(launch_profile))
+        try:
+            return await auth.ensure(context)
+        finally:
+            await (browser or context).close()
+    finally:
+        await playwright.stop()
+
+
 if __name__ == "__main__":
     # Để test login riêng
     import os
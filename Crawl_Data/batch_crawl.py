@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Batch Crawler
+Crawl nhiều course/learning path: các URL được chia cho N worker process, mỗi process
+chạy MicrosoftLearnCrawler với browser Playwright riêng. Mọi process dùng chung 1 trần
+request/giây (rate_limiter.SharedRateLimit), AIMD vẫn chạy riêng trong từng process.
+
+    python batch_crawl.py courses.txt --processes 4 --rate 6
+    python batch_crawl.py https://learn.microsoft.com/en-us/training/courses/sc-200t00 https://...
+
+courses.txt: mỗi dòng 1 URL, dòng trống / bắt đầu bằng # bị bỏ qua.
+
+Output:
+    output/batch/<slug>/<slug>.json    (+ summary.json, metrics.json, crawl_journal.jsonl, crawl.log)
+    output/batch/manifest.json         trạng thái + số liệu của từng course
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from launch_profiles import LAUNCH_PROFILES, DEFAULT_LAUNCH_PROFILE
+from auth_helper import SESSION_FILE
+from module_cache import DEFAULT_TTL_HOURS
+from rate_limiter import SharedRateLimit
+
+
+MANIFEST_NAME = "manifest.json"
+
+_shared_rate_limit: Optional[SharedRateLimit] = None  # Gán trong mỗi worker process
+
+
+def course_slug(url: str) -> str:
+    """sc-200t00 cho .../training/courses/sc-200t00, path-<tên> cho learning path"""
+    match = re.search(r'/training/(courses|paths)/([^/?#]+)', url)
+    if not match:
+        return 'course-' + hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]
+    kind, name = match.groups()
+    return name if kind == 'courses' else f"path-{name}"
+
+
+def assign_slugs(urls: List[str], known: Dict[str, Dict[str, Any]] = None) -> Dict[str, str]:
+    """Slug cho từng URL, giữ slug cũ trong manifest và thêm hash khi 2 URL trùng slug"""
+    known = known or {}
+    slugs = {url: known[url]['slug'] for url in urls if known.get(url, {}).get('slug')}
+    used = set(slugs.values())
+    for url in urls:
+        if url in slugs:
+            continue
+        slug = course_slug(url)
+        if slug in used:
+            slug = f"{slug}-{hashlib.sha1(url.encode('utf-8')).hexdigest()[:6]}"
+        slugs[url] = slug
+        used.add(slug)
+    return slugs
+
+
+def read_urls(sources: List[str]) -> List[str]:
+    """Mỗi source là 1 URL hoặc file chứa danh sách URL; bỏ URL trùng, giữ thứ tự"""
+    urls = []
+    for source in sources:
+        if source.startswith('http'):
+            urls.append(source)
+            continue
+        with open(source, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    urls.append(line)
+    return list(dict.fromkeys(urls))
+
+
+class BatchManifest:
+    """output/batch/manifest.json: url -> {slug, status, output, modules, units, videos, ...}"""
+
+    def __init__(self, output_dir: Path):
+        self.path = output_dir / MANIFEST_NAME
+        self.courses: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.courses = json.load(f).get('courses', {})
+
+    def is_done(self, url: str) -> bool:
+        entry = self.courses.get(url)
+        return bool(entry and entry.get('status') == 'done' and Path(entry['output']).exists())
+
+    def mark(self, url: str, **entry):
+        self.courses[url] = {**self.courses.get(url, {}), **entry}
+        self.save()
+
+    def totals(self) -> Dict[str, int]:
+        entries = self.courses.values()
+        return {
+            'courses': len(self.courses),
+            'done': sum(1 for e in entries if e.get('status') == 'done'),
+            'failed': sum(1 for e in entries if e.get('status') == 'error'),
+            'modules': sum(e.get('modules', 0) for e in entries),
+            'units': sum(e.get('units', 0) for e in entries),
+            'videos': sum(e.get('videos', 0) for e in entries),
+        }
+
+    def save(self):
+        # Ghi file tạm rồi rename để manifest không bị hỏng khi dừng giữa chừng
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'updated_at': datetime.now().isoformat(), 'totals': self.totals(),
+                       'courses': self.courses}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def _init_worker(shared_rate_limit: SharedRateLimit):
+    global _shared_rate_limit
+    _shared_rate_limit = shared_rate_limit
+
+
+async def _crawl_course(url: str, course_dir: str, slug: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    from crawler import MicrosoftLearnCrawler
+    from auth_helper import AuthSession
+
+    output_file = f"{slug}.json"
+    previous = os.path.join(course_dir, output_file)
+    crawler = MicrosoftLearnCrawler(
+        url,
+        concurrency=options['concurrency'],
+        fetch_mode=options['fetch_mode'],
+        launch_profile=options['profile'],
+        output_dir=course_dir,
+        shared_rate_limit=_shared_rate_limit,
+        module_cache=options['module_cache'],
+        cache_ttl_hours=options['cache_ttl'],
+        auth=AuthSession(options['auth'], relogin=False) if options['auth'] else None,
+    )
+    await crawler.crawl(
+        max_modules=options['max_modules'],
+        incremental_from=previous if options['incremental'] and os.path.exists(previous) else None,
+    )
+    if not crawler.data['modules']:
+        return {'status': 'error', 'error': "Không crawl được module nào (xem crawl.log)"}
+
+    summary = crawler.save_data(output_file)
+    return {
+        'status': 'done',
+        'output': os.path.join(course_dir, output_file),
+        'modules': summary['total_modules'],
+        'units': summary['total_units'],
+        'videos': summary['total_videos'],
+        'module_errors': sum(1 for m in crawler.data['modules'] if 'error' in m),
+        'rate_limiter': crawler.rate_limiter.stats(),
+    }
+
+
+def crawl_course(url: str, slug: str, output_dir: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Chạy trong worker process: crawl 1 course, log ra <slug>/crawl.log"""
+    course_dir = os.path.join(output_dir, slug)
+    os.makedirs(course_dir, exist_ok=True)
+    start = time.time()
+
+    with open(os.path.join(course_dir, 'crawl.log'), 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log):
+        try:
+            result = asyncio.run(_crawl_course(url, course_dir, slug, options))
+        except Exception as e:
+            print(f"❌ Lỗi: {e}")
+            result = {'status': 'error', 'error': str(e)}
+
+    return {
+        'slug': slug,
+        'pid': os.getpid(),
+        'elapsed': round(time.time() - start, 1),
+        'finished_at': datetime.now().isoformat(),
+        **result,
+    }
+
+
+def run_batch(urls: List[str], output_dir: str = os.path.join("output", "batch"), processes: int = None,
+              rate: float = 6.0, options: Dict[str, Any] = None, skip_done: bool = False) -> BatchManifest:
+    """Crawl danh sách URL bằng process pool, cập nhật manifest mỗi khi 1 course xong"""
+    options = {
+        'concurrency': 4,
+        'fetch_mode': 'browser',
+        'profile': DEFAULT_LAUNCH_PROFILE,
+        'max_modules': None,
+        'incremental': False,
+        'module_cache': None,
+        'cache_ttl': DEFAULT_TTL_HOURS,
+        'auth': None,
+        **(options or {}),
+    }
+    manifest = BatchManifest(Path(output_dir))
+    todo = [url for url in urls if not (skip_done and manifest.is_done(url))]
+    if len(todo) < len(urls):
+        print(f"♻️  Bỏ qua {len(urls) - len(todo)} courses đã xong")
+    if not todo:
+        return manifest
+
+    processes = max(1, min(processes or os.cpu_count() or 1, len(todo)))
+    print(f"🚀 Crawl {len(todo)} courses bằng {processes} processes, tối đa {rate} req/s chung")
+    slugs = assign_slugs(urls, manifest.courses)
+    for url in todo:
+        manifest.mark(url, slug=slugs[url], status='pending')
+
+    if options['auth']:
+        # Làm mới session 1 lần ở process cha, workers chỉ nạp file (không tự đăng nhập lại)
+        from auth_helper import refresh_session
+        asyncio.run(refresh_session(options['auth'], options['profile']))
+
+    shared = SharedRateLimit(rate)
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(shared,)) as executor:
+        futures = {executor.submit(crawl_course, url, slugs[url], output_dir, options): url for url in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            url = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:  # Worker process chết (vd. browser crash làm process bị kill)
+                entry = {'slug': slugs[url], 'status': 'error', 'error': str(e)}
+            manifest.mark(url, **entry)
+            if entry['status'] == 'done':
+                print(f"  ✅ [{done}/{len(todo)}] {entry['slug']}: {entry['modules']} modules, "
+                      f"{entry['units']} units, {entry['videos']} videos ({entry['elapsed']}s)")
+            else:
+                print(f"  ❌ [{done}/{len(todo)}] {entry['slug']}: {entry.get('error')}")
+
+    totals = manifest.totals()
+    print(f"\n🎉 Xong {totals['done']}/{totals['courses']} courses trong {time.time() - start:.1f}s "
+          f"({totals['modules']} modules, {totals['units']} units, {totals['failed']} lỗi)")
+    print(f"📋 Manifest: {manifest.path}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl nhiều Microsoft Learn courses song song")
+    parser.add_argument('sources', nargs='+', help="URL course/learning path hoặc file danh sách URL")
+    parser.add_argument('--processes', type=int, default=None, help="Số worker process (mặc định = số CPU)")
+    parser.add_argument('--rate', type=float, default=6.0, help="Tổng số request/giây cho mọi process")
+    parser.add_argument('--concurrency', type=int, default=4, help="Số pages song song trong mỗi process")
+    parser.add_argument('--max-modules', type=int, default=0, help="0 = crawl tất cả modules")
+    parser.add_argument('--fetch-mode', choices=['browser', 'http'], default='browser')
+    parser.add_argument('--profile', choices=list(LAUNCH_PROFILES), default=DEFAULT_LAUNCH_PROFILE)
+    parser.add_argument('--output-dir', default=os.path.join("output", "batch"))
+    parser.add_argument('--incremental', action='store_true',
+                        help="Chỉ extract lại units đã thay đổi so với output lần trước của từng course")
+    parser.add_argument('--module-cache', nargs='?', const=os.path.join("output", "module_cache.db"),
+                        metavar='PATH', help="Module cache dùng chung cho mọi course (module trùng chỉ crawl 1 lần)")
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL_HOURS, metavar='HOURS')
+    # Chỉ storage state: user-data dir không dùng chung được giữa nhiều process Chromium
+    parser.add_argument('--auth', nargs='?', const=SESSION_FILE, metavar='PATH',
+                        help="Session đã lưu (auth_helper.py) dùng chung cho mọi worker")
+    parser.add_argument('--skip-done', action='store_true', help="Bỏ qua courses đã xong trong manifest")
+    args = parser.parse_args()
+
+    urls = read_urls(args.sources)
+    if not urls:
+        print("❌ Không có URL nào")
+        return
+
+    run_batch(urls, args.output_dir, args.processes, args.rate, {
+        'concurrency': args.concurrency,
+        'fetch_mode': args.fetch_mode,
+        'profile': args.profile,
+        'max_modules': args.max_modules or None,
+        'incremental': args.incremental,
+        'module_cache': args.module_cache,
+        'cache_ttl': args.cache_ttl,
+        'auth': args.auth,
+    }, skip_done=args.skip_done)
+
+
+if __name__ == "__main__":
+    main()
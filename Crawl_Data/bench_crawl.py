@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Crawl Benchmark
+Chạy các crawler trên fixture site local (bench_site.py) và đo:
+- pages/sec (số trang server đã phục vụ / thời gian crawl)
+- p50/p95 latency mỗi trang (page.goto / HttpFetcher._request phía crawler)
+- Playwright round-trips mỗi unit (số message gửi qua Playwright connection)
+- Peak RSS của cả process tree (Python + driver + Chromium)
+
+Kết quả được ghi thêm vào output/bench/results.jsonl và so sánh với lần chạy trước
+cùng cấu hình để thấy regression.
+
+    python bench_crawl.py                              # tất cả targets, site tổng hợp
+    python bench_crawl.py crawler-http full --latency 80 --jitter 20
+    python bench_crawl.py --fixtures bench_fixtures/sc200
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from bench_site import COURSE_PATH, FixtureSite, build_synthetic_site, load_recorded_site  # noqa: E402
+
+
+TARGETS = {
+    'crawler': 'crawler.py (Playwright, page pool)',
+    'crawler-http': 'crawler.py (fetch_mode="http")',
+    'full': 'ms_learn_full_crawler.py',
+    'markdown': 'test_crawler.py (Markdown export)',
+}
+
+RESULTS_PATH = os.path.join("output", "bench", "results.jsonl")
+
+# Chênh lệch > 10% so với lần trước thì đánh dấu regression
+REGRESSION_THRESHOLD = 0.10
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentile kiểu nearest-rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+# ===== Process con: chạy 1 crawler với instrumentation =====
+
+def instrument(probe: Dict[str, Any]):
+    """Đo thời gian page.goto/fetch và đếm round-trips qua Playwright connection"""
+    from playwright.async_api import Page
+    from playwright._impl._connection import Channel
+    from http_fetcher import HttpFetcher
+
+    def timed(original):
+        async def wrapper(self, url, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await original(self, url, *args, **kwargs)
+            finally:
+                probe['latencies'].append(time.perf_counter() - start)
+        return wrapper
+
+    Page.goto = timed(Page.goto)
+    HttpFetcher._request = timed(HttpFetcher._request)
+
+    inner_send = Channel.inner_send
+
+    async def counted_send(self, *args, **kwargs):
+        probe['round_trips'] += 1
+        return await inner_send(self, *args, **kwargs)
+
+    Channel.inner_send = counted_send
+
+
+def unlimit(crawler):
+    """Bỏ giới hạn rate để đo tốc độ của chính crawler (trừ khi --keep-rate-limit)"""
+    from rate_limiter import AdaptiveRateLimiter
+    limiter = AdaptiveRateLimiter(rate=1000, max_rate=1000, max_concurrency=getattr(crawler, 'concurrency', 1))
+    limiter.concurrency = limiter.max_concurrency
+    crawler.rate_limiter = limiter
+    if getattr(crawler, 'fetcher', None) is not None:
+        crawler.fetcher.limiter = limiter
+
+
+def count_failed(modules: List[Dict[str, Any]]) -> int:
+    """Số modules + units có 'error' (crawler bắt lỗi và đánh dấu thay vì raise)"""
+    return sum(('error' in m) + sum('error' in u for u in m.get('units', [])) for m in modules)
+
+
+async def run_target(target: str, args) -> Dict[str, Any]:
+    """Chạy crawl của target, trả về số modules/units đã crawl và số modules/units bị lỗi"""
+    course_url = f"{args.base_url}{args.course_path}"
+
+    if target in ('crawler', 'crawler-http'):
+        from crawler import MicrosoftLearnCrawler
+        crawler = MicrosoftLearnCrawler(course_url, concurrency=args.concurrency,
+                                        fetch_mode='http' if target == 'crawler-http' else 'browser')
+        crawler.base_url = args.base_url
+        if not args.keep_rate_limit:
+            unlimit(crawler)
+        await crawler.crawl(max_modules=args.max_modules, crawl_units=True)
+        modules = crawler.data['modules']
+        return {'modules': len(modules), 'units': sum(len(m.get('units', [])) for m in modules),
+                'failed': count_failed(modules)}
+
+    if target == 'full':
+        from ms_learn_full_crawler import MicrosoftLearnCrawler
+        crawler = MicrosoftLearnCrawler(course_url)
+        crawler.base_url = args.base_url
+        if not args.keep_rate_limit:
+            unlimit(crawler)
+        await crawler.crawl(max_modules=args.max_modules)
+        modules = [m for p in crawler.data['learning_paths'] for m in p['modules']]
+        crawled = [m for m in modules if 'content' in m]
+        return {'modules': len(crawled), 'units': 0, 'failed': count_failed(modules)}
+
+    if target == 'markdown':
+        # test_crawler.py ở root trùng tên với Crawl_Data/test_crawler.py -> load theo đường dẫn
+        spec = importlib.util.spec_from_file_location('markdown_test_crawler',
+                                                      os.path.join(REPO_ROOT, 'test_crawler.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        class HeadlessCrawler(module.MicrosoftLearnCrawler):
+            async def init_browser(self, headless: bool = True):
+                await super().init_browser(headless=True)
+
+        crawler = HeadlessCrawler(course_url)
+        crawler.base_url = args.base_url
+        crawler.output_dir = os.path.join(args.workdir, 'output_markdown')
+        await crawler.crawl(max_modules=args.max_modules)
+        written = sum(len(files) for _, _, files in os.walk(crawler.output_dir))
+        return {'modules': max(0, written - 1), 'units': 0}  # Trừ README.md index
+
+    raise ValueError(f"Unknown target: {target}")
+
+
+def child_main(args):
+    probe = {'latencies': [], 'round_trips': 0}
+    result: Dict[str, Any] = {'target': args.child}
+    os.chdir(args.workdir)
+    try:
+        instrument(probe)
+        start = time.perf_counter()
+        result.update(asyncio.run(run_target(args.child, args)))
+        result['elapsed'] = time.perf_counter() - start
+        if result.get('failed'):
+            # Số đo của lần chạy lỗi không dùng làm mốc so sánh regression
+            result['error'] = f"{result['failed']} modules/units bị lỗi, xem log"
+    except BaseException as e:
+        result['error'] = f"{type(e).__name__}: {str(e).strip().splitlines()[0] if str(e).strip() else ''}"
+    result['latencies'] = probe['latencies']
+    result['round_trips'] = probe['round_trips']
+    result['self_maxrss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+# ===== Process cha: server + đo RSS + báo cáo =====
+
+def tree_rss(pid: int) -> int:
+    """Tổng RSS (bytes) của pid và tất cả process con, đọc từ /proc (Linux)"""
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                stat = f.read()
+            with open(f'/proc/{entry}/statm', 'r') as f:
+                rss[int(entry)] = int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+        # stat: "pid (comm) state ppid ..." - comm có thể chứa khoảng trắng
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total
+
+
+async def bench_target(site: FixtureSite, target: str, args) -> Dict[str, Any]:
+    site.reset_stats()
+    workdir = tempfile.mkdtemp(prefix=f"bench_{target}_")
+    out_path = os.path.join(workdir, 'result.json')
+    log_path = os.path.join(os.path.dirname(RESULTS_PATH), f"{target}.log")
+
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', target,
+           '--base-url', site.base_url, '--course-path', args.course_path,
+           '--workdir', workdir, '--out', out_path,
+           '--concurrency', str(args.concurrency)]
+    if args.max_modules:
+        cmd += ['--max-modules', str(args.max_modules)]
+    if args.keep_rate_limit:
+        cmd.append('--keep-rate-limit')
+
+    peak_rss = 0
+    with open(log_path, 'w', encoding='utf-8') as log:
+        proc = await asyncio.create_subprocess_exec(*cmd, stdout=log, stderr=subprocess.STDOUT, cwd=HERE)
+        while proc.returncode is None:
+            if sys.platform.startswith('linux'):
+                peak_rss = max(peak_rss, tree_rss(proc.pid))
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=0.2)
+            except asyncio.TimeoutError:
+                pass
+
+    try:
+        with open(out_path, 'r', encoding='utf-8') as f:
+            child = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        child = {'error': f"process exit {proc.returncode}, xem {log_path}", 'latencies': [], 'round_trips': 0}
+
+    pages = sum(count for kind, count in site.hits.items() if kind != 'other')
+    content_pages = len(site.unique_hits.get('unit', ())) or len(site.unique_hits.get('module', ()))
+    elapsed = child.get('elapsed') or 0
+    latencies = child.get('latencies', [])
+    return {
+        'target': target,
+        'timestamp': datetime.now().isoformat(),
+        'config': config_key(args),
+        'error': child.get('error'),
+        'elapsed': round(elapsed, 3),
+        'pages': pages,
+        'hits': dict(site.hits),
+        'modules': child.get('modules', 0),
+        'units': child.get('units', 0),
+        'failed': child.get('failed', 0),
+        'pages_per_sec': round(pages / elapsed, 3) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'round_trips': child.get('round_trips', 0),
+        'round_trips_per_unit': round(child.get('round_trips', 0) / content_pages, 1) if content_pages else 0,
+        'peak_rss_mb': round(max(peak_rss, child.get('self_maxrss', 0)) / 2 ** 20, 1),
+    }
+
+
+def config_key(args) -> Dict[str, Any]:
+    """Cấu hình ảnh hưởng tới số đo, chỉ so sánh các lần chạy cùng cấu hình"""
+    return {
+        'fixtures': args.fixtures or f"synthetic:{args.paths}x{args.modules}x{args.units}",
+        'latency_ms': args.latency,
+        'jitter_ms': args.jitter,
+        'max_modules': args.max_modules,
+        'concurrency': args.concurrency,
+        'rate_limit': args.keep_rate_limit,
+    }
+
+
+def load_previous(path: str) -> Dict[str, Dict[str, Any]]:
+    """Kết quả gần nhất theo (target, config)"""
+    previous = {}
+    if not os.path.exists(path):
+        return previous
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not result.get('error'):
+                previous[(result['target'], json.dumps(result['config'], sort_keys=True))] = result
+    return previous
+
+
+def delta(current: float, before: float, higher_is_better: bool) -> str:
+    if not before:
+        return ""
+    change = (current - before) / before
+    worse = change < -REGRESSION_THRESHOLD if higher_is_better else change > REGRESSION_THRESHOLD
+    return f" ({change:+.0%}{' ⚠️' if worse else ''})"
+
+
+def print_report(results: List[Dict[str, Any]], previous: Dict[str, Dict[str, Any]]):
+    print("\n" + "=" * 100)
+    print(f"{'target':<14}{'pages':>7}{'pages/s':>18}{'p50 ms':>18}{'p95 ms':>18}{'rt/unit':>16}{'RSS MB':>16}")
+    print("-" * 100)
+    for r in results:
+        if r['error']:
+            print(f"{r['target']:<14} ❌ {r['error']}")
+            continue
+        before = previous.get((r['target'], json.dumps(r['config'], sort_keys=True)), {})
+        print(f"{r['target']:<14}{r['pages']:>7}"
+              f"{str(r['pages_per_sec']) + delta(r['pages_per_sec'], before.get('pages_per_sec'), True):>18}"
+              f"{str(r['p50_ms']) + delta(r['p50_ms'], before.get('p50_ms'), False):>18}"
+              f"{str(r['p95_ms']) + delta(r['p95_ms'], before.get('p95_ms'), False):>18}"
+              f"{str(r['round_trips_per_unit']) + delta(r['round_trips_per_unit'], before.get('round_trips_per_unit'), False):>16}"
+              f"{str(r['peak_rss_mb']) + delta(r['peak_rss_mb'], before.get('peak_rss_mb'), False):>16}")
+    print("=" * 100)
+    print("(±% so với lần chạy trước cùng cấu hình, ⚠️ = regression > 10%)")
+
+
+async def bench(args):
+    if args.fixtures:
+        pages, args.course_path = load_recorded_site(args.fixtures)
+    else:
+        pages = build_synthetic_site(paths=args.paths, modules_per_path=args.modules,
+                                     units_per_module=args.units)
+        args.course_path = COURSE_PATH
+
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    previous = load_previous(RESULTS_PATH)
+
+    site = await FixtureSite(pages, latency_ms=args.latency, jitter_ms=args.jitter).start()
+    print(f"🌐 Fixture site: {site.base_url}{args.course_path} ({len(pages)} trang, "
+          f"latency {args.latency}±{args.jitter} ms)")
+    results = []
+    try:
+        for target in args.targets or list(TARGETS):
+            print(f"⏱️  Benchmark {target}: {TARGETS[target]} ...")
+            result = await bench_target(site, target, args)
+            results.append(result)
+            with open(RESULTS_PATH, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result, ensure_ascii=False) + '\n')
+    finally:
+        await site.stop()
+
+    print_report(results, previous)
+    print(f"💾 Kết quả: {RESULTS_PATH}, log crawler: {os.path.dirname(RESULTS_PATH)}/<target>.log")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark crawlers trên fixture site local")
+    parser.add_argument('targets', nargs='*', help=f"{', '.join(TARGETS)} (mặc định: tất cả)")
+    parser.add_argument('--fixtures', help="Thư mục fixture đã record (bench_site.py record)")
+    parser.add_argument('--paths', type=int, default=2, help="Site tổng hợp: số learning paths")
+    parser.add_argument('--modules', type=int, default=3, help="Site tổng hợp: số modules mỗi path")
+    parser.add_argument('--units', type=int, default=5, help="Site tổng hợp: số units mỗi module (unit cuối là quiz)")
+    parser.add_argument('--latency', type=float, default=50, help="Latency giả lập mỗi request (ms)")
+    parser.add_argument('--jitter', type=float, default=10, help="Dao động latency (ms)")
+    parser.add_argument('--max-modules', type=int, default=3, help="0 = crawl tất cả")
+    parser.add_argument('--concurrency', type=int, default=4, help="concurrency của crawler.py")
+    parser.add_argument('--keep-rate-limit', action='store_true',
+                        help="Giữ AdaptiveRateLimiter mặc định (đo cả thời gian chờ lịch sự)")
+    # Tham số nội bộ cho process con
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--course-path', default=COURSE_PATH, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--out', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    for target in args.targets:
+        if target not in TARGETS:
+            parser.error(f"Unknown target: {target} (có: {', '.join(TARGETS)})")
+    args.max_modules = args.max_modules or None
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.child:
+        child_main(args)
+    else:
+        asyncio.run(bench(args))
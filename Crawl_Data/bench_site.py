@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Benchmark Fixture Site
+Server HTTP local phục vụ các trang course/path/module/unit/quiz giống Learn,
+có thể thêm latency giả lập. Trang lấy từ:
+- Site tổng hợp (build_synthetic_site): markup theo đúng selector mà các crawler dùng
+- Site đã record (record_site / load_recorded_site): HTML thật của learn.microsoft.com
+
+Record trang thật:
+    python bench_site.py record https://learn.microsoft.com/en-us/training/courses/sc-200t00 bench_fixtures/sc200
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+from collections import Counter
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+
+from aiohttp import web
+
+from html_snapshot import make_soup
+from http_fetcher import HttpFetcher
+
+
+LEARN_ORIGIN = "https://learn.microsoft.com"
+COURSE_PATH = "/en-us/training/courses/bench-course/"
+
+
+def page_kind(path: str) -> str:
+    """Phân loại trang theo URL path: course/path/module/unit/other"""
+    if '/training/courses/' in path:
+        return 'course'
+    if '/training/paths/' in path:
+        return 'path'
+    if '/training/modules/' in path:
+        # /training/modules/<module>/ là trang module, /training/modules/<module>/<unit> là unit
+        parts = [p for p in path.split('/training/modules/', 1)[1].split('/') if p]
+        return 'module' if len(parts) <= 1 else 'unit'
+    return 'other'
+
+
+# ===== Site tổng hợp =====
+
+QUIZ_SCRIPT = """
+<script>
+function gradeAssessment() {
+    const questions = document.querySelectorAll('div.quiz-question');
+    let correct = 0;
+    questions.forEach(q => {
+        const checked = q.querySelector('input:checked');
+        if (checked && checked.value === q.dataset.answer) correct++;
+    });
+    let score = document.getElementById('module-assessment-result-score');
+    if (!score) {
+        score = document.createElement('span');
+        score.id = 'module-assessment-result-score';
+        document.getElementById('assessment-result').appendChild(score);
+    }
+    score.textContent = Math.round(100 * correct / questions.length) + '%';
+}
+</script>
+"""
+
+
+def _page(title: str, body: str, description: str = "") -> str:
+    return (f'<!DOCTYPE html><html><head><title>{title}</title>'
+            f'<meta name="description" content="{description or title}"></head>'
+            f'<body><main>{body}</main></body></html>')
+
+
+def _unit_body(title: str, module_idx: int, unit_idx: int, paragraphs: int) -> str:
+    text = [f'<p>{title}: đoạn nội dung số {i + 1} của unit {unit_idx} thuộc module {module_idx}, '
+            f'đủ dài để không bị bộ lọc đoạn ngắn bỏ qua.</p>' for i in range(paragraphs)]
+    return (
+        f'<div id="module-unit-content"><h1 data-bi-name="page-title">{title}</h1>'
+        f'<h2>Overview</h2>{"".join(text)}'
+        f'<h3>Steps</h3><ol>' + ''.join(f'<li>Step {i} - thực hiện thao tác cấu hình số {i}</li>' for i in range(1, 6)) + '</ol>'
+        f'<table><tr><th>Setting</th><th>Value</th></tr><tr><td>Mode</td><td>Enabled</td></tr></table>'
+        f'<pre><code class="language-kusto">SecurityEvent | where EventID == 4625 | take 10</code></pre>'
+        f'<img src="/en-us/training/media/m{module_idx}-u{unit_idx}.png" alt="Diagram {unit_idx}">'
+        f'<iframe src="https://www.youtube.com/embed/bench{module_idx}x{unit_idx}"></iframe>'
+        f'</div>'
+    )
+
+
+def _quiz_body(title: str, answers: List[int], options: int = 3) -> str:
+    questions = []
+    for q_idx, answer in enumerate(answers, 1):
+        choices = ''.join(
+            f'<label class="quiz-choice"><input type="radio" name="q{q_idx}" value="{o}"> '
+            f'Option {chr(65 + o)} for question {q_idx}</label>'
+            for o in range(options)
+        )
+        questions.append(
+            f'<div class="quiz-question" data-answer="{answer}">'
+            f'<div class="quiz-question-title"><p>Question {q_idx}: chọn đáp án đúng?</p></div>{choices}</div>'
+        )
+    return (
+        f'<div id="module-unit-content"><h1 data-bi-name="page-title">{title}</h1>{"".join(questions)}'
+        f'<button data-bi-name="module-unit-module-assessment-submit" onclick="gradeAssessment()">Submit answers</button>'
+        f'<div id="assessment-result"></div></div>{QUIZ_SCRIPT}'
+    )
+
+
+def build_synthetic_site(paths: int = 2, modules_per_path: int = 3, units_per_module: int = 5,
+                         paragraphs: int = 6, quiz_answers: Tuple[int, ...] = (1, 2)) -> Dict[str, str]:
+    """
+    Tạo site {url_path: html}. Link dạng path tuyệt đối (/en-us/...) để chạy với base_url bất kỳ.
+    Unit cuối mỗi module là quiz "Module assessment".
+    """
+    pages: Dict[str, str] = {}
+    path_links = []
+    for p in range(1, paths + 1):
+        path_url = f"/en-us/training/paths/bench-path-{p}/"
+        path_links.append(f'<a href="{path_url}">Bench learning path {p}</a>')
+
+        module_links = []
+        for m in range(1, modules_per_path + 1):
+            module_idx = (p - 1) * modules_per_path + m
+            module_url = f"/en-us/training/modules/bench-p{p}-m{m}/"
+            module_title = f"Bench module {module_idx}"
+            module_links.append(f'<a href="{module_url}">{module_title}</a>')
+
+            unit_links = []
+            for u in range(1, units_per_module + 1):
+                is_quiz = u == units_per_module
+                unit_title = "Module assessment" if is_quiz else ("Introduction" if u == 1 else f"Unit {u} topic {module_idx}")
+                unit_url = f"{module_url}{u}-{'module-assessment' if is_quiz else f'unit-{u}'}"
+                unit_links.append(f'<a class="unit-title display-block font-size-md has-line-height-reset" '
+                                  f'href="{unit_url}">{unit_title}</a>')
+                body = _quiz_body(unit_title, list(quiz_answers)) if is_quiz else \
+                    _unit_body(unit_title, module_idx, u, paragraphs)
+                pages[unit_url] = _page(unit_title, body)
+
+            pages[module_url] = _page(module_title, (
+                f'<h1 data-bi-name="page-title">{module_title}</h1>'
+                f'<span data-bi-name="duration">{units_per_module * 5} min</span>'
+                f'{"".join(unit_links)}'
+                f'{_unit_body(module_title, module_idx, 0, 2)}'
+            ), description=f"Mô tả của {module_title}")
+
+        pages[path_url] = _page(f"Bench learning path {p}",
+                                f'<h1>Bench learning path {p}</h1>{"".join(module_links)}')
+
+    pages[COURSE_PATH] = _page("Bench course", f'<h1>Bench course</h1>{"".join(path_links)}')
+    return pages
+
+
+# ===== Site đã record =====
+
+def load_recorded_site(fixture_dir: str) -> Tuple[Dict[str, str], str]:
+    """Đọc manifest.json của thư mục fixture, trả về ({url_path: html}, course_path)"""
+    with open(os.path.join(fixture_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    pages = {}
+    for path, filename in manifest['pages'].items():
+        with open(os.path.join(fixture_dir, filename), 'r', encoding='utf-8') as f:
+            pages[path] = f.read()
+    return pages, manifest['course']
+
+
+async def record_site(course_url: str, fixture_dir: str, max_modules: int = 10):
+    """Tải course -> paths -> modules -> units từ Learn và lưu thành fixture"""
+    os.makedirs(os.path.join(fixture_dir, 'pages'), exist_ok=True)
+    fetcher = HttpFetcher(max_connections=4)
+    await fetcher.open()
+    manifest = {'course': urlparse(course_url).path, 'pages': {}}
+
+    async def save(url: str) -> str:
+        html = await fetcher.fetch(url)
+        path = urlparse(url).path
+        filename = os.path.join('pages', hashlib.sha1(path.encode('utf-8')).hexdigest()[:16] + '.html')
+        with open(os.path.join(fixture_dir, filename), 'w', encoding='utf-8') as f:
+            f.write(html)
+        manifest['pages'][path] = filename
+        print(f"  💾 {path}")
+        return html
+
+    def links(html: str, selector: str) -> List[str]:
+        urls = []
+        for a in make_soup(html).select(selector):
+            href = (a.get('href') or '').split('?')[0].split('#')[0]
+            if href:
+                url = href if href.startswith('http') else f"{LEARN_ORIGIN}{href}"
+                if url not in urls:
+                    urls.append(url)
+        return urls
+
+    try:
+        course_html = await save(course_url)
+        module_urls = []
+        for path_url in links(course_html, 'a[href*="/training/paths/"]'):
+            for module_url in links(await save(path_url), 'a[href*="/training/modules/"]'):
+                if module_url not in module_urls:
+                    module_urls.append(module_url)
+        for module_url in module_urls[:max_modules]:
+            for unit_url in links(await save(module_url), 'a.unit-title'):
+                await save(unit_url)
+    finally:
+        await fetcher.close()
+
+    with open(os.path.join(fixture_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"✅ Đã record {len(manifest['pages'])} trang -> {fixture_dir}")
+
+
+# ===== Server =====
+
+class FixtureSite:
+    """aiohttp server phục vụ pages với latency giả lập, đếm request theo loại trang"""
+
+    def __init__(self, pages: Dict[str, str], latency_ms: float = 0, jitter_ms: float = 0,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.pages = pages
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.host = host
+        self.port = port
+        self.hits: Counter = Counter()
+        self.unique_hits: Dict[str, set] = {}
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def reset_stats(self):
+        self.hits = Counter()
+        self.unique_hits = {}
+
+    async def handle(self, request: web.Request) -> web.Response:
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        path = request.path
+        html = self.pages.get(path) or self.pages.get(path.rstrip('/') + '/') or self.pages.get(path.rstrip('/'))
+        if html is None:
+            self.hits['other'] += 1
+            return web.Response(status=404)
+
+        kind = page_kind(path)
+        self.hits[kind] += 1
+        self.unique_hits.setdefault(kind, set()).add(path)
+        # Trang record chứa link tuyệt đối tới Learn -> trỏ về server local
+        return web.Response(text=html.replace(LEARN_ORIGIN, self.base_url), content_type='text/html')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/{tail:.*}', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if not self.port:
+            self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def serve_forever(pages: Dict[str, str], latency_ms: float, port: int):
+    site = await FixtureSite(pages, latency_ms=latency_ms, port=port).start()
+    print(f"🌐 Fixture site: {site.base_url}{COURSE_PATH}")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await site.stop()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == 'record':
+        asyncio.run(record_site(sys.argv[2], sys.argv[3]))
+    elif len(sys.argv) >= 2 and sys.argv[1] == 'serve':
+        latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+        asyncio.run(serve_forever(build_synthetic_site(), latency, 8765))
+    else:
+        print("Usage:")
+        print("  python bench_site.py record <course_url> <fixture_dir>")
+        print("  python bench_site.py serve [latency_ms]")
+        sys.exit(1)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Checkpoint Store
+Ghi checkpoint dạng JSONL append-only: mỗi unit/module xong ghi thêm 1 dòng,
+thay vì json.dump lại toàn bộ self.data sau mỗi module.
+Journal có thể compact lại thành file JSON đầy đủ (sc200_course_full.json).
+
+Các loại record:
+  {"kind": "header", "data": {...}}                                   - course_url, crawled_at, ...
+  {"kind": "path", "path_idx": 1, "data": {...}}                      - learning path (không có modules)
+  {"kind": "unit", "module_idx": 1, "unit_idx": 2, "data": {...}}     - unit đã crawl xong
+  {"kind": "module", "module_idx": 1, "path_idx": 1, "data": {...}}   - module đã xong,
+      units đã có record riêng được ghi dạng tham chiếu {"$ref": url}
+"""
+
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+class CheckpointJournal:
+    """Writer append-only, fsync sau mỗi `fsync_every` records"""
+
+    def __init__(self, path: str, fsync_every: int = 10):
+        self.path = path
+        self.fsync_every = max(1, fsync_every)
+        self._file = None
+        self._unsynced = 0
+
+    def open(self, header: Dict[str, Any], append: bool = False):
+        """Mở journal. append=False thì ghi đè journal cũ và ghi header mới"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        is_new = not append or not os.path.exists(self.path)
+        self._file = open(self.path, 'w' if is_new else 'a', encoding='utf-8')
+        if is_new:
+            self.append('header', header)
+            self.sync()
+
+    def append(self, kind: str, data: Dict[str, Any], **meta):
+        """Ghi thêm 1 record"""
+        record = {'kind': kind, **meta, 'data': data}
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def append_unit(self, unit: Dict[str, Any], module_idx: int, unit_idx: int):
+        """Ghi 1 unit đã crawl xong"""
+        self.append('unit', unit, module_idx=module_idx, unit_idx=unit_idx)
+
+    def append_module(self, module: Dict[str, Any], module_idx: int,
+                      path_idx: int = None, journaled_units: bool = False):
+        """
+        Ghi 1 module đã xong. journaled_units=True nghĩa là units đã có record riêng,
+        chỉ ghi tham chiếu để không ghi nội dung 2 lần.
+        """
+        data = dict(module)
+        if journaled_units and 'units' in data:
+            data['units'] = [{'$ref': u['url']} for u in data['units']]
+        meta = {'module_idx': module_idx}
+        if path_idx is not None:
+            meta['path_idx'] = path_idx
+        self.append('module', data, **meta)
+
+    def sync(self):
+        """Flush + fsync xuống đĩa"""
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        if self._file:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+
+def iter_journal(path: str) -> Iterator[Dict[str, Any]]:
+    """Đọc lần lượt từng record, bỏ qua dòng cuối bị ghi dở (crash giữa chừng)"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️  Bỏ qua dòng journal lỗi: {line[:80]}...")
+
+
+def load_journal(path: str) -> List[Dict[str, Any]]:
+    """Đọc tất cả records vào 1 list"""
+    return list(iter_journal(path))
+
+
+def rebuild_data(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Dựng lại data (giống self.data của crawler) từ các records"""
+    data: Dict[str, Any] = {}
+    paths: Dict[int, Dict[str, Any]] = {}
+    units_by_url: Dict[str, Dict[str, Any]] = {}
+    modules: Dict[Any, Dict[str, Any]] = {}
+
+    for record in records:
+        kind = record.get('kind')
+        if kind == 'header':
+            data.update(record['data'])
+        elif kind == 'path':
+            paths[record['path_idx']] = record['data']
+        elif kind == 'unit':
+            units_by_url[record['data']['url']] = record['data']
+        elif kind == 'module':
+            # Record sau ghi đè record trước của cùng module
+            key = (record.get('path_idx'), record['module_idx'])
+            modules[key] = record
+
+    def resolve(module: Dict[str, Any]) -> Dict[str, Any]:
+        module = dict(module)
+        if 'units' in module:
+            module['units'] = [units_by_url.get(u['$ref'], {'url': u['$ref']}) if '$ref' in u else u
+                               for u in module['units']]
+        return module
+
+    ordered = [modules[key] for key in sorted(modules, key=lambda k: (k[0] or 0, k[1]))]
+
+    if paths:
+        learning_paths = []
+        for path_idx in sorted(paths):
+            path = dict(paths[path_idx])
+            path['modules'] = [resolve(r['data']) for r in ordered if r.get('path_idx') == path_idx]
+            learning_paths.append(path)
+        data['learning_paths'] = learning_paths
+    else:
+        data['modules'] = [resolve(r['data']) for r in ordered]
+
+    return data
+
+
+def load_completed(path: str) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Đọc trạng thái đã crawl để resume, từ journal (.jsonl), SQLite store (.db)
+    hoặc file JSON (output cũ, checkpoint_module_N.json).
+    Trả về (modules_by_url, units_by_url), chỉ gồm module/unit không bị lỗi.
+    """
+    units: List[Dict[str, Any]] = []
+    if path.endswith('.jsonl'):
+        records = load_journal(path)
+        data = rebuild_data(records)
+        # Unit của module chưa xong cũng được giữ lại
+        units.extend(r['data'] for r in records if r.get('kind') == 'unit')
+    elif path.endswith('.db') and os.path.exists(path):
+        from sqlite_store import CrawlStore
+        with CrawlStore(path) as store:
+            data = store.load_data()
+    elif os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    else:
+        data = {}
+
+    modules = list(data.get('modules', []))
+    for learning_path in data.get('learning_paths', []):
+        modules.extend(learning_path.get('modules', []))
+    for module in modules:
+        units.extend(module.get('units', []))
+
+    # content rỗng = unit chưa crawl chi tiết (crawl_units=False hoặc $ref không tìm thấy)
+    done_units = {u['url']: u for u in units if u.get('url') and u.get('content') and 'error' not in u}
+    done_modules = {m['url']: m for m in modules if m.get('url') and 'error' not in m}
+    return done_modules, done_units
+
+
+def compact_journal(journal_path: str, output_path: str) -> Dict[str, Any]:
+    """Compact journal thành 1 file JSON đầy đủ"""
+    data = rebuild_data(load_journal(journal_path))
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"💾 Đã compact {journal_path} -> {output_path}")
+    return data
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python checkpoint_store.py output/crawl_journal.jsonl [output/sc200_course_full.json]")
+        sys.exit(1)
+    compact_journal(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "output/sc200_course_full.json")
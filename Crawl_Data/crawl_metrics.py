@@ -0,0 +1,155 @@
+"""
+Crawl Metrics
+Đo thời gian theo từng giai đoạn (goto, wait, extract_*, parse, save...) cho mỗi unit/module.
+
+    metrics = CrawlMetrics()
+    metrics.activate()                      # các span() trong task hiện tại và task con ghi vào metrics
+    with metrics.item(unit['url'], 'unit'):
+        with span('goto'):
+            ...
+
+span() là no-op khi chưa có metrics nào được activate, nên các module dùng chung
+(page_readiness, http_fetcher, rate_limiter) gọi được mà không cần truyền metrics vào.
+"""
+
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+_active: ContextVar[Optional['CrawlMetrics']] = ContextVar('crawl_metrics', default=None)
+_current_item: ContextVar[Optional[str]] = ContextVar('crawl_metrics_item', default=None)
+
+
+def span(stage: str):
+    """Span trên metrics đang active (no-op nếu không có)"""
+    metrics = _active.get()
+    return metrics.span(stage) if metrics else nullcontext()
+
+
+def record(stage: str, seconds: float):
+    """Ghi 1 duration đã đo sẵn (vd. timings trả về từ process pool)"""
+    metrics = _active.get()
+    if metrics:
+        metrics.record(stage, seconds)
+
+
+def add_bytes(n: int):
+    """Cộng số bytes HTML đã tải cho item hiện tại"""
+    metrics = _active.get()
+    if metrics:
+        metrics.add_bytes(n)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class CrawlMetrics:
+    """Gom duration theo stage (toàn crawl) và theo item (unit/module)"""
+
+    def __init__(self):
+        self.started_at = datetime.now().isoformat()
+        self._start = time.perf_counter()
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.total_bytes = 0
+
+    def activate(self):
+        """Đặt làm metrics active cho context hiện tại (task tạo sau đó thừa hưởng)"""
+        _active.set(self)
+
+    def _item(self) -> Optional[Dict[str, Any]]:
+        key = _current_item.get()
+        return self.items.get(key) if key else None
+
+    @contextmanager
+    def item(self, key: str, kind: str, **info):
+        """Các span bên trong được tính cho item này (unit/module)"""
+        entry = self.items.setdefault(key, {'kind': kind, **info, 'stages': {}, 'bytes': 0, 'counts': {}})
+        token = _current_item.set(key)
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry['total'] = round(entry.get('total', 0) + time.perf_counter() - start, 4)
+            _current_item.reset(token)
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float):
+        self.stages[stage].append(seconds)
+        entry = self._item()
+        if entry is not None:
+            entry['stages'][stage] = round(entry['stages'].get(stage, 0) + seconds, 4)
+
+    def add_bytes(self, n: int):
+        self.total_bytes += n
+        entry = self._item()
+        if entry is not None:
+            entry['bytes'] += n
+
+    def count(self, name: str, n: int = 1):
+        """Đếm (videos, images, questions...) cho toàn crawl và item hiện tại"""
+        self.counters[name] += n
+        entry = self._item()
+        if entry is not None:
+            entry['counts'][name] = entry['counts'].get(name, 0) + n
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        """Thống kê mỗi stage: count, total, mean, p50, p95, max (giây)"""
+        result = {}
+        for stage, values in self.stages.items():
+            result[stage] = {
+                'count': len(values),
+                'total': round(sum(values), 3),
+                'mean': round(sum(values) / len(values), 4),
+                'p50': round(_percentile(values, 50), 4),
+                'p95': round(_percentile(values, 95), 4),
+                'max': round(max(values), 4),
+            }
+        return dict(sorted(result.items(), key=lambda kv: -kv[1]['total']))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'started_at': self.started_at,
+            'elapsed': round(time.perf_counter() - self._start, 3),
+            'total_bytes': self.total_bytes,
+            'counters': dict(self.counters),
+            'stages': self.breakdown(),
+            'items': self.items,
+        }
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def print_breakdown(self):
+        elapsed = time.perf_counter() - self._start
+        print(f"\n⏱️  Thời gian theo giai đoạn (tổng {elapsed:.1f}s, "
+              f"{self.total_bytes / 2 ** 20:.1f} MB HTML, {len(self.items)} units/modules):")
+        print(f"  {'stage':<24}{'count':>7}{'total s':>10}{'mean s':>9}{'p50 s':>9}{'p95 s':>9}{'max s':>9}")
+        for stage, s in self.breakdown().items():
+            print(f"  {stage:<24}{s['count']:>7}{s['total']:>10.2f}{s['mean']:>9.3f}"
+                  f"{s['p50']:>9.3f}{s['p95']:>9.3f}{s['max']:>9.3f}")
+        # Units chậm nhất
+        slow = sorted((i for i in self.items.items() if i[1]['kind'] == 'unit'),
+                      key=lambda kv: -kv[1].get('total', 0))[:3]
+        for url, entry in slow:
+            top = max(entry['stages'].items(), key=lambda kv: kv[1], default=('-', 0))
+            print(f"  🐢 {entry.get('total', 0):.2f}s {entry.get('title', url)} (chậm nhất: {top[0]} {top[1]:.2f}s)")
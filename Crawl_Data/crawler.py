@@ -3,56 +3,175 @@ Microsoft Learn Course Crawler
 Crawl toàn bộ course content từ Microsoft Learn
 """
 
+import argparse
 import asyncio
 import itertools
 import json
 import re
 from playwright.async_api import async_playwright, Page
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+from page_pool import PagePool
+from pipeline import Stage, run_pipeline, print_pipeline_stats
+from page_readiness import goto_ready, reload_ready, wait_until_ready
+from dom_extract import (
+    FULL_CONTENT_JS, CODE_BLOCKS_JS, IMAGES_JS,
+    empty_full_content, build_full_content, build_code_blocks, build_images
+)
+from html_snapshot import make_soup, parse_unit_snapshot_timed, save_snapshot
+from http_fetcher import HttpFetcher
+from rate_limiter import AdaptiveRateLimiter, SharedRateLimit
+from request_blocking import RequestBlocker
+from launch_profiles import LAUNCH_PROFILES, DEFAULT_LAUNCH_PROFILE, get_launch_profile, launch_options, context_options
+from checkpoint_store import CheckpointJournal, load_completed
+from crawl_metrics import CrawlMetrics, add_bytes, span
+from incremental import RecrawlReport, make_validators
+from sqlite_store import CrawlStore, export_json
+from url_frontier import CrawlFrontier
+from module_cache import ModuleCache, DEFAULT_CACHE_PATH, DEFAULT_TTL_HOURS, module_version, page_module_version
+from download_videos import VideoDownloader, check_dependencies
+from auth_helper import AuthSession, SESSION_FILE
 
 
 class MicrosoftLearnCrawler:
-    def __init__(self, course_url: str):
+    MAIN_SELECTOR = 'article, main, .content, [role="main"]'
+    UNIT_LINK_SELECTOR = 'a.unit-title.display-block.font-size-md.has-line-height-reset'
+    
+    def __init__(self, course_url: str, concurrency: int = 4, parse_snapshot: bool = True,
+                 parse_workers: int = 2, snapshot_dir: str = None, fetch_mode: str = 'browser',
+                 blocked_resource_types: List[str] = None, blocked_url_patterns: List[str] = None,
+                 launch_profile: str = DEFAULT_LAUNCH_PROFILE, store_path: str = None,
+                 output_dir: str = "output", shared_rate_limit: SharedRateLimit = None,
+                 module_cache: str = None, cache_ttl_hours: float = DEFAULT_TTL_HOURS,
+                 video_dir: str = None, video_workers: int = 2, auth: AuthSession = None):
         self.course_url = course_url
         self.base_url = "https://learn.microsoft.com"
+        # URL chuẩn hoá + mỗi trang chỉ fetch 1 lần trong 1 lần chạy
+        self.frontier = CrawlFrontier.for_course(course_url)
+        self.concurrency = max(1, concurrency)  # Số pages crawl song song
+        self.output_dir = output_dir  # Journal, JSON, summary.json, metrics.json
+        # Mọi navigation/fetch đi qua limiter: tự tăng tốc khi server nhanh, giảm khi bị 429/5xx/chậm
+        # shared_rate_limit: trần chung khi nhiều process cùng crawl (batch_crawl.py)
+        self.rate_limiter = AdaptiveRateLimiter(max_concurrency=self.concurrency, shared=shared_rate_limit)
+        self.parse_snapshot = parse_snapshot  # Extract trên snapshot HTML thay vì live DOM
+        self.parse_workers = parse_workers    # Số process parse HTML (0 = parse ngay trên event loop)
+        self.snapshot_dir = snapshot_dir      # Lưu snapshot để re-extract mà không cần crawl lại
+        self.parse_executor = None
+        # 'browser' = Playwright cho mọi trang, 'http' = aiohttp, chỉ mở browser cho quiz
+        self.fetch_mode = fetch_mode
+        self.fetcher = None
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.page_pool = None
+        self._browser_lock = asyncio.Lock()
+        # Chặn resource không cần cho DOM (None = dùng danh sách mặc định, rỗng = không chặn)
+        self.request_blocker = RequestBlocker(blocked_resource_types, blocked_url_patterns)
+        self.launch_profile = launch_profile  # Xem launch_profiles.LAUNCH_PROFILES
+        self.auth = auth  # Dùng lại session đăng nhập (storage state / user-data dir), None = không đăng nhập
+        # Checkpoint JSONL: mỗi unit/module xong ghi thêm 1 dòng
+        self.journal_path = os.path.join(output_dir, "crawl_journal.jsonl")
+        self.journal = None
+        self.metrics = CrawlMetrics()  # Thời gian từng giai đoạn -> output/metrics.json
+        self.recrawl = None            # RecrawlReport khi crawl incremental
+        # SQLite store (tuỳ chọn): unit xong được ghi vào DB và bỏ content khỏi self.data
+        self.store = CrawlStore(store_path) if store_path else None
+        # Module cache (tuỳ chọn): module đã crawl ở course/path khác trong TTL thì dùng lại
+        self.module_cache = ModuleCache(module_cache, cache_ttl_hours) if module_cache else None
+        # Tải video (tuỳ chọn) ngay trong lúc crawl, stage cuối của pipeline
+        self.video_dir = video_dir
+        self.video_workers = video_workers
+        self.video_downloader = None
         self.data = {
             "course_url": course_url,
             "crawled_at": datetime.now().isoformat(),
             "modules": []
         }
         
-    async def init_browser(self, headless: bool = False):
-        """Khởi tạo browser với Playwright"""
+    async def init_browser(self, headless: bool = None):
+        """Khởi tạo browser với Playwright theo launch profile (headless ghi đè profile nếu truyền vào)"""
+        profile = get_launch_profile(self.launch_profile, headless=headless)
         self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(headless=headless)
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        )
+        if self.auth:
+            # Context mang sẵn session đã lưu, chỉ đăng nhập lại khi session hết hạn
+            self.browser, self.context = await self.auth.launch(self.playwright, profile)
+            await self.auth.ensure(self.context)
+        else:
+            self.browser = await self.playwright.chromium.launch(**launch_options(profile))
+            self.context = await self.browser.new_context(**context_options(profile))
+        await self.request_blocker.install(self.context)  # Chặn images/fonts/media/telemetry
         self.page = await self.context.new_page()
         
+        # Pool các pages để crawl modules/units song song
+        self.page_pool = PagePool(self.context, size=self.concurrency)
+        await self.page_pool.open()
+        
+    async def ensure_browser(self):
+        """Mở browser khi cần (chế độ HTTP chỉ cần browser cho quiz)"""
+        async with self._browser_lock:
+            if self.context is None:
+                try:
+                    await self.init_browser()
+                except BaseException:
+                    await self.close_browser()  # Dừng driver đã start để lần sau mở lại từ đầu
+                    raise
+                
+    async def share_session(self):
+        """
+        Request aiohttp (chế độ HTTP, conditional GET khi incremental) dùng cùng session đăng nhập
+        với browser: lấy cookies từ file session nếu còn hạn, còn lại mở browser để kiểm tra/đăng nhập lại
+        """
+        cookies = None if self.context else self.auth.saved_cookies()
+        if cookies is None:
+            await self.ensure_browser()
+            cookies = await self.context.cookies()
+        self.fetcher.add_cookies(cookies)
+        
+    @asynccontextmanager
+    async def worker_page(self):
+        """Page cho 1 worker: mượn từ pool, chế độ HTTP thì không cần page"""
+        if self.fetch_mode == 'http':
+            yield None
+            return
+        async with self.page_pool.page() as page:
+            yield page
+        
     async def close_browser(self):
-        """Đóng browser"""
-        await self.browser.close()
-        await self.playwright.stop()
+        """Đóng browser, kể cả khi init_browser dừng giữa chừng (driver đã start, Chromium chưa mở được)"""
+        if self.context is not None and self.request_blocker.blocked:
+            print(f"🚫 Đã chặn {self.request_blocker.blocked} requests (images/fonts/media/telemetry)")
+        try:
+            if self.page_pool:
+                await self.page_pool.close()
+            if self.browser:
+                await self.browser.close()
+            elif self.context:
+                await self.context.close()  # Persistent context (user-data dir)
+        finally:
+            if self.playwright:
+                await self.playwright.stop()
+            self.playwright = self.browser = self.context = self.page = self.page_pool = None
         
-    async def wait_for_load(self, timeout: int = 10000):
+    async def wait_for_load(self, timeout: int = 10000, page: Page = None):
         """Đợi trang load xong"""
-        try:
-            await self.page.wait_for_load_state('networkidle', timeout=timeout)
-        except:
-            await self.page.wait_for_load_state('domcontentloaded', timeout=timeout)
+        page = page or self.page
+        with span('wait_for_load'):
+            try:
+                await page.wait_for_load_state('networkidle', timeout=timeout)
+            except:
+                await page.wait_for_load_state('domcontentloaded', timeout=timeout)
             
     async def get_course_modules(self) -> List[Dict[str, Any]]:
         """Lấy danh sách modules từ course page"""
-        print(f"🔍 Đang truy cập course: {self.course_url}")
-        await self.page.goto(self.course_url, wait_until='domcontentloaded')
-        await self.wait_for_load()
+        if self.fetch_mode == 'http':
+            return await self.get_course_modules_http()
         
-        # Đợi content load
-        await asyncio.sleep(2)
+        print(f"🔍 Đang truy cập course: {self.course_url}")
+        await goto_ready(self.page, self.course_url, 'course', limiter=self.rate_limiter)
         
         # Tìm tất cả module links
         modules = []
@@ -65,9 +184,9 @@ class MicrosoftLearnCrawler:
             seen_urls = set()
             for link in module_links:
                 href = await link.get_attribute('href')
-                if href and href not in seen_urls:
-                    full_url = href if href.startswith('http') else f"{self.base_url}{href}"
-                    seen_urls.add(href)
+                full_url = self.frontier.canonical(href, self.course_url) if href else None
+                if full_url and full_url not in seen_urls:
+                    seen_urls.add(full_url)
                     
                     # Lấy title
                     title = await link.text_content() or ""
@@ -91,7 +210,7 @@ class MicrosoftLearnCrawler:
             for link in path_links[:1]:  # Lấy path đầu tiên
                 href = await link.get_attribute('href')
                 if href:
-                    path_url = href if href.startswith('http') else f"{self.base_url}{href}"
+                    path_url = self.frontier.canonical(href, self.course_url)
                     print(f"📚 Đang crawl learning path: {path_url}")
                     path_modules = await self.get_modules_from_path(path_url)
                     modules.extend(path_modules)
@@ -100,9 +219,11 @@ class MicrosoftLearnCrawler:
         
     async def get_modules_from_path(self, path_url: str) -> List[Dict[str, Any]]:
         """Lấy modules từ learning path"""
-        await self.page.goto(path_url, wait_until='domcontentloaded')
-        await self.wait_for_load()
-        await asyncio.sleep(2)
+        if self.fetch_mode == 'http':
+            soup = make_soup(await self.fetcher.fetch(path_url))
+            return self.modules_from_links(soup.select('a[href*="/training/modules/"]'), path_url)
+        
+        await goto_ready(self.page, path_url, 'path', limiter=self.rate_limiter)
         
         modules = []
         module_links = await self.page.query_selector_all('a[href*="/training/modules/"]')
@@ -110,9 +231,9 @@ class MicrosoftLearnCrawler:
         seen_urls = set()
         for link in module_links:
             href = await link.get_attribute('href')
-            if href and href not in seen_urls:
-                full_url = href if href.startswith('http') else f"{self.base_url}{href}"
-                seen_urls.add(href)
+            full_url = self.frontier.canonical(href, path_url) if href else None
+            if full_url and full_url not in seen_urls:
+                seen_urls.add(full_url)
                 
                 title = await link.text_content() or ""
                 title = title.strip()
@@ -127,18 +248,20 @@ class MicrosoftLearnCrawler:
                     
         return modules
         
-    async def crawl_module_content(self, module: Dict[str, Any]) -> Dict[str, Any]:
+    async def crawl_module_content(self, module: Dict[str, Any], page: Page = None) -> Dict[str, Any]:
         """Crawl nội dung chi tiết của 1 module"""
+        if self.fetch_mode == 'http':
+            return await self.crawl_module_content_http(module)
+        
+        page = page or self.page
         print(f"\n📖 Đang crawl module: {module['title']}")
         
         try:
-            await self.page.goto(module['url'], wait_until='domcontentloaded')
-            await self.wait_for_load()
-            await asyncio.sleep(2)
+            await goto_ready(page, module['url'], 'module', limiter=self.rate_limiter)
             
             # Lấy description
             try:
-                desc_elem = await self.page.query_selector('meta[name="description"]')
+                desc_elem = await page.query_selector('meta[name="description"]')
                 if desc_elem:
                     module['description'] = await desc_elem.get_attribute('content')
             except:
@@ -146,20 +269,25 @@ class MicrosoftLearnCrawler:
                 
             # Lấy duration
             try:
-                duration_elem = await self.page.query_selector('span[data-bi-name="duration"]')
+                duration_elem = await page.query_selector('span[data-bi-name="duration"]')
                 if duration_elem:
                     module['duration'] = await duration_elem.text_content()
             except:
                 module['duration'] = ""
                 
+            version = await page_module_version(page)
+            if version:
+                module['updated_at'] = version  # Version nội dung cho module cache
+                
             # Lấy units (các phần học)
-            units = await self.get_module_units()
+            units = await self.get_module_units(page)
             module['units'] = units
             
             print(f"  ✅ Crawled {len(units)} units")
             
         except Exception as e:
             print(f"  ❌ Lỗi: {e}")
+            module['error'] = str(e)  # Đánh dấu để --resume crawl lại module này
             
         return module
         
@@ -169,11 +297,11 @@ class MicrosoftLearnCrawler:
         
         try:
             # Tìm navigation menu hoặc unit list
-            unit_links = await self.page.query_selector_all('a[href*="/training/modules/"][href*="?ns-enrollment-type="]')
+            unit_links = await page.query_selector_all('a[href*="/training/modules/"][href*="?ns-enrollment-type="]')
             
             if not unit_links:
                 # Thử cách khác
-                unit_links = await self.page.query_selector_all('nav a')
+                unit_links = await page.query_selector_all('nav a')
                 
             seen_units = set()
             for link in unit_links:
@@ -198,15 +326,14 @@ class MicrosoftLearnCrawler:
             print(f"    ⚠️  Lỗi khi lấy units: {e}")
             
         return units
-    async def get_module_units(self) -> List[Dict[str, Any]]:
+    async def get_module_units(self, page: Page = None) -> List[Dict[str, Any]]:
     # Lấy units trong module dựa trên class selector
+        page = page or self.page
         units = []
 
         try:
             # Chỉ lấy đúng thẻ a có class unit-title
-            unit_links = await self.page.query_selector_all(
-                'a.unit-title.display-block.font-size-md.has-line-height-reset'
-            )
+            unit_links = await page.query_selector_all(self.UNIT_LINK_SELECTOR)
 
             seen = set()
 
@@ -217,13 +344,11 @@ class MicrosoftLearnCrawler:
                 if not href:
                     continue
 
-                # Loại duplicate
-                if href in seen:
+                # URL chuẩn hoá (bỏ ns-enrollment-*, locale/dấu / thống nhất), loại duplicate
+                full_url = self.frontier.canonical(href, page.url)
+                if full_url in seen:
                     continue
-                seen.add(href)
-
-                # Build URL đầy đủ
-                full_url = href if href.startswith("http") else f"{self.base_url}{href}"
+                seen.add(full_url)
 
                 units.append({
                     "title": title or "Untitled Unit",
@@ -236,6 +361,94 @@ class MicrosoftLearnCrawler:
             print(f"⚠️ Lỗi khi lấy units: {e}")
 
         return units
+    
+    # ===== Chế độ HTTP: lấy HTML bằng aiohttp, parse bằng BeautifulSoup =====
+    
+    async def get_course_modules_http(self) -> List[Dict[str, Any]]:
+        """Lấy danh sách modules từ course page qua HTTP"""
+        print(f"🔍 Đang tải course (HTTP): {self.course_url}")
+        soup = make_soup(await self.fetcher.fetch(self.course_url))
+        
+        modules = self.modules_from_links(soup.select('a[href*="/training/modules/"]'), self.course_url)
+        
+        # Nếu không tìm thấy modules, thử tìm learning paths
+        if not modules:
+            print("🔄 Đang tìm learning paths...")
+            for link in soup.select('a[href*="/training/paths/"]')[:1]:  # Lấy path đầu tiên
+                href = link.get('href')
+                if href:
+                    path_url = self.frontier.canonical(href, self.course_url)
+                    print(f"📚 Đang crawl learning path: {path_url}")
+                    modules.extend(await self.get_modules_from_path(path_url))
+                    
+        return modules
+        
+    def modules_from_links(self, links, page_url: str) -> List[Dict[str, Any]]:
+        """Tạo danh sách modules từ các thẻ <a> đã parse (href resolve theo page_url)"""
+        modules = []
+        seen_urls = set()
+        for link in links:
+            href = link.get('href')
+            full_url = self.frontier.canonical(href, page_url) if href else None
+            if full_url and full_url not in seen_urls:
+                seen_urls.add(full_url)
+                
+                title = link.get_text().strip()
+                if title:
+                    modules.append({
+                        'title': title,
+                        'url': full_url,
+                        'units': []
+                    })
+                    print(f"  ✅ Found module: {title}")
+                    
+        return modules
+        
+    async def crawl_module_content_http(self, module: Dict[str, Any]) -> Dict[str, Any]:
+        """Crawl module qua HTTP: description, duration, units"""
+        print(f"\n📖 Đang crawl module (HTTP): {module['title']}")
+        
+        try:
+            html = await self.fetcher.fetch(module['url'])
+            soup = make_soup(html)
+            
+            version = module_version(html)
+            if version:
+                module['updated_at'] = version  # Version nội dung cho module cache
+            
+            desc_elem = soup.select_one('meta[name="description"]')
+            if desc_elem:
+                module['description'] = desc_elem.get('content')
+                
+            duration_elem = soup.select_one('span[data-bi-name="duration"]')
+            if duration_elem:
+                module['duration'] = duration_elem.get_text()
+                
+            units = []
+            seen = set()
+            for link in soup.select(self.UNIT_LINK_SELECTOR):
+                href = link.get('href')
+                title = link.get_text().strip()
+                full_url = self.frontier.canonical(href, module['url']) if href else None
+                if not full_url or full_url in seen:
+                    continue
+                seen.add(full_url)
+                
+                units.append({
+                    "title": title or "Untitled Unit",
+                    "url": full_url,
+                    "type": self.detect_unit_type(title),
+                    "content": {}
+                })
+            module['units'] = units
+            
+            print(f"  ✅ Crawled {len(units)} units")
+            
+        except Exception as e:
+            print(f"  ❌ Lỗi: {e}")
+            module['error'] = str(e)  # Đánh dấu để --resume crawl lại module này
+            
+        return module
        
     def detect_unit_type(self, title: str) -> str:
         """Xác định loại unit dựa vào title"""
@@ -251,181 +464,264 @@ class MicrosoftLearnCrawler:
         else:
             return 'content'
             
-    async def crawl_unit_detail(self, unit: Dict[str, Any]) -> Dict[str, Any]:
-        """Crawl chi tiết nội dung của unit"""
+    def unit_kind(self, unit: Dict[str, Any]) -> Tuple[bool, bool]:
+        """(is_quiz, is_exercise) theo type/title của unit"""
+        title = unit['title'].lower()
+        is_quiz = unit['type'] == 'quiz' or 'knowledge check' in title
+        is_exercise = unit['type'] == 'exercise' or 'exercise' in title or 'lab' in title
+        return is_quiz, is_exercise
+        
+    async def crawl_unit_detail(self, unit: Dict[str, Any], page: Page = None, html: str = None) -> Dict[str, Any]:
+        """Crawl chi tiết nội dung của unit (fetch_mode='http' dùng luôn html nếu đã tải sẵn)"""
+        html = await self.fetch_unit(unit, page, html)
+        return await self.extract_unit(unit, html)
+        
+    async def fetch_unit(self, unit: Dict[str, Any], page: Page = None, html: str = None) -> Optional[str]:
+        """
+        Giai đoạn fetch của unit: tải trang, trả về snapshot HTML cho extract_unit
+        (None nếu đã extract trên live DOM hoặc bị lỗi). Quiz cần JavaScript nên extract luôn ở đây.
+        """
         print(f"    📄 Crawling unit: {unit['title']}")
         
         try:
-            await self.page.goto(unit['url'], wait_until='domcontentloaded')
-            await self.wait_for_load()
-            await asyncio.sleep(2)  # Tăng delay để load hết
+            is_quiz, is_exercise = self.unit_kind(unit)
+            live = self.fetch_mode != 'http' and not self.parse_snapshot
+            exercise = None
             
-            # Lấy nội dung chi tiết
-            unit['content']['full_content'] = await self.extract_full_content()
-            
-            # Lấy code blocks
-            unit['content']['code_blocks'] = await self.extract_code_blocks()
-            
-            # Lấy videos với download links
-            unit['content']['videos'] = await self.extract_videos_enhanced()
-            
-            # Lấy images
-            unit['content']['images'] = await self.extract_images()
+            if self.fetch_mode == 'http':
+                # Trang unit render phía server -> lấy HTML trực tiếp, không cần browser
+                if html is None:
+                    _, html, headers = await self.fetcher.fetch_conditional(unit['url'])
+                    unit['validators'] = make_validators(headers, html)  # Cho lần crawl incremental sau
+            else:
+                page = page or self.page
+                await goto_ready(page, unit['url'], 'unit', limiter=self.rate_limiter)
+                
+                if self.parse_snapshot:
+                    # Chụp HTML 1 lần rồi parse offline, live DOM chỉ còn dùng cho quiz
+                    with span('snapshot'):
+                        html = await page.content()
+                    add_bytes(len(html))
+                    if 'validators' not in unit:  # Incremental: check_unit đã lưu validators có ETag
+                        unit['validators'] = make_validators({}, html)  # Chỉ có content_hash
+                else:
+                    # Lấy nội dung chi tiết
+                    with span('extract_full_content'):
+                        unit['content']['full_content'] = await self.extract_full_content(page)
+                    
+                    # Lấy code blocks
+                    with span('extract_code_blocks'):
+                        unit['content']['code_blocks'] = await self.extract_code_blocks(page)
+                    
+                    # Lấy videos với download links
+                    with span('extract_videos'):
+                        unit['content']['videos'] = await self.extract_videos_enhanced(page)
+                    
+                    # Lấy images
+                    with span('extract_images'):
+                        unit['content']['images'] = await self.extract_images(page)
+                    
+                    if is_exercise:
+                        with span('extract_exercise'):
+                            exercise = await self.extract_exercise_enhanced(page)
+                    
+                    if 'validators' not in unit:
+                        unit['validators'] = make_validators({}, await page.content())
             
-            # Nếu là quiz, lấy questions với answers
-            if unit['type'] == 'quiz' or 'knowledge check'  in unit['title'].lower():
-                unit['content']['questions'] = await self.extract_quiz_questions_enhanced()
+            # Nếu là quiz, lấy questions với answers (cần JavaScript -> luôn dùng Playwright)
+            if is_quiz:
+                if self.fetch_mode == 'http':
+                    await self.ensure_browser()
+                    async with self.page_pool.page() as quiz_page:
+                        await goto_ready(quiz_page, unit['url'], 'unit', limiter=self.rate_limiter)
+                        with span('extract_quiz'):
+                            unit['content']['questions'] = await self.extract_quiz_questions_enhanced(quiz_page)
+                else:
+                    with span('extract_quiz'):
+                        unit['content']['questions'] = await self.extract_quiz_questions_enhanced(page)
                 
             # Nếu là exercise, lấy tasks chi tiết
-            if unit['type'] == 'exercise' or 'exercise' in unit['title'].lower() or 'lab' in unit['title'].lower():
-                unit['content']['exercise_steps'] = await self.extract_exercise_enhanced()
+            if live and is_exercise:
+                unit['content']['exercise_steps'] = exercise
                 
         except Exception as e:
             print(f"      ❌ Lỗi: {e}")
+            unit['error'] = str(e)  # Đánh dấu để --resume crawl lại unit này
+            import traceback
+            traceback.print_exc()
+            return None
+            
+        return None if live else html
+        
+    async def extract_unit(self, unit: Dict[str, Any], html: Optional[str]) -> Dict[str, Any]:
+        """Giai đoạn extract: parse snapshot HTML của fetch_unit vào unit['content']"""
+        if html is None or 'error' in unit:
+            return unit
+        
+        try:
+            _, is_exercise = self.unit_kind(unit)
+            # Questions (từ live DOM) đứng sau phần parse, giống thứ tự key khi extract tuần tự
+            questions = unit['content'].pop('questions', None)
+            exercise = await self.apply_snapshot(unit, html, is_exercise)
+            if questions is not None:
+                unit['content']['questions'] = questions
+            if is_exercise:
+                unit['content']['exercise_steps'] = exercise
+                
+        except Exception as e:
+            print(f"      ❌ Lỗi: {e}")
+            unit['error'] = str(e)
             import traceback
             traceback.print_exc()
             
         return unit
         
-    async def extract_full_content(self) -> Dict[str, Any]:
+    def canonical_completed(self, modules: Dict[str, Dict[str, Any]], units: Dict[str, Dict[str, Any]]):
+        """Đưa URL trong journal/output cũ về dạng chuẩn hoá để so khớp với lần crawl này"""
+        canonical = self.frontier.canonical
+        nested = (u for m in modules.values() for u in m.get('units') or [])
+        for item in itertools.chain(modules.values(), units.values(), nested):
+            if item.get('url'):
+                item['url'] = canonical(item['url'])
+        return ({canonical(url): m for url, m in modules.items()},
+                {canonical(url): u for url, u in units.items()})
+        
+    def reuse_cached_module(self, module: Dict[str, Any], cached: Dict[str, Any], idx: int,
+                            previous_units: Dict[str, Dict[str, Any]]):
+        """Thay module bằng bản trong module cache (giữ title theo course hiện tại), ghi units vào journal"""
+        title = module['title']
+        module.clear()
+        module.update(cached, title=title)
+        print(f"  🗃️  Dùng module từ cache: {title} ({len(module['units'])} units)")
+        for unit_idx, unit in enumerate(module['units'], 1):
+            self.journal.append_unit(unit, idx, unit_idx)
+            if self.recrawl:
+                self.recrawl.compare_reused(module, unit, previous_units.get(unit['url']))
+        self.metrics.count('cached_modules')
+        
+    def cache_module(self, module: Dict[str, Any]):
+        """Ghi module vừa crawl xong (kèm content các units) vào module cache"""
+        if 'error' in module:
+            return
+        if self.store:
+            # Content units đã được bỏ khỏi RAM, đọc lại từ store
+            module = {**module, 'units': list(self.store.iter_units(module['url']))}
+        if any('error' in u for u in module.get('units', [])):
+            return  # Crawl lại lần sau thay vì cache unit lỗi
+        with span('module_cache'):
+            self.module_cache.put(module)
+        
+    async def check_unit(self, module: Dict[str, Any], unit: Dict[str, Any],
+                         previous: Dict[str, Any] = None):
+        """
+        Conditional GET để so unit với lần crawl trước (incremental).
+        Trả về (unit cũ dùng lại nếu không đổi, html đã tải nếu cần extract lại).
+        """
+        old = (previous or {}).get('validators') or {}
+        try:
+            status, html, headers = await self.fetcher.fetch_conditional(
+                unit['url'], old.get('etag'), old.get('last_modified'))
+        except Exception as e:
+            print(f"      ⚠️  Không kiểm tra được {unit['url']}: {e}")
+            self.recrawl.add(module, 'new' if previous is None else 'changed', unit['url'])
+            return None, None
+        
+        validators = old if status == 304 else make_validators(headers, html)
+        if previous is None:
+            state = 'new'  # Kể cả unit bị lỗi ở lần trước
+        elif status == 304 or validators['content_hash'] == old.get('content_hash'):
+            state = 'unchanged'
+        else:
+            state = 'changed'
+        self.recrawl.add(module, state, unit['url'])
+        
+        if state == 'unchanged':
+            # Giữ extraction cũ, title/type theo trang module hiện tại
+            return {**previous, 'title': unit['title'], 'type': unit['type'], 'validators': validators}, None
+        unit['validators'] = validators
+        return None, html
+        
+    async def apply_snapshot(self, unit: Dict[str, Any], html: str, with_exercise: bool) -> Dict[str, Any]:
+        """Parse snapshot HTML vào unit['content'], trả về exercise (nếu có) để gán sau questions"""
+        if self.snapshot_dir:
+            unit['snapshot'] = save_snapshot(self.snapshot_dir, unit['url'], html)
+        
+        parsed = await self.parse_html(html, with_exercise)
+        exercise = parsed.pop('exercise_steps', None)
+        unit['content'].update(parsed)
+        
+        if unit['content']['videos']:
+            print(f"      🎥 Found {len(unit['content']['videos'])} videos")
+        if exercise is not None:
+            print(f"      🔨 Extracted {len(exercise['steps'])} exercise steps")
+        return exercise
+        
+    async def parse_html(self, html: str, with_exercise: bool = False) -> Dict[str, Any]:
+        """Chạy extractors trên snapshot HTML, trong process pool nếu có"""
+        with span('parse'):  # Gồm cả thời gian đợi process pool
+            if self.parse_executor is None:
+                content, timings = parse_unit_snapshot_timed(html, self.base_url, self.MAIN_SELECTOR, with_exercise)
+            else:
+                loop = asyncio.get_running_loop()
+                content, timings = await loop.run_in_executor(
+                    self.parse_executor, parse_unit_snapshot_timed,
+                    html, self.base_url, self.MAIN_SELECTOR, with_exercise
+                )
+        for stage, seconds in timings.items():
+            self.metrics.record(stage, seconds)
+        return content
+        
+    async def extract_full_content(self, page: Page = None) -> Dict[str, Any]:
         """Trích xuất toàn bộ nội dung bài học"""
-        content = {
-            'sections': [],
-            'headings': [],
-            'paragraphs': [],
-            'lists': [],
-            'tables': []
-        }
+        page = page or self.page
+        content = empty_full_content()
         
         try:
-            # Lấy main content area
-            main_content = await self.page.query_selector('article, main, .content, [role="main"]')
-            if not main_content:
-                return content
-            
-            # Lấy tất cả headings
-            headings = await main_content.query_selector_all('h1, h2, h3, h4, h5, h6')
-            for h in headings:
-                tag = await h.evaluate('el => el.tagName.toLowerCase()')
-                text = await h.text_content()
-                if text and text.strip():
-                    content['headings'].append({
-                        'level': tag,
-                        'text': text.strip()
-                    })
-            
-            # Lấy tất cả paragraphs
-            paragraphs = await main_content.query_selector_all('p')
-            for p in paragraphs:
-                text = await p.text_content()
-                if text and len(text.strip()) > 20:  # Bỏ qua đoạn quá ngắn
-                    content['paragraphs'].append(text.strip())
-            
-            # Lấy lists (ul, ol)
-            lists = await main_content.query_selector_all('ul, ol')
-            for lst in lists:
-                items = await lst.query_selector_all('li')
-                list_items = []
-                for item in items:
-                    text = await item.text_content()
-                    if text:
-                        list_items.append(text.strip())
-                if list_items:
-                    content['lists'].append(list_items)
-            
-            # Lấy tables
-            tables = await main_content.query_selector_all('table')
-            for table in tables:
-                rows = await table.query_selector_all('tr')
-                table_data = []
-                for row in rows:
-                    cells = await row.query_selector_all('td, th')
-                    row_data = []
-                    for cell in cells:
-                        text = await cell.text_content()
-                        row_data.append(text.strip() if text else '')
-                    if row_data:
-                        table_data.append(row_data)
-                if table_data:
-                    content['tables'].append(table_data)
-            
-            # Tạo full text từ tất cả nội dung
-            full_text = []
-            for section in content['headings']:
-                full_text.append(f"\n## {section['text']}\n")
-            for para in content['paragraphs']:
-                full_text.append(para)
-            
-            content['full_text'] = '\n\n'.join(full_text)
+            # 1 lần page.evaluate lấy headings, paragraphs, lists, tables của main content
+            payload = await page.evaluate(FULL_CONTENT_JS, self.MAIN_SELECTOR)
+            content = build_full_content(payload)
             
         except Exception as e:
             print(f"      ⚠️  Lỗi extract content: {e}")
         
         return content
     
-    async def extract_code_blocks(self) -> List[Dict[str, str]]:
+    async def extract_code_blocks(self, page: Page = None) -> List[Dict[str, str]]:
         """Trích xuất code blocks"""
+        page = page or self.page
         code_blocks = []
         
         try:
-            # Tìm code blocks
-            code_elements = await self.page.query_selector_all('pre code, .code-block, pre')
-            
-            for code_elem in code_elements:
-                # Lấy language
-                lang = ''
-                class_attr = await code_elem.get_attribute('class')
-                if class_attr:
-                    # Extract language from class like "language-python"
-                    for cls in class_attr.split():
-                        if 'language-' in cls:
-                            lang = cls.replace('language-', '')
-                            break
-                
-                code_text = await code_elem.text_content()
-                if code_text and len(code_text.strip()) > 10:
-                    code_blocks.append({
-                        'language': lang or 'unknown',
-                        'code': code_text.strip()
-                    })
+            payload = await page.evaluate(CODE_BLOCKS_JS)
+            code_blocks = build_code_blocks(payload)
         
         except Exception as e:
             print(f"      ⚠️  Lỗi extract code blocks: {e}")
         
         return code_blocks
     
-    async def extract_images(self) -> List[Dict[str, str]]:
+    async def extract_images(self, page: Page = None) -> List[Dict[str, str]]:
         """Trích xuất images với thông tin chi tiết"""
+        page = page or self.page
         images = []
         
         try:
-            img_elements = await self.page.query_selector_all('img')
-            
-            for img in img_elements:
-                src = await img.get_attribute('src')
-                alt = await img.get_attribute('alt') or ''
-                title = await img.get_attribute('title') or ''
-                
-                if src and not src.startswith('data:'):  # Bỏ qua base64 images
-                    full_src = src if src.startswith('http') else f"{self.base_url}{src}"
-                    images.append({
-                        'url': full_src.replace('../../', '/en-us/training/'),
-                        'alt': alt,
-                        'title': title
-                    })
+            payload = await page.evaluate(IMAGES_JS)
+            images = build_images(payload, self.base_url)
         
         except Exception as e:
             print(f"      ⚠️  Lỗi extract images: {e}")
         
         return images
     
-    async def extract_videos_enhanced(self) -> List[Dict[str, Any]]:
+    async def extract_videos_enhanced(self, page: Page = None) -> List[Dict[str, Any]]:
         """Trích xuất video links nâng cao với download info"""
+        page = page or self.page
         videos = []
         
         try:
             # 1. YouTube videos
-            youtube_iframes = await self.page.query_selector_all('iframe[src*="youtube.com"], iframe[src*="youtu.be"]')
+            youtube_iframes = await page.query_selector_all('iframe[src*="youtube.com"], iframe[src*="youtu.be"]')
             for iframe in youtube_iframes:
                 src = await iframe.get_attribute('src')
                 if src:
@@ -446,7 +742,7 @@ class MicrosoftLearnCrawler:
                     })
             
             # 2. Microsoft Stream videos
-            stream_iframes = await self.page.query_selector_all('iframe[src*="microsoft.com/videoplayer"], iframe[src*="msit.microsoftstream.com"], iframe[src*="microsoftstream.com"], iframe[src*="learn-video.azurefd.net"] ')
+            stream_iframes = await page.query_selector_all('iframe[src*="microsoft.com/videoplayer"], iframe[src*="msit.microsoftstream.com"], iframe[src*="microsoftstream.com"], iframe[src*="learn-video.azurefd.net"] ')
             for iframe in stream_iframes:
                 src = await iframe.get_attribute('src')
                 if src:
@@ -458,7 +754,7 @@ class MicrosoftLearnCrawler:
                     })
             
             # 3. Direct video URLs
-            video_tags = await self.page.query_selector_all('video')
+            video_tags = await page.query_selector_all('video')
             for video in video_tags:
                 sources = await video.query_selector_all('source')
                 for source in sources:
@@ -475,7 +771,7 @@ class MicrosoftLearnCrawler:
                         })
             
             # 4. Tìm video links trong text
-            page_content = await self.page.content()
+            page_content = await page.content()
             import re
             
             # Tìm các mp4 links
@@ -507,7 +803,7 @@ class MicrosoftLearnCrawler:
             await asyncio.sleep(2)
             
             # Thử click Start quiz nếu có
-            start_buttons = await self.page.query_selector_all('button:has-text("Start"), button:has-text("Begin"), button:has-text("Check your knowledge")')
+            start_buttons = await page.query_selector_all('button:has-text("Start"), button:has-text("Begin"), button:has-text("Check your knowledge")')
             if start_buttons:
                 try:
                     await start_buttons[0].click()
@@ -526,7 +822,7 @@ class MicrosoftLearnCrawler:
             
             question_containers = []
             for selector in question_selectors:
-                elements = await self.page.query_selector_all(selector)
+                elements = await page.query_selector_all(selector)
                 if elements:
                     question_containers = elements
                     break
@@ -621,7 +917,7 @@ class MicrosoftLearnCrawler:
             # Nếu không tìm được câu hỏi, thử cách khác - tìm trong page content
             if not questions:
                 print(f"      🔄 Trying alternative method...")
-                await self.extract_questions_from_text()
+                await self.extract_questions_from_text(page)
                     
         except Exception as e:
             print(f"      ⚠️  Lỗi extract quiz: {e}")
@@ -629,30 +925,31 @@ class MicrosoftLearnCrawler:
             traceback.print_exc()
         
         return questions
-    async def extract_quiz_questions_enhanced(self) -> List[Dict[str, Any]]:
+    async def extract_quiz_questions_enhanced(self, page: Page = None) -> List[Dict[str, Any]]:
         """
         Trích xuất câu hỏi quiz với đáp án, thử submit cho đến khi score = 100%
         """
+        page = page or self.page
         questions_options = []
         correct_answers_found = []
 
         try:
             # Đợi quiz load
-            await asyncio.sleep(2)
+            await wait_until_ready(page, 'quiz')
 
             # Click Start/Begin quiz nếu có
-            start_buttons = await self.page.query_selector_all(
+            start_buttons = await page.query_selector_all(
                 'button:has-text("Start"), button:has-text("Begin"), button:has-text("Check your knowledge")'
             )
             if start_buttons:
                 try:
                     await start_buttons[0].click()
-                    await asyncio.sleep(3)
+                    await wait_until_ready(page, 'quiz_questions')
                 except:
                     pass
 
             # Lấy tất cả câu hỏi
-            question_containers = await self.page.query_selector_all("div.quiz-question")
+            question_containers = await page.query_selector_all("div.quiz-question")
             print(f"🔍 Found {len(question_containers)} questions")
 
             # Lấy câu hỏi + options
@@ -693,24 +990,25 @@ class MicrosoftLearnCrawler:
                     await inp.click(force=True)
 
                 # Click Submit
-                submit_btn = await self.page.query_selector(
+                submit_btn = await page.query_selector(
                     "button[data-bi-name='module-unit-module-assessment-submit']"
                 )
-                await submit_btn.click()
-                await asyncio.sleep(1)
+                # Submit gửi đáp án lên server -> cũng lấy slot của rate limiter
+                async with self.rate_limiter.request():
+                    await submit_btn.click()
+                await wait_until_ready(page, 'quiz_result', timeout=5000)
 
                 # Đọc score tổng
-                score_elem = await self.page.query_selector("#module-assessment-result-score")
+                score_elem = await page.query_selector("#module-assessment-result-score")
                 score_text = await score_elem.text_content() if score_elem else "0%"
                 score = int(score_text.strip().replace("%", "") or 0)
                 print(f"➡ Tried combo {combo}, score: {score}%")
 
                 if score < 100:
-                    # Reload page nếu chưa 100%
-                    await self.page.reload()
-                    await asyncio.sleep(2)
+                    # Reload page nếu chưa 100% (qua rate limiter như mọi navigation khác)
+                    await reload_ready(page, 'quiz_questions', limiter=self.rate_limiter)
                     # Lấy lại element + input
-                    question_containers = await self.page.query_selector_all("div.quiz-question")
+                    question_containers = await page.query_selector_all("div.quiz-question")
                     for i, q_elem in enumerate(question_containers):
                         questions_options[i]["element"] = q_elem
                         option_labels = await q_elem.query_selector_all("label.quiz-choice")
@@ -751,13 +1049,14 @@ class MicrosoftLearnCrawler:
             return []
         
     
-    async def extract_questions_from_text(self) -> List[Dict[str, Any]]:
+    async def extract_questions_from_text(self, page: Page = None) -> List[Dict[str, Any]]:
         """Backup method: Extract questions từ text content"""
+        page = page or self.page
         questions = []
         
         try:
             # Lấy toàn bộ text content
-            content = await self.page.text_content('body')
+            content = await page.text_content('body')
             
             import re
             # Pattern để tìm questions (thường bắt đầu bằng số hoặc "Question")
@@ -784,8 +1083,9 @@ class MicrosoftLearnCrawler:
         
         return questions
     
-    async def extract_exercise_enhanced(self) -> Dict[str, Any]:
+    async def extract_exercise_enhanced(self, page: Page = None) -> Dict[str, Any]:
         """Trích xuất bài tập/lab CHI TIẾT"""
+        page = page or self.page
         exercise = {
             'title': '',
             'description': '',
@@ -797,22 +1097,22 @@ class MicrosoftLearnCrawler:
         
         try:
             # Lấy title và description
-            title_elem = await self.page.query_selector('h1, h2')
+            title_elem = await page.query_selector('h1, h2')
             if title_elem:
                 exercise['title'] = await title_elem.text_content()
             
             # Lấy duration
-            duration_elem = await self.page.query_selector('[class*="duration"], [data-duration]')
+            duration_elem = await page.query_selector('[class*="duration"], [data-duration]')
             if duration_elem:
                 exercise['duration'] = await duration_elem.text_content()
             
             # Lấy description/overview
-            desc_elem = await self.page.query_selector('[class*="description"], [class*="overview"], .intro p')
+            desc_elem = await page.query_selector('[class*="description"], [class*="overview"], .intro p')
             if desc_elem:
                 exercise['description'] = await desc_elem.text_content()
             
             # Lấy requirements/prerequisites
-            req_section = await self.page.query_selector('[class*="requirement"], [class*="prerequisite"]')
+            req_section = await page.query_selector('[class*="requirement"], [class*="prerequisite"]')
             if req_section:
                 req_items = await req_section.query_selector_all('li, p')
                 for item in req_items:
@@ -829,7 +1129,7 @@ class MicrosoftLearnCrawler:
             ]
             
             for selector in step_selectors:
-                steps = await self.page.query_selector_all(selector)
+                steps = await page.query_selector_all(selector)
                 if len(steps) > 3:  # Đủ steps
                     for idx, step in enumerate(steps, 1):
                         text = await step.text_content()
@@ -853,7 +1153,7 @@ class MicrosoftLearnCrawler:
                         break
             
             # Lấy verification/validation steps
-            verify_section = await self.page.query_selector('[class*="verify"], [class*="validation"], [class*="check"]')
+            verify_section = await page.query_selector('[class*="verify"], [class*="validation"], [class*="check"]')
             if verify_section:
                 verify_items = await verify_section.query_selector_all('li, p')
                 for item in verify_items:
@@ -868,9 +1168,40 @@ class MicrosoftLearnCrawler:
         
         return exercise
         
-    async def crawl(self, max_modules: int = None, crawl_units: bool = True):
-        """Hàm main để crawl toàn bộ course"""
-        await self.init_browser(headless=False)  # headless=True để chạy nền
+    async def crawl(self, max_modules: int = None, crawl_units: bool = True, resume_from: str = None,
+                    incremental_from: str = None):
+        """
+        Hàm main để crawl toàn bộ course.
+        resume_from: journal/JSON của lần crawl trước, bỏ qua modules/units đã crawl xong
+        incremental_from: output của lần crawl trước, chỉ extract lại units đã thay đổi
+        """
+        done_modules, done_units = {}, {}
+        same_journal = bool(resume_from) and os.path.abspath(resume_from) == os.path.abspath(self.journal_path)
+        if resume_from:
+            done_modules, done_units = self.canonical_completed(*load_completed(resume_from))
+            print(f"♻️  Resume từ {resume_from}: {len(done_modules)} modules, {len(done_units)} units đã xong")
+        
+        previous_modules, previous_units = {}, {}
+        if incremental_from:
+            previous_modules, previous_units = self.canonical_completed(*load_completed(incremental_from))
+            self.recrawl = RecrawlReport(incremental_from)
+            print(f"🔁 Incremental so với {incremental_from}: {len(previous_units)} units đã có")
+        
+        if self.fetch_mode == 'http' or incremental_from:
+            # Incremental kiểm tra unit bằng conditional GET trước khi mở trang trong browser
+            self.fetcher = HttpFetcher(max_connections=self.concurrency, limiter=self.rate_limiter)
+            await self.fetcher.open()
+        if self.fetch_mode != 'http':
+            await self.init_browser()  # Headless hay không theo self.launch_profile
+        # fetch_mode='http': browser chỉ được mở khi gặp quiz
+        if self.fetcher and self.auth:
+            await self.share_session()
+        
+        # Span trong crawl (kể cả các worker task tạo sau) ghi vào self.metrics
+        self.metrics.activate()
+        
+        if (self.parse_snapshot or self.fetch_mode == 'http') and self.parse_workers > 0:
+            self.parse_executor = ProcessPoolExecutor(max_workers=self.parse_workers)
         
         try:
             # 1. Lấy danh sách modules
@@ -885,42 +1216,232 @@ class MicrosoftLearnCrawler:
                 return
                 
             print(f"\n✅ Tìm thấy {len(modules)} modules")
+            if self.recrawl:
+                self.recrawl.compare_modules(modules, previous_modules)
             
             # Giới hạn số modules nếu cần (để test)
             if max_modules:
                 modules = modules[:max_modules]
                 print(f"⚠️  Chỉ crawl {max_modules} modules đầu tiên")
                 
-            # 2. Crawl từng module
+            # Journal checkpoint (append-only), compact bằng checkpoint_store.py nếu crawl bị dừng giữa chừng
+            # Resume từ chính journal này thì ghi tiếp, resume từ JSON/.db/journal khác thì bắt đầu journal mới
+            self.journal = CheckpointJournal(self.journal_path)
+            self.journal.open({k: v for k, v in self.data.items() if k != 'modules'},
+                              append=same_journal)
+            if self.store:
+                self.store.open({k: v for k, v in self.data.items() if k != 'modules'}, reset=not resume_from)
+            if self.module_cache:
+                self.module_cache.open()
+            if self.video_dir:
+                self.video_downloader = VideoDownloader(self.video_dir, workers=self.video_workers,
+                                                        has_ytdlp=check_dependencies())
+                await self.video_downloader.open()
+            
+            # 2. Crawl modules + units qua pipeline: discover -> fetch -> extract -> write (-> assets)
+            # Job của discover: idx module, các stage sau: (idx, unit_idx, ...)
+            pending_units = {}
+            finished = set()
+            
+            def finish_module(idx: int, journaled: bool = False, restored: bool = False):
+                finished.add(idx)
+                # Giữ đúng thứ tự modules như trên course page
+                self.data['modules'] = [m for i, m in enumerate(modules, 1) if i in finished]
+                
+                # Checkpoint sau mỗi module: units đã được ghi riêng nên chỉ ghi tham chiếu
+                if not journaled:
+                    with span('journal'):
+                        self.journal.append_module(modules[idx - 1], idx, journaled_units=crawl_units)
+                if self.store:
+                    with span('store'):
+                        # Module lấy lại từ lần trước chưa có units nào được ghi riêng
+                        self.store.write_module(modules[idx - 1], idx, with_units=not crawl_units or restored)
+                if self.module_cache and crawl_units and not restored:
+                    self.cache_module(modules[idx - 1])
+            
+            def is_done(module: Dict[str, Any]) -> bool:
+                done = done_modules.get(module['url'])
+                if done is None:
+                    return False
+                return not crawl_units or all(u['url'] in done_units for u in done.get('units', []))
+            
+            jobs = []
             for idx, module in enumerate(modules, 1):
+                if is_done(module):
+                    modules[idx - 1] = done_modules[module['url']]
+                    # Module lấy từ journal khác thì ghi lại để journal này compact được đầy đủ:
+                    # units trước (module chỉ ghi tham chiếu $ref tới units)
+                    if not same_journal and crawl_units:
+                        for unit_idx, unit in enumerate(modules[idx - 1].get('units', []), 1):
+                            self.journal.append_unit(unit, idx, unit_idx)
+                    finish_module(idx, journaled=same_journal, restored=True)
+                else:
+                    jobs.append(idx)
+            if resume_from:
+                print(f"♻️  Bỏ qua {len(modules) - len(jobs)} modules đã xong, còn {len(jobs)} modules")
+            
+            async def discover_module(idx: int, emit):
                 print(f"\n{'=' * 60}")
                 print(f"📚 MODULE {idx}/{len(modules)}")
                 print(f"{'=' * 60}")
                 
-                module = await self.crawl_module_content(module)
+                module = modules[idx - 1]
+                cached = None
+                if self.module_cache and crawl_units:
+                    cached = self.module_cache.get(module['url'])
+                with self.metrics.item(module['url'], 'module', title=module['title']):
+                    if cached is None:
+                        async with self.worker_page() as page:
+                            await self.crawl_module_content(module, page)
+                        if self.module_cache and crawl_units and 'error' not in module:
+                            # Hết TTL nhưng trang module không đổi version/units -> vẫn dùng cache
+                            cached = self.module_cache.revalidate(module['url'], module.get('updated_at'),
+                                                                  [u['url'] for u in module['units']])
+                if cached is not None:
+                    self.reuse_cached_module(module, cached, idx, previous_units)
+                    if self.recrawl:
+                        self.recrawl.compare_units(module, previous_modules.get(module['url']))
+                    finish_module(idx, restored=True)
+                    if self.store:
+                        for unit in module['units']:
+                            unit.pop('content', None)
+                    return
+                if self.recrawl and 'error' not in module:
+                    self.recrawl.compare_units(module, previous_modules.get(module['url']))
                 
-                # 3. Crawl chi tiết units nếu được yêu cầu
-                if crawl_units and module['units']:
-                    print(f"\n  🔍 Crawling {len(module['units'])} units...")
-                    
-                    # Giới hạn units để test, bỏ limit để crawl hết
-                    units_to_crawl = module['units']  # Crawl ALL units
-                    
-                    for unit_idx, unit in enumerate(units_to_crawl, 1):
-                        print(f"    [{unit_idx}/{len(units_to_crawl)}] ", end='')
-                        unit = await self.crawl_unit_detail(unit)
-                        await asyncio.sleep(2)  # Delay để tránh rate limit
-                        
-                self.data['modules'].append(module)
-                
-                # Lưu checkpoint sau mỗi module
-                self.save_data(f"checkpoint_module_{idx}.json")
-                
-                await asyncio.sleep(1)  # Delay giữa các modules
+                # 3. Đưa units cần crawl vào pipeline (đợi nếu stage fetch đang đầy)
+                units = modules[idx - 1].get('units', [])
+                todo = []
+                for unit_idx, unit in enumerate(units, 1):
+                    if unit['url'] in done_units:
+                        units[unit_idx - 1] = done_units[unit['url']]
+                        if not same_journal:
+                            self.journal.append_unit(units[unit_idx - 1], idx, unit_idx)
+                        if self.store:
+                            self.store.write_unit(units[unit_idx - 1], modules[idx - 1]['url'], unit_idx)
+                    else:
+                        todo.append(unit_idx)
+                if crawl_units and todo:
+                    skipped = f" (bỏ qua {len(units) - len(todo)} units đã xong)" if len(todo) < len(units) else ""
+                    print(f"\n  🔍 Crawling {len(todo)} units...{skipped}")
+                    pending_units[idx] = len(todo)
+                    for unit_idx in todo:
+                        await emit((idx, unit_idx))
+                else:
+                    finish_module(idx)
+            
+            async def discover(idx: int, emit):
+                # Lỗi ngoài crawl_module_content (module cache, page pool, journal...) vẫn phải hoàn tất module,
+                # nếu không module biến mất khỏi output và journal
+                try:
+                    await discover_module(idx, emit)
+                except Exception as e:
+                    print(f"      ❌ Lỗi module {idx}: {e}")
+                    modules[idx - 1]['error'] = str(e)  # Đánh dấu để --resume crawl lại module này
+                    if idx not in finished and idx not in pending_units:
+                        finish_module(idx)
+            
+            async def fetch(job, emit):
+                idx, unit_idx = job
+                units = modules[idx - 1]['units']
+                unit = units[unit_idx - 1]
+                html = None
+                with self.metrics.item(unit['url'], 'unit', title=unit['title'], module=idx):
+                    # Unit đã (đang) được crawl ở module khác trong lần chạy này -> dùng lại kết quả
+                    waiting = self.frontier.claim(unit['url'])
+                    if waiting is not None:
+                        first = await waiting
+                        units[unit_idx - 1] = unit = {**first, 'title': unit['title'], 'type': unit['type']}
+                        print(f"    [M{idx} {unit_idx}/{len(units)}] 🔗 Đã crawl ở module khác: {unit['title']}")
+                    else:
+                        try:
+                            reused = None
+                            if self.recrawl:
+                                reused, html = await self.check_unit(modules[idx - 1], unit,
+                                                                     previous_units.get(unit['url']))
+                            if reused is not None:
+                                units[unit_idx - 1] = unit = reused
+                                print(f"    [M{idx} {unit_idx}/{len(units)}] ♻️  Không đổi: {unit['title']}")
+                            else:
+                                async with self.worker_page() as page:
+                                    print(f"    [M{idx} {unit_idx}/{len(units)}] ", end='')
+                                    # Unit được cập nhật tại chỗ nên thứ tự trong module không đổi
+                                    html = await self.fetch_unit(unit, page, html=html)
+                        except Exception as e:
+                            print(f"      ❌ Lỗi: {e}")
+                            unit['error'] = str(e)
+                # Luôn đi tiếp tới write để frontier/module được hoàn tất kể cả khi lỗi
+                await emit((idx, unit_idx, html, waiting is None))
+            
+            async def extract(job, emit):
+                idx, unit_idx, html, claimed = job
+                if html is not None:
+                    unit = modules[idx - 1]['units'][unit_idx - 1]
+                    with self.metrics.item(unit['url'], 'unit'):
+                        await self.extract_unit(unit, html)
+                await emit((idx, unit_idx, claimed))  # Không giữ HTML sau khi parse
+            
+            async def write(job, emit):
+                idx, unit_idx, claimed = job
+                unit = modules[idx - 1]['units'][unit_idx - 1]
+                videos = None
+                try:
+                    with self.metrics.item(unit['url'], 'unit'):
+                        if claimed:
+                            # Bản copy: content có thể bị pop khỏi unit sau khi ghi vào store
+                            self.frontier.complete(unit['url'], dict(unit))
+                        for key in ('videos', 'images', 'code_blocks', 'questions'):
+                            self.metrics.count(key, len(unit['content'].get(key) or []))
+                        videos = [{**v, 'module': modules[idx - 1]['title'], 'unit': unit['title']}
+                                  for v in unit['content'].get('videos') or []]
+                        with span('journal'):
+                            self.journal.append_unit(unit, idx, unit_idx)
+                        if self.store:
+                            with span('store'):
+                                self.store.write_unit(unit, modules[idx - 1]['url'], unit_idx)
+                            unit.pop('content', None)  # Đã nằm trong DB, không giữ trong RAM
+                finally:
+                    pending_units[idx] -= 1
+                    if pending_units[idx] == 0:
+                        finish_module(idx)
+                if videos:
+                    await emit(videos)
+            
+            async def download_assets(videos, emit):
+                await self.video_downloader.download_new(videos)
+            
+            # Mỗi stage có concurrency riêng, queue giữa các stage giới hạn số unit đang chờ
+            parse_stage_workers = self.parse_workers if self.parse_executor else 1
+            stages = [
+                Stage('discover', discover, workers=self.concurrency),
+                Stage('fetch', fetch, workers=self.concurrency),
+                Stage('extract', extract, workers=parse_stage_workers),
+                Stage('write', write, workers=1),  # Journal/store ghi tuần tự
+            ]
+            if self.video_downloader:
+                stages.append(Stage('assets', download_assets, workers=self.video_downloader.workers))
+            
+            await run_pipeline(jobs, stages)
                 
             print("\n" + "=" * 60)
             print("🎉 HOÀN THÀNH CRAWL!")
             print("=" * 60)
+            stats = self.rate_limiter.stats()
+            print(f"🚦 Rate limiter: {stats['rate']} req/s, concurrency {stats['concurrency']}, "
+                  f"{stats['requests']} requests, {stats['throttled']} lần bị throttle")
+            self.metrics.print_breakdown()
+            print_pipeline_stats(stages)
+            if self.video_downloader:
+                print(f"📥 Videos: {self.video_downloader.progress.line()}")
+            if self.frontier.duplicates:
+                print(f"🔗 Frontier: {self.frontier.duplicates} trang trùng URL chỉ fetch 1 lần")
+            if self.module_cache:
+                self.module_cache.print_stats()
+            if self.recrawl:
+                self.recrawl.print_summary()
+                self.data['recrawl_report'] = self.recrawl.to_dict()
+                if self.store:
+                    self.store.write_meta(recrawl_report=self.data['recrawl_report'])
             
         except Exception as e:
             print(f"\n❌ Lỗi nghiêm trọng: {e}")
@@ -928,51 +1449,110 @@ class MicrosoftLearnCrawler:
             traceback.print_exc()
             
         finally:
+            if self.journal:
+                self.journal.close()
+            if self.store:
+                self.store.close()
+            if self.module_cache:
+                self.module_cache.close()
+            if self.video_downloader:
+                await self.video_downloader.close()
+                self.video_downloader = None
             await self.close_browser()
+            if self.fetcher:
+                await self.fetcher.close()
+                self.fetcher = None
+            if self.parse_executor:
+                self.parse_executor.shutdown()
+                self.parse_executor = None
             
     def save_data(self, filename: str = "course_data.json"):
-        """Lưu data ra file JSON"""
-        output_dir = "output"
+        """Lưu data ra file JSON, trả về summary"""
+        output_dir = self.output_dir
         os.makedirs(output_dir, exist_ok=True)
         
         filepath = os.path.join(output_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        with span('save'):
+            if self.store:
+                # Content nằm trong SQLite -> export JSON bằng query, từng module một
+                with self.store:
+                    export_json(self.store, filepath)
+                    summary = self.store.summary()
+            else:
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, ensure_ascii=False, indent=2)
             
         print(f"\n💾 Đã lưu data vào: {filepath}")
         
         # Tạo summary
-        summary = {
-            'total_modules': len(self.data['modules']),
-            'total_units': sum(len(m.get('units', [])) for m in self.data['modules']),
-            'total_videos': sum(
-                sum(len(u.get('content', {}).get('videos', [])) for u in m.get('units', []))
-                for m in self.data['modules']
-            ),
-            'crawled_at': self.data['crawled_at']
-        }
+        if self.store:
+            summary['crawled_at'] = self.data['crawled_at']
+        else:
+            summary = {
+                'total_modules': len(self.data['modules']),
+                'total_units': sum(len(m.get('units', [])) for m in self.data['modules']),
+                'total_videos': sum(
+                    sum(len(u.get('content', {}).get('videos', [])) for u in m.get('units', []))
+                    for m in self.data['modules']
+                ),
+                'crawled_at': self.data['crawled_at']
+            }
         
         summary_path = os.path.join(output_dir, 'summary.json')
         with open(summary_path, 'w', encoding='utf-8') as f:
             json.dump(summary, f, ensure_ascii=False, indent=2)
+        
+        # Metrics theo giai đoạn / từng unit, cạnh summary.json
+        metrics_path = os.path.join(output_dir, 'metrics.json')
+        self.metrics.save(metrics_path)
+        print(f"⏱️  Metrics: {metrics_path}")
 
         print(f"📊 Summary:")
         print(f"  - Modules: {summary['total_modules']}")
         print(f"  - Units: {summary['total_units']}")
         print(f"  - Videos: {summary['total_videos']}")
+        return summary
 
 
 async def main():
+    parser = argparse.ArgumentParser(description="Crawl Microsoft Learn course")
+    parser.add_argument('--resume', nargs='?', const=os.path.join("output", "crawl_journal.jsonl"),
+                        metavar='PATH', help="Tiếp tục từ journal/JSON của lần crawl trước")
+    parser.add_argument('--incremental', nargs='?', const=os.path.join("output", "sc200_course_full.json"),
+                        metavar='PATH', help="Chỉ extract lại units đã thay đổi so với output của lần crawl trước")
+    parser.add_argument('--max-modules', type=int, default=1, help="0 = crawl tất cả modules")
+    parser.add_argument('--store', nargs='?', const=os.path.join("output", "crawl.db"), metavar='PATH',
+                        help="Ghi từng unit vào SQLite thay vì giữ cả course trong RAM")
+    parser.add_argument('--profile', choices=list(LAUNCH_PROFILES), default=DEFAULT_LAUNCH_PROFILE,
+                        help="Launch profile của Chromium (headed = mở cửa sổ để debug)")
+    parser.add_argument('--module-cache', nargs='?', const=DEFAULT_CACHE_PATH, metavar='PATH',
+                        help="Dùng lại modules đã crawl ở course/path khác (SQLite cache)")
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL_HOURS, metavar='HOURS',
+                        help="Thời gian module trong cache được dùng lại không cần kiểm tra")
+    parser.add_argument('--download-videos', nargs='?', const="videos", metavar='DIR',
+                        help="Tải videos (YouTube/direct) ngay trong lúc crawl")
+    parser.add_argument('--auth', nargs='?', const=SESSION_FILE, metavar='PATH',
+                        help="Dùng lại session đã lưu (auth_helper.py), hết hạn thì đăng nhập lại bằng MS_EMAIL/MS_PASSWORD")
+    parser.add_argument('--user-data-dir', metavar='DIR',
+                        help="Chromium profile cố định: giữ session đăng nhập giữa các lần chạy")
+    args = parser.parse_args()
+    auth = AuthSession(args.auth, args.user_data_dir) if args.auth or args.user_data_dir else None
+    
     # URL course cần crawl
     course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
     
-    crawler = MicrosoftLearnCrawler(course_url)
+    crawler = MicrosoftLearnCrawler(course_url, concurrency=4,  # 4 pages song song
+                                    launch_profile=args.profile, store_path=args.store,
+                                    module_cache=args.module_cache, cache_ttl_hours=args.cache_ttl,
+                                    video_dir=args.download_videos, auth=auth)
     
-    # Crawl course (giới hạn 3 modules để test, bỏ tham số để crawl hết)
+    # Crawl course (mặc định giới hạn 1 module để test, --max-modules 0 để crawl hết)
     await crawler.crawl(
-        max_modules=1,  # Bỏ dòng này để crawl tất cả modules
-        crawl_units=True  # True = crawl chi tiết units
+        max_modules=args.max_modules or None,
+        crawl_units=True,  # True = crawl chi tiết units
+        resume_from=args.resume,
+        incremental_from=args.incremental
     )
     
     # Lưu kết quả cuối cùng
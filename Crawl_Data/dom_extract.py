@@ -0,0 +1,139 @@
+"""
+DOM Extract
+Script page.evaluate lấy toàn bộ dữ liệu trong 1 round-trip, thay cho
+query_selector_all + text_content() từng element.
+Text trả về nguyên bản (textContent), việc strip/lọc làm ở Python để output giữ nguyên như cũ.
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+# Headings, paragraphs, lists, tables của main content -> 1 JSON payload
+FULL_CONTENT_JS = """
+(selector) => {
+    const main = document.querySelector(selector);
+    if (!main) return null;
+    const text = (el) => el.textContent;
+    return {
+        headings: Array.from(main.querySelectorAll('h1, h2, h3, h4, h5, h6')).map(h => ({
+            tag: h.tagName.toLowerCase(),
+            text: text(h)
+        })),
+        paragraphs: Array.from(main.querySelectorAll('p')).map(text),
+        lists: Array.from(main.querySelectorAll('ul, ol')).map(lst =>
+            Array.from(lst.querySelectorAll('li')).map(text)
+        ),
+        tables: Array.from(main.querySelectorAll('table')).map(table =>
+            Array.from(table.querySelectorAll('tr')).map(row =>
+                Array.from(row.querySelectorAll('td, th')).map(text)
+            )
+        )
+    };
+}
+"""
+
+CODE_BLOCKS_JS = """
+() => Array.from(document.querySelectorAll('pre code, .code-block, pre')).map(el => ({
+    cls: el.getAttribute('class'),
+    text: el.textContent
+}))
+"""
+
+IMAGES_JS = """
+() => Array.from(document.querySelectorAll('img')).map(img => ({
+    src: img.getAttribute('src'),
+    alt: img.getAttribute('alt'),
+    title: img.getAttribute('title')
+}))
+"""
+
+
+def empty_full_content() -> Dict[str, Any]:
+    """Cấu trúc content rỗng"""
+    return {
+        'sections': [],
+        'headings': [],
+        'paragraphs': [],
+        'lists': [],
+        'tables': []
+    }
+
+
+def build_full_content(payload: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chuyển payload của FULL_CONTENT_JS thành content dict"""
+    content = empty_full_content()
+    if not payload:
+        return content
+
+    for h in payload.get('headings', []):
+        text = h.get('text')
+        if text and text.strip():
+            content['headings'].append({
+                'level': h['tag'],
+                'text': text.strip()
+            })
+
+    for text in payload.get('paragraphs', []):
+        if text and len(text.strip()) > 20:  # Bỏ qua đoạn quá ngắn
+            content['paragraphs'].append(text.strip())
+
+    for items in payload.get('lists', []):
+        list_items = [text.strip() for text in items if text]
+        if list_items:
+            content['lists'].append(list_items)
+
+    for rows in payload.get('tables', []):
+        table_data = []
+        for cells in rows:
+            row_data = [text.strip() if text else '' for text in cells]
+            if row_data:
+                table_data.append(row_data)
+        if table_data:
+            content['tables'].append(table_data)
+
+    # Tạo full text từ tất cả nội dung
+    full_text = []
+    for section in content['headings']:
+        full_text.append(f"\n## {section['text']}\n")
+    for para in content['paragraphs']:
+        full_text.append(para)
+
+    content['full_text'] = '\n\n'.join(full_text)
+    return content
+
+
+def build_code_blocks(payload: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Chuyển payload của CODE_BLOCKS_JS thành danh sách code blocks"""
+    code_blocks = []
+    for item in payload or []:
+        # Extract language from class like "language-python"
+        lang = ''
+        class_attr = item.get('cls')
+        if class_attr:
+            for cls in class_attr.split():
+                if 'language-' in cls:
+                    lang = cls.replace('language-', '')
+                    break
+
+        code_text = item.get('text')
+        if code_text and len(code_text.strip()) > 10:
+            code_blocks.append({
+                'language': lang or 'unknown',
+                'code': code_text.strip()
+            })
+    return code_blocks
+
+
+def build_images(payload: List[Dict[str, Any]], base_url: str) -> List[Dict[str, str]]:
+    """Chuyển payload của IMAGES_JS thành danh sách images"""
+    images = []
+    for item in payload or []:
+        src = item.get('src')
+        if src and not src.startswith('data:'):  # Bỏ qua base64 images
+            full_src = src if src.startswith('http') else f"{base_url}{src}"
+            images.append({
+                'url': full_src.replace('../../', '/en-us/training/'),
+                'alt': item.get('alt') or '',
+                'title': item.get('title') or ''
+            })
+    return images
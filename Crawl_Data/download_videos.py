@@ -2,13 +2,33 @@
 """
 Script download videos từ JSON data
 Hỗ trợ YouTube và direct video links
+
+Download chạy async với N workers:
+- Dedup theo video_id/URL (cùng 1 video xuất hiện ở nhiều module chỉ tải 1 lần)
+- videos/manifest.json ghi các file đã tải xong, chạy lại sẽ bỏ qua
+- Direct video tải tiếp file .part bằng HTTP Range
+- Giới hạn băng thông chung (--max-rate, MB/s) và in tiến độ/throughput định kỳ
 """
 
+import argparse
+import asyncio
+import hashlib
 import json
 import os
 import subprocess
+import time
+from collections import deque
+from datetime import datetime
 from pathlib import Path
-from typing import List, Dict
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from page_pool import run_work_queue
+
+
+MANIFEST_NAME = "manifest.json"
 
 
 def check_dependencies():
@@ -17,74 +37,305 @@ def check_dependencies():
     
     # Check yt-dlp
     try:
-        result = subprocess.run(['yt-dlp', '--version'], 
+        result = subprocess.run(['yt-dlp', '--version'],
                               capture_output=True, text=True)
         print(f"  ✅ yt-dlp version: {result.stdout.strip()}")
         return True
     except FileNotFoundError:
-        print("  ❌ yt-dlp not found")
+        print("  ❌ yt-dlp not found (YouTube videos sẽ bị bỏ qua)")
         print("\n📥 Cài đặt yt-dlp:")
         print("  macOS: brew install yt-dlp")
         print("  hoặc: pip install yt-dlp")
         return False
 
 
-def download_youtube_video(video_url: str, output_dir: str, video_id: str):
-    """Download YouTube video using yt-dlp"""
-    try:
-        output_path = os.path.join(output_dir, f"{video_id}.%(ext)s")
+def video_key(video: Dict) -> Optional[str]:
+    """Khoá dedup: video_id cho YouTube, URL cho các loại khác"""
+    if video.get('type') == 'youtube' and video.get('video_id'):
+        return f"youtube:{video['video_id']}"
+    url = video.get('url') or video.get('watch_url') or video.get('embed_url')
+    return f"{video.get('type', 'unknown')}:{url}" if url else None
+
+
+def direct_filename(url: str) -> str:
+    """Tên file cố định theo URL (tên gốc + hash ngắn) để lần chạy sau nhận ra file cũ"""
+    name = os.path.basename(urlparse(url).path) or "video.mp4"
+    stem, ext = os.path.splitext(name)
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]
+    return f"{stem[:60]}_{digest}{ext or '.mp4'}"
+
+
+def dedup_videos(videos: List[Dict]) -> List[Dict]:
+    """Gộp các video trùng, giữ lại danh sách module/unit có chứa video"""
+    unique: Dict[str, Dict] = {}
+    for video in videos:
+        key = video_key(video)
+        if key is None:
+            continue
+        if key not in unique:
+            unique[key] = {**video, 'key': key, 'sources': []}
+        unique[key]['sources'].append(f"{video.get('module')} - {video.get('unit')}")
+    return list(unique.values())
+
+
+class DownloadManifest:
+    """videos/manifest.json: key -> {status, file, bytes, url, sources, finished_at}"""
+    
+    def __init__(self, videos_dir: Path):
+        self.videos_dir = videos_dir
+        self.path = videos_dir / MANIFEST_NAME
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+    
+    def is_done(self, key: str) -> bool:
+        entry = self.entries.get(key)
+        return bool(entry and entry.get('status') == 'done' and (self.videos_dir / entry['file']).exists())
+    
+    def mark(self, key: str, **entry):
+        self.entries[key] = {**self.entries.get(key, {}), **entry}
+        self.save()
+    
+    def save(self):
+        # Ghi file tạm rồi rename để manifest không bị hỏng khi dừng giữa chừng
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class BandwidthLimiter:
+    """Token bucket theo bytes/giây, dùng chung cho mọi worker (0 = không giới hạn)"""
+    
+    def __init__(self, bytes_per_second: float = 0):
+        self.rate = bytes_per_second
+        self.burst = bytes_per_second / 4  # Tối đa ~0.25s dồn lại khi rảnh
+        self._allowance = 0.0
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def consume(self, n: int):
+        if not self.rate:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            self._allowance = min(self.burst, self._allowance + (now - self._last) * self.rate)
+            self._last = now
+            self._allowance -= n
+            if self._allowance < 0:
+                await asyncio.sleep(-self._allowance / self.rate)
+
+
+class DownloadProgress:
+    """Đếm số video/bytes, in tiến độ + throughput định kỳ"""
+    
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes = 0
+        self.active: Dict[str, str] = {}
+        self.start = time.monotonic()
+    
+    def add_bytes(self, n: int):
+        self.bytes += n
+    
+    def line(self) -> str:
+        elapsed = max(time.monotonic() - self.start, 1e-6)
+        finished = self.done + self.skipped + self.failed
+        return (f"📊 {finished}/{self.total} (✅ {self.done} ⏭️  {self.skipped} ❌ {self.failed}), "
+                f"{len(self.active)} đang tải, {self.bytes / 2 ** 20:.1f} MB, "
+                f"{self.bytes / 2 ** 20 / elapsed:.2f} MB/s")
+    
+    async def report_every(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            print(f"  {self.line()}  {', '.join(list(self.active.values())[:3])}")
+
+
+class VideoDownloader:
+    """Tải danh sách video (đã dedup) với worker pool, manifest và giới hạn băng thông"""
+    
+    def __init__(self, videos_dir: str = "videos", workers: int = 4, max_rate: float = 0,
+                 chunk_size: int = 256 * 1024, has_ytdlp: bool = True):
+        self.videos_dir = Path(videos_dir)
+        self.videos_dir.mkdir(exist_ok=True)
+        self.workers = max(1, workers)
+        self.max_rate = max_rate  # bytes/giây cho toàn bộ downloads
+        self.chunk_size = chunk_size
+        self.has_ytdlp = has_ytdlp
+        self.manifest = DownloadManifest(self.videos_dir)
+        self.bandwidth = BandwidthLimiter(max_rate)
+        self.session = None
+        self.progress = None
+        self.seen = set()  # Keys đã nhận trong lần chạy này (download_new)
+    
+    async def open(self, total: int = 0):
+        self.progress = DownloadProgress(total)
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, sock_read=60))
+    
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+    
+    async def download_all(self, videos: List[Dict]) -> DownloadProgress:
+        videos = dedup_videos(videos)
+        print(f"\n📥 {len(videos)} videos (sau dedup), {self.workers} workers"
+              + (f", tối đa {self.max_rate / 2 ** 20:.1f} MB/s" if self.max_rate else ""))
         
+        async def handle(video: Dict, queue: asyncio.Queue):
+            await self.download(video)
+        
+        await self.open(len(videos))
+        reporter = asyncio.create_task(self.progress.report_every(2.0))
+        try:
+            await run_work_queue(videos, handle, workers=self.workers)
+        finally:
+            reporter.cancel()
+            await self.close()
+        print(f"\n{self.progress.line()}")
+        return self.progress
+    
+    async def download_new(self, videos: List[Dict]):
+        """Tải các video chưa gặp trong lần chạy này (video đến dần từ crawler, cần open() trước)"""
+        for video in dedup_videos(videos):
+            if video['key'] in self.seen:
+                continue
+            self.seen.add(video['key'])
+            self.progress.total += 1
+            await self.download(video)
+    
+    async def download(self, video: Dict):
+        key = video.get('key') or video_key(video)
+        if key is None:
+            # Không có video_id lẫn URL: không có gì để tải
+            self.progress.skipped += 1
+            return
+        if self.manifest.is_done(key):
+            self.progress.skipped += 1
+            return
+        if video.get('type') == 'youtube' and not self.has_ytdlp:
+            self.progress.skipped += 1
+            return
+        if video.get('type') not in ('youtube', 'direct'):
+            # Microsoft Stream cần đăng nhập + extension, không tải tự động
+            self.progress.skipped += 1
+            return
+        
+        label = key
+        self.progress.active[key] = label
+        try:
+            label = video.get('video_id') or direct_filename(video.get('url') or key)
+            self.progress.active[key] = label
+            if video['type'] == 'youtube':
+                filename, size = await self.download_youtube(video)
+            else:
+                if not video.get('url'):
+                    raise ValueError("Video không có URL")
+                filename, size = await self.download_direct(video['url'], direct_filename(video['url']))
+            self.manifest.mark(key, status='done', file=filename, bytes=size,
+                               url=video.get('watch_url') or video.get('url'), sources=video.get('sources', []),
+                               finished_at=datetime.now().isoformat())
+            self.progress.done += 1
+            print(f"    ✅ {filename} ({size / 2 ** 20:.1f} MB)")
+        except Exception as e:
+            self.manifest.mark(key, status='failed', error=str(e), sources=video.get('sources', []))
+            self.progress.failed += 1
+            print(f"    ❌ {label}: {e}")
+        finally:
+            self.progress.active.pop(key, None)
+    
+    async def download_direct(self, url: str, filename: str):
+        """GET theo chunk, tải tiếp từ <file>.part bằng header Range nếu đã có"""
+        final_path = self.videos_dir / filename
+        part_path = self.videos_dir / (filename + '.part')
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        
+        async with self.session.get(url, headers=headers) as response:
+            if response.status == 416 and offset:
+                # .part đã đủ dung lượng (lần trước dừng ngay trước khi rename)
+                os.replace(part_path, final_path)
+                return filename, offset
+            response.raise_for_status()
+            if response.status != 206:
+                offset = 0  # Server không hỗ trợ Range -> tải lại từ đầu
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    await self.bandwidth.consume(len(chunk))
+                    f.write(chunk)
+                    self.progress.add_bytes(len(chunk))
+        
+        os.replace(part_path, final_path)
+        return filename, final_path.stat().st_size
+    
+    async def download_youtube(self, video: Dict):
+        """yt-dlp async (tự tải tiếp file .part), progress đọc từ --progress-template"""
+        video_id = video.get('video_id')
+        if not video_id:
+            raise ValueError("YouTube video không có video_id")
         cmd = [
             'yt-dlp',
             '-f', 'best',  # Best quality
-            '-o', output_path,
+            '-o', str(self.videos_dir / f"{video_id}.%(ext)s"),
             '--write-description',  # Save description
             '--write-info-json',    # Save metadata
-            video_url
+            '--newline',
+            '--progress-template', 'download:%(progress.downloaded_bytes)s',
         ]
+        if self.max_rate:
+            # yt-dlp không dùng chung bucket được -> chia đều băng thông cho các workers
+            cmd += ['--limit-rate', str(int(self.max_rate / self.workers))]
+        cmd.append(video.get('watch_url', video.get('embed_url')))
         
-        print(f"    Downloading: {video_id}")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        # stderr gộp vào stdout: đọc 1 pipe duy nhất nên stderr nhiều cũng không làm yt-dlp bị treo
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+        last = 0
+        messages = deque(maxlen=5)  # Vài dòng cuối không phải progress, để báo lỗi
+        async for raw in process.stdout:
+            line = raw.decode('utf-8', 'replace').strip()
+            if line.isdigit():
+                downloaded = int(line)
+                self.progress.add_bytes(max(0, downloaded - last))
+                last = downloaded
+            elif line:
+                messages.append(line)
+        if await process.wait() != 0:
+            errors = [m for m in messages if m.startswith('ERROR')]
+            raise RuntimeError((errors or list(messages) or [f"yt-dlp exit {process.returncode}"])[-1])
         
-        if result.returncode == 0:
-            print(f"    ✅ Downloaded successfully")
-            return True
-        else:
-            print(f"    ❌ Error: {result.stderr}")
-            return False
-            
-    except Exception as e:
-        print(f"    ❌ Exception: {e}")
-        return False
+        outputs = [p for p in self.videos_dir.glob(f"{video_id}.*")
+                   if p.suffix not in ('.json', '.description', '.part')]
+        if not outputs:
+            raise RuntimeError("yt-dlp không tạo file video")
+        return outputs[0].name, outputs[0].stat().st_size
 
 
-def download_direct_video(video_url: str, output_dir: str, filename: str):
-    """Download direct video URL"""
-    try:
-        output_path = os.path.join(output_dir, filename)
-        
-        # Use curl or wget
-        cmd = ['curl', '-L', '-o', output_path, video_url]
-        
-        print(f"    Downloading: {filename}")
-        result = subprocess.run(cmd, capture_output=True)
-        
-        if result.returncode == 0:
-            print(f"    ✅ Downloaded successfully")
-            return True
-        else:
-            print(f"    ❌ Download failed")
-            return False
-            
-    except Exception as e:
-        print(f"    ❌ Exception: {e}")
-        return False
+def extract_videos_from_db(db_file: str) -> List[Dict]:
+    """Extract all videos from SQLite store (chỉ query bảng videos)"""
+    from sqlite_store import CrawlStore
+    
+    with CrawlStore(db_file) as store:
+        rows = store.conn.execute(
+            'SELECT m.title AS module, u.title AS unit, v.data FROM videos v '
+            'JOIN units u ON u.url = v.unit_url LEFT JOIN modules m ON m.url = u.module_url '
+            'ORDER BY m.path_idx, m.module_idx, u.unit_idx, v.seq'
+        )
+        return [{**json.loads(row['data']), 'module': row['module'] or 'Unknown', 'unit': row['unit'] or 'Unknown'}
+                for row in rows]
 
 
 def extract_videos_from_json(json_file: str) -> List[Dict]:
     """Extract all videos from JSON data"""
     print(f"📖 Reading: {json_file}")
     
+    if str(json_file).endswith('.db'):
+        return extract_videos_from_db(str(json_file))
+    
     with open(json_file, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
@@ -105,19 +356,41 @@ def extract_videos_from_json(json_file: str) -> List[Dict]:
     return all_videos
 
 
+def write_download_script(videos: List[Dict], script_file: Path):
+    """Script shell để tải thủ công, dùng cùng tên file với downloader"""
+    with open(script_file, 'w') as f:
+        f.write("#!/bin/bash\n")
+        f.write("# Auto-generated download script\n\n")
+        
+        for video in dedup_videos(videos):
+            f.write(f"# {'; '.join(video['sources'])}\n")
+            if video.get('type') == 'youtube':
+                url = video.get('watch_url', video.get('embed_url'))
+                f.write(f"yt-dlp -f best -o '{video['video_id']}.%(ext)s' '{url}'\n\n")
+            elif video.get('type') == 'direct':
+                # -C - tải tiếp file dở
+                f.write(f"curl -L -C - -o '{direct_filename(video['url'])}' '{video['url']}'\n\n")
+    
+    os.chmod(script_file, 0o755)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Download videos từ output của crawler")
+    parser.add_argument('--workers', type=int, default=4, help="Số video tải song song")
+    parser.add_argument('--max-rate', type=float, default=0, help="Giới hạn băng thông chung (MB/s), 0 = không giới hạn")
+    args = parser.parse_args()
+    
     print("""
 ╔════════════════════════════════════════════════╗
 ║         Video Downloader for Course            ║
 ╚════════════════════════════════════════════════╝
 """)
-    
-    if not check_dependencies():
-        return
+
+    has_ytdlp = check_dependencies()
     
     # Find JSON files
     output_dir = Path("output")
-    json_files = list(output_dir.glob("sc200*.json"))
+    json_files = list(output_dir.glob("sc200*.json")) + list(output_dir.glob("*.db"))
     
     if not json_files:
         print("❌ No JSON files found")
@@ -139,7 +412,7 @@ def main():
     # Extract videos
     videos = extract_videos_from_json(json_file)
     
-    print(f"\n📊 Found {len(videos)} videos")
+    print(f"\n📊 Found {len(videos)} videos ({len(dedup_videos(videos))} sau khi bỏ trùng)")
     
     if not videos:
         print("❌ No videos to download")
@@ -172,71 +445,20 @@ def main():
     videos_dir = Path("videos")
     videos_dir.mkdir(exist_ok=True)
     
-    if download_choice == "1":
-        print(f"\n🎬 Downloading {len(youtube_videos)} YouTube videos...")
-        for idx, video in enumerate(youtube_videos, 1):
-            print(f"\n[{idx}/{len(youtube_videos)}]")
-            download_youtube_video(
-                video.get('watch_url', video.get('embed_url')),
-                str(videos_dir),
-                video.get('video_id', f'video_{idx}')
-            )
-    
-    elif download_choice == "2":
-        print(f"\n📹 Downloading {len(direct_videos)} Direct videos...")
-        for idx, video in enumerate(direct_videos, 1):
-            print(f"\n[{idx}/{len(direct_videos)}]")
-            filename = f"direct_video_{idx}.mp4"
-            download_direct_video(
-                video.get('url'),
-                str(videos_dir),
-                filename
-            )
-    
-    elif download_choice == "3":
-        print(f"\n🎥 Downloading ALL videos...")
-        
-        # YouTube
-        for idx, video in enumerate(youtube_videos, 1):
-            print(f"\n[YouTube {idx}/{len(youtube_videos)}]")
-            download_youtube_video(
-                video.get('watch_url', video.get('embed_url')),
-                str(videos_dir),
-                video.get('video_id', f'video_{idx}')
-            )
-        
-        # Direct
-        for idx, video in enumerate(direct_videos, 1):
-            print(f"\n[Direct {idx}/{len(direct_videos)}]")
-            filename = f"direct_video_{idx}.mp4"
-            download_direct_video(
-                video.get('url'),
-                str(videos_dir),
-                filename
-            )
+    selected = {"1": youtube_videos, "2": direct_videos, "3": youtube_videos + direct_videos}.get(download_choice)
+    
+    if selected is not None:
+        if download_choice in ("1", "3") and not has_ytdlp:
+            print("⚠️  Không có yt-dlp, bỏ qua YouTube videos")
+        downloader = VideoDownloader(str(videos_dir), workers=args.workers,
+                                     max_rate=args.max_rate * 2 ** 20, has_ytdlp=has_ytdlp)
+        asyncio.run(downloader.download_all(selected))
+        print(f"📒 Manifest: {downloader.manifest.path}")
     
     elif download_choice == "4":
         # Generate shell script
         script_file = videos_dir / "download_all.sh"
-        
-        with open(script_file, 'w') as f:
-            f.write("#!/bin/bash\n")
-            f.write("# Auto-generated download script\n\n")
-            
-            # YouTube videos
-            for idx, video in enumerate(youtube_videos, 1):
-                url = video.get('watch_url', video.get('embed_url'))
-                video_id = video.get('video_id', f'video_{idx}')
-                f.write(f"# {video.get('module')} - {video.get('unit')}\n")
-                f.write(f"yt-dlp -f best -o '{video_id}.%(ext)s' '{url}'\n\n")
-            
-            # Direct videos
-            for idx, video in enumerate(direct_videos, 1):
-                url = video.get('url')
-                f.write(f"# {video.get('module')} - {video.get('unit')}\n")
-                f.write(f"curl -L -o 'direct_video_{idx}.mp4' '{url}'\n\n")
-        
-        os.chmod(script_file, 0o755)
+        write_download_script(youtube_videos + direct_videos, script_file)
         print(f"\n✅ Download script created: {script_file}")
         print("Run with: ./videos/download_all.sh")
     
@@ -250,4 +472,4 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        print("\n\n⚠️  Cancelled by user")
+        print("\n\n⚠️  Cancelled by user (chạy lại để tải tiếp, file đã xong được bỏ qua)")
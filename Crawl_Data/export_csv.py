@@ -1,139 +1,339 @@
 #!/usr/bin/env python3
 """
 Export JSON data sang CSV format để dễ đọc hơn
+
+Đọc input theo kiểu streaming (từng module một) và ghi cả 5 file CSV
+(modules, units, videos, questions, exercises) trong 1 lượt:
+- File JSON output (sc200_course_full.json, có "modules" hoặc "learning_paths")
+- Journal JSONL (crawl_journal.jsonl) của crawler.py
+- SQLite store (.db)
+Chế độ 'all' export nhiều file song song bằng process pool.
 """
 
-import json
 import csv
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from checkpoint_store import iter_journal
+
+
+CSV_HEADERS = {
+    'modules': ['Module #', 'Title', 'URL', 'Description', 'Duration', 'Units Count'],
+    'units': ['Module', 'Unit #', 'Unit Title', 'Type', 'URL', 'Has Videos', 'Video Count', 'Has Questions'],
+    'videos': ['Module', 'Unit', 'Video #', 'Type', 'URL'],
+    'questions': ['Module', 'Unit', 'Question #', 'Type', 'Question', 'Options', 'Correct Answers'],
+    'exercises': ['Module', 'Unit', 'Exercise Steps'],
+}
+
+# File trong output/ không phải dữ liệu course
+NON_COURSE_FILES = {'summary.json', 'metrics.json'}
 
+_decoder = json.JSONDecoder()
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
 
-def export_to_csv(json_file: str):
-    """Export JSON data sang CSV files"""
+
+class _JsonStream:
+    """
+    Đọc 1 file JSON lớn theo chunk. Duyệt object/array bằng members()/items(),
+    chỉ decode (raw_decode) giá trị đang cần nên không giữ cả file trong RAM.
+    """
     
-    print(f"📖 Đang đọc file: {json_file}")
+    def __init__(self, f, chunk_size: int = 1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+    
+    def _fill(self) -> bool:
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def peek(self) -> str:
+        """Ký tự tiếp theo (bỏ qua whitespace), '' khi hết file"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+    
+    def _take(self, expected: str):
+        char = self.peek()
+        if char not in expected:
+            raise ValueError(f"JSON không hợp lệ: cần {expected!r}, gặp {char!r}")
+        self.pos += 1
+        return char
+    
+    def value(self) -> Any:
+        """Decode trọn 1 giá trị tại vị trí hiện tại"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                if self.eof or not self._number_at_end(value, end):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+    
+    def _number_at_end(self, value: Any, end: int) -> bool:
+        """Số cắt ngang ở cuối buffer (vd. '3' của '3.25'): còn ký tự của số ở chunk sau"""
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return False
+        while end < len(self.buf) and self.buf[end] in _NUMBER_CHARS:
+            end += 1
+        return end == len(self.buf)
     
+    def items(self) -> Iterator[None]:
+        """Duyệt array: mỗi lần yield, caller phải đọc đúng 1 phần tử"""
+        self._take('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self._take(',]') == ']':
+                return
+    
+    def members(self) -> Iterator[str]:
+        """Duyệt object: yield key, caller phải đọc value của key đó"""
+        self._take('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self._take(':')
+            yield key
+            if self._take(',}') == '}':
+                return
+
+
+def iter_json_modules(json_file: str, chunk_size: int = 1 << 16) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    """
+    Từng (learning path title, module) trong file output
+    ("modules" hoặc "learning_paths" -> "modules", path title = None với "modules")
+    """
     with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+        stream = _JsonStream(f, chunk_size)
+        for key in stream.members():
+            if key == 'modules':
+                for _ in stream.items():
+                    yield None, stream.value()
+            elif key == 'learning_paths':
+                for _ in stream.items():
+                    path_title = None  # "title" đứng trước "modules" trong output của crawler
+                    for path_key in stream.members():
+                        if path_key == 'modules':
+                            for _ in stream.items():
+                                yield path_title, stream.value()
+                        elif path_key == 'title':
+                            path_title = stream.value()
+                        else:
+                            stream.value()
+            else:
+                stream.value()
+
+
+def iter_journal_modules(journal_file: str) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    """
+    Từng (learning path title, module) trong journal JSONL theo thứ tự trên course page
+    (path_idx, module_idx), không phải thứ tự hoàn thành. Record module chỉ chứa $ref tới units
+    nên chỉ units được giữ theo URL; unit dùng chung bởi nhiều module (frontier) chỉ có 1 record.
+    """
+    units: Dict[str, Dict[str, Any]] = {}
+    paths: Dict[int, str] = {}
+    modules: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for record in iter_journal(journal_file):
+        kind = record.get('kind')
+        if kind == 'unit':
+            units[record['data']['url']] = record['data']
+        elif kind == 'path':
+            paths[record['path_idx']] = record['data'].get('title')
+        elif kind == 'module':
+            if 'error' in record['data']:
+                continue  # Module lỗi sẽ có record mới khi resume
+            # Record sau (resume) ghi đè record trước của cùng module
+            modules[(record.get('path_idx') or 0, record['module_idx'])] = record
     
-    base_name = Path(json_file).stem
-    output_dir = Path("output")
+    for key in sorted(modules):
+        record = modules[key]
+        module = dict(record['data'])
+        if 'units' in module:
+            module['units'] = [units.get(u['$ref'], {'url': u['$ref']}) if '$ref' in u else u
+                               for u in module['units']]
+        yield paths.get(record.get('path_idx')), module
+
+
+def iter_store_modules(db_file: str) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    """Từng (learning path title, module) trong SQLite store"""
+    from sqlite_store import CrawlStore
     
-    # 1. Export modules summary
-    modules_csv = output_dir / f"{base_name}_modules.csv"
-    print(f"📝 Export modules -> {modules_csv}")
+    with CrawlStore(db_file) as store:
+        paths = list(store.iter_paths())
+        if not paths:
+            for module in store.iter_modules():
+                yield None, module
+        for path in paths:
+            for module in store.iter_modules(path['_idx']):
+                yield path.get('title'), module
+
+
+def iter_modules_with_path(input_file: str) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    """Chọn cách đọc theo loại file, yield (learning path title, module)"""
+    if input_file.endswith('.jsonl'):
+        return iter_journal_modules(input_file)
+    if input_file.endswith('.db'):
+        return iter_store_modules(input_file)
+    return iter_json_modules(input_file)
+
+
+def iter_modules(input_file: str) -> Iterator[Dict[str, Any]]:
+    """Từng module của file JSON/JSONL/SQLite"""
+    return (module for _, module in iter_modules_with_path(input_file))
+
+
+class CourseCsvWriter:
+    """Mở cả 5 file CSV, mỗi module đọc được ghi ngay vào tất cả các file"""
     
-    with open(modules_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Module #', 'Title', 'URL', 'Description', 'Duration', 'Units Count'])
-        
-        for idx, module in enumerate(data.get('modules', []), 1):
-            writer.writerow([
-                idx,
-                module.get('title', ''),
-                module.get('url', ''),
-                module.get('description', '')[:100] + '...' if len(module.get('description', '')) > 100 else module.get('description', ''),
-                module.get('duration', ''),
-                len(module.get('units', []))
-            ])
+    def __init__(self, output_dir: str, base_name: str):
+        self.paths = {name: Path(output_dir) / f"{base_name}_{name}.csv" for name in CSV_HEADERS}
+        self.counts = {name: 0 for name in CSV_HEADERS}
+        self._files = []
+        self.writers = {}
+        self.module_count = 0
     
-    # 2. Export units detail
-    units_csv = output_dir / f"{base_name}_units.csv"
-    print(f"📝 Export units -> {units_csv}")
+    def __enter__(self):
+        for name, path in self.paths.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            f = open(path, 'w', newline='', encoding='utf-8')
+            self._files.append(f)
+            self.writers[name] = csv.writer(f)
+            self.writers[name].writerow(CSV_HEADERS[name])
+        return self
     
-    with open(units_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Module', 'Unit #', 'Unit Title', 'Type', 'URL', 'Has Videos', 'Video Count', 'Has Questions'])
+    def __exit__(self, *exc):
+        for f in self._files:
+            f.close()
+    
+    def _write(self, name: str, row: List[Any]):
+        self.writers[name].writerow(row)
+        self.counts[name] += 1
+    
+    def write_module(self, module: Dict[str, Any]):
+        self.module_count += 1
+        module_title = module.get('title', '')
+        description = module.get('description') or ''
+        units = module.get('units', [])
+        self._write('modules', [
+            self.module_count,
+            module_title,
+            module.get('url', ''),
+            description[:100] + '...' if len(description) > 100 else description,
+            module.get('duration', ''),
+            len(units)
+        ])
+        
+        if not units and module.get('content'):
+            # ms_learn_full_crawler/ms_learn_crawler_fixed: videos/questions/exercise nằm trực tiếp trong module
+            units = [{'title': module_title, 'url': module.get('url'), 'type': 'module',
+                      'content': module['content']}]
         
-        for module in data.get('modules', []):
-            module_title = module.get('title', '')
-            for idx, unit in enumerate(module.get('units', []), 1):
-                content = unit.get('content', {})
-                videos = content.get('videos', [])
-                questions = content.get('questions', [])
-                
-                writer.writerow([
+        for idx, unit in enumerate(units, 1):
+            unit_title = unit.get('title', '')
+            content = unit.get('content') or {}
+            videos = content.get('videos') or []
+            questions = content.get('questions') or []
+            
+            self._write('units', [
+                module_title,
+                idx,
+                unit_title,
+                unit.get('type', ''),
+                unit.get('url', ''),
+                'Yes' if videos else 'No',
+                len(videos),
+                'Yes' if questions else 'No'
+            ])
+            
+            for video_idx, video in enumerate(videos, 1):
+                self._write('videos', [
+                    module_title,
+                    unit_title,
+                    video_idx,
+                    video.get('type', ''),
+                    video.get('watch_url') or video.get('url') or video.get('embed_url', '')
+                ])
+            
+            for question in questions:
+                self._write('questions', [
                     module_title,
-                    idx,
-                    unit.get('title', ''),
-                    unit.get('type', ''),
-                    unit.get('url', ''),
-                    'Yes' if videos else 'No',
-                    len(videos),
-                    'Yes' if questions else 'No'
+                    unit_title,
+                    question.get('question_number', ''),
+                    question.get('type', ''),
+                    question.get('question', ''),
+                    ' | '.join(question.get('options', [])),
+                    ' | '.join(question.get('correct_answers', []))
                 ])
+            
+            exercise = content.get('exercise_steps') or {}
+            for step in exercise.get('steps', []):
+                self._write('exercises', [
+                    module_title,
+                    unit_title,
+                    f"Step {step.get('step_number', '')}: {step.get('instruction', '')[:200]}"
+                ])
+
+
+def export_modules(modules: Iterator[Dict[str, Any]], output_dir: str, base_name: str) -> Dict[str, int]:
+    """Ghi 5 file CSV trong 1 lượt qua modules, trả về số dòng mỗi file"""
+    with CourseCsvWriter(output_dir, base_name) as writer:
+        for module in modules:
+            writer.write_module(module)
+    for name, path in writer.paths.items():
+        print(f"📝 Export {name} ({writer.counts[name]} dòng) -> {path}")
+    return {'modules': writer.module_count, **{f"{k}_rows": v for k, v in writer.counts.items()}}
+
+
+def export_to_csv(json_file: str, output_dir: str = "output") -> Dict[str, int]:
+    """Export JSON/JSONL/SQLite sang CSV files"""
+    json_file = str(json_file)
+    print(f"📖 Đang đọc file: {json_file}")
     
-    # 3. Export videos
-    videos_csv = output_dir / f"{base_name}_videos.csv"
-    print(f"📝 Export videos -> {videos_csv}")
+    counts = export_modules(iter_modules(json_file), output_dir, Path(json_file).stem)
     
-    with open(videos_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Module', 'Video #', 'URL'])
-        
-        for module in data.get('modules', []):
-            module_title = module.get('title', '')
-
-            videos = module.get('content', {}).get('videos', [])
-                
-            for idx, video in enumerate(videos, 1):
-                    writer.writerow([
-                        module_title,
-                        idx,
-                        video.get('embed_url', '')
-                    ])
-    
-    # 4. Export questions
-    questions_csv = output_dir / f"{base_name}_questions.csv"
-    print(f"📝 Export questions -> {questions_csv}")
-    
-    with open(questions_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Module', 'Unit', 'Question #', 'Type', 'Question', 'Options'])
-        
-        for module in data.get('modules', []):
-            module_title = module.get('title', '')
-            for unit in module.get('units', []):
-                unit_title = unit.get('title', '')
-                questions = unit.get('content', {}).get('questions', [])
-                
-                for question in questions:
-                    q_num = question.get('question_number', '')
-                    writer.writerow([
-                        module_title,
-                        unit_title,
-                        q_num,
-                        question.get('type', ''),
-                        question.get('question', ''),
-                        ' | '.join(question.get('options', []))
-                    ])
-    
-    # 5. Export exercises
-    exercises_csv = output_dir / f"{base_name}_exercises.csv"
-    print(f"📝 Export exercises -> {exercises_csv}")
-    
-    with open(exercises_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Module', 'Unit', 'Exercise Steps'])
-        
-        for module in data.get('modules', []):
-            module_title = module.get('title', '')
-            for unit in module.get('units', []):
-                unit_title = unit.get('title', '')
-                steps = unit.get('content', {}).get('exercise_steps', [])
-                
-                if steps:
-                    for idx, step in enumerate(steps, 1):
-                        writer.writerow([
-                            module_title,
-                            unit_title,
-                            f"Step {idx}: {step[:200]}"
-                        ])
-    
-    print("\n✅ Export hoàn tất!")
-    print(f"📊 Tổng số files CSV: 5")
+    print(f"\n✅ Export hoàn tất! ({counts['modules']} modules)")
+    print(f"📊 Tổng số files CSV: {len(CSV_HEADERS)}")
     print(f"📁 Vị trí: {output_dir}/")
+    return counts
+
+
+def export_all(files: List[str], workers: int = None) -> Dict[str, Dict[str, int]]:
+    """Export nhiều file song song, mỗi file 1 process"""
+    files = [str(f) for f in files]
+    workers = workers or min(len(files), os.cpu_count() or 1)
+    results = {}
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        for json_file, result in zip(files, executor.map(export_to_csv, files)):
+            results[json_file] = result
+    return results
+
+
+def find_input_files(output_dir: Path) -> List[Path]:
+    files = list(output_dir.glob("*.json")) + list(output_dir.glob("*.jsonl")) + list(output_dir.glob("*.db"))
+    return [f for f in files if f.name not in NON_COURSE_FILES]
 
 
 def main():
@@ -142,15 +342,15 @@ def main():
 ║      Export JSON to CSV Converter              ║
 ╚════════════════════════════════════════════════╝
 """)
-    
+
     output_dir = Path("output")
-    json_files = list(output_dir.glob("*.json"))
+    json_files = find_input_files(output_dir)
     
     if not json_files:
-        print("❌ Không tìm thấy file JSON nào trong folder output/")
+        print("❌ Không tìm thấy file JSON/JSONL/SQLite nào trong folder output/")
         return
     
-    print("📋 Các file JSON có sẵn:")
+    print("📋 Các file có sẵn:")
     for idx, file in enumerate(json_files, 1):
         print(f"  {idx}. {file.name}")
     
@@ -158,9 +358,10 @@ def main():
     choice = input("Chọn file để export (số thứ tự hoặc 'all' cho tất cả): ").strip().lower()
     
     if choice == 'all':
-        for json_file in json_files:
-            print(f"\n{'='*50}")
-            export_to_csv(json_file)
+        results = export_all(json_files)
+        print(f"\n{'='*50}")
+        for json_file, counts in results.items():
+            print(f"  ✅ {Path(json_file).name}: {counts['modules']} modules, {counts['units_rows']} units")
     else:
         try:
             idx = int(choice) - 1
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Export dữ liệu crawl sang bảng cột (Parquet hoặc Arrow IPC) để phân tích bằng
+pandas/polars/DuckDB mà không phải parse lại JSON lồng nhau.
+
+Mỗi bảng 1 file: units, paragraphs, headings, code_blocks, images, videos,
+questions, exercise_steps. Cột path/module/type/language được dictionary-encode.
+Input đọc streaming giống export_csv.py (JSON output, journal JSONL, SQLite .db).
+
+    python export_parquet.py output/sc200_course_full.json
+    python export_parquet.py output/crawl.db --format arrow --output-dir output/arrow
+
+Cần pyarrow: pip install pyarrow
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from export_csv import iter_modules_with_path
+
+
+BATCH_ROWS = 10000  # Số dòng mỗi row group / record batch
+
+
+def _dict_string():
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def table_schemas() -> Dict[str, 'pa.Schema']:
+    """Schema của từng bảng (mọi bảng đều có path/module/unit_url để join với units)"""
+    key_fields = [
+        ('path', _dict_string()),
+        ('module', _dict_string()),
+        ('unit_url', pa.string()),
+    ]
+    return {
+        'units': pa.schema(key_fields + [
+            ('module_url', _dict_string()),
+            ('unit_idx', pa.int32()),
+            ('unit_title', pa.string()),
+            ('type', _dict_string()),
+            ('word_count', pa.int32()),
+            ('paragraph_count', pa.int32()),
+            ('heading_count', pa.int32()),
+            ('code_block_count', pa.int32()),
+            ('image_count', pa.int32()),
+            ('video_count', pa.int32()),
+            ('question_count', pa.int32()),
+            ('exercise_step_count', pa.int32()),
+            ('error', pa.string()),
+        ]),
+        'paragraphs': pa.schema(key_fields + [
+            ('seq', pa.int32()),
+            ('text', pa.string()),
+            ('word_count', pa.int32()),
+        ]),
+        'headings': pa.schema(key_fields + [
+            ('seq', pa.int32()),
+            ('level', _dict_string()),
+            ('text', pa.string()),
+        ]),
+        'code_blocks': pa.schema(key_fields + [
+            ('seq', pa.int32()),
+            ('language', _dict_string()),
+            ('code', pa.string()),
+            ('line_count', pa.int32()),
+        ]),
+        'images': pa.schema(key_fields + [
+            ('seq', pa.int32()),
+            ('url', pa.string()),
+            ('alt', pa.string()),
+            ('title', pa.string()),
+        ]),
+        'videos': pa.schema(key_fields + [
+            ('seq', pa.int32()),
+            ('type', _dict_string()),
+            ('platform', _dict_string()),
+            ('video_id', pa.string()),
+            ('url', pa.string()),
+        ]),
+        'questions': pa.schema(key_fields + [
+            ('question_number', pa.int32()),
+            ('type', _dict_string()),
+            ('question', pa.string()),
+            ('options', pa.list_(pa.string())),
+            ('correct_answers', pa.list_(pa.string())),
+            ('explanation', pa.string()),
+        ]),
+        'exercise_steps': pa.schema(key_fields + [
+            ('step_number', pa.int32()),
+            ('instruction', pa.string()),
+            ('code_snippets', pa.list_(pa.string())),
+        ]),
+    }
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _words(text: Optional[str]) -> int:
+    return len(text.split()) if text else 0
+
+
+def unit_rows(path: Optional[str], module: Dict[str, Any], unit: Dict[str, Any],
+              unit_idx: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Tách 1 unit thành các dòng cho từng bảng"""
+    key = {'path': path, 'module': module.get('title'), 'unit_url': unit.get('url')}
+    content = unit.get('content') or {}
+    full_content = content.get('full_content') or {}
+    paragraphs = full_content.get('paragraphs') or []
+    exercise = content.get('exercise_steps') or {}
+    steps = (exercise.get('steps') or []) if isinstance(exercise, dict) else []
+
+    rows = {
+        'paragraphs': [{**key, 'seq': seq, 'text': text, 'word_count': _words(text)}
+                       for seq, text in enumerate(paragraphs)],
+        'headings': [{**key, 'seq': seq, 'level': h.get('level'), 'text': h.get('text')}
+                     for seq, h in enumerate(full_content.get('headings') or [])],
+        'code_blocks': [{**key, 'seq': seq, 'language': c.get('language') or None, 'code': c.get('code'),
+                         'line_count': len((c.get('code') or '').splitlines())}
+                        for seq, c in enumerate(content.get('code_blocks') or [])],
+        'images': [{**key, 'seq': seq, 'url': i.get('url'), 'alt': i.get('alt'), 'title': i.get('title')}
+                   for seq, i in enumerate(content.get('images') or [])],
+        'videos': [{**key, 'seq': seq, 'type': v.get('type'), 'platform': v.get('platform'),
+                    'video_id': v.get('video_id'),
+                    'url': v.get('watch_url') or v.get('url') or v.get('embed_url')}
+                   for seq, v in enumerate(content.get('videos') or [])],
+        'questions': [{**key, 'question_number': _int(q.get('question_number')), 'type': q.get('type'),
+                       'question': q.get('question'), 'options': list(q.get('options') or []),
+                       'correct_answers': list(q.get('correct_answers') or []),
+                       'explanation': q.get('explanation')}
+                      for q in content.get('questions') or []],
+        'exercise_steps': [{**key, 'step_number': _int(s.get('step_number')), 'instruction': s.get('instruction'),
+                            'code_snippets': list(s.get('code_snippets') or [])}
+                           for s in steps],
+    }
+    rows['units'] = [{
+        **key,
+        'module_url': module.get('url'),
+        'unit_idx': unit_idx,
+        'unit_title': unit.get('title'),
+        'type': unit.get('type'),
+        'word_count': sum(r['word_count'] for r in rows['paragraphs']),
+        'paragraph_count': len(rows['paragraphs']),
+        'heading_count': len(rows['headings']),
+        'code_block_count': len(rows['code_blocks']),
+        'image_count': len(rows['images']),
+        'video_count': len(rows['videos']),
+        'question_count': len(rows['questions']),
+        'exercise_step_count': len(rows['exercise_steps']),
+        'error': unit.get('error'),
+    }]
+    return rows
+
+
+class ColumnarWriter:
+    """Gom dòng theo bảng, ghi mỗi BATCH_ROWS dòng thành 1 row group (Parquet) / record batch (Arrow)"""
+
+    def __init__(self, output_dir: str, base_name: str, fmt: str = 'parquet', batch_rows: int = BATCH_ROWS):
+        self.output_dir = Path(output_dir)
+        self.base_name = base_name
+        self.fmt = fmt
+        self.batch_rows = batch_rows
+        self.schemas = table_schemas()
+        self.pending: Dict[str, List[Dict[str, Any]]] = {name: [] for name in self.schemas}
+        self.counts: Dict[str, int] = {name: 0 for name in self.schemas}
+        self.writers: Dict[str, Any] = {}
+        self._sinks = []
+        # Arrow IPC file chỉ cho phép dictionary mở rộng (delta) giữa các batch,
+        # nên giữ dictionary tích luỹ cho mỗi cột (bảng, cột) -> {giá trị: index}
+        self._dictionaries: Dict[tuple, Dict[str, int]] = {}
+
+    def path(self, table: str) -> Path:
+        ext = 'parquet' if self.fmt == 'parquet' else 'arrow'
+        return self.output_dir / f"{self.base_name}_{table}.{ext}"
+
+    def _writer(self, table: str):
+        if table not in self.writers:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            schema = self.schemas[table]
+            if self.fmt == 'parquet':
+                self.writers[table] = pq.ParquetWriter(str(self.path(table)), schema, compression='zstd')
+            else:
+                sink = pa.OSFile(str(self.path(table)), 'wb')
+                self._sinks.append(sink)
+                options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+                self.writers[table] = pa.ipc.new_file(sink, schema, options=options)
+        return self.writers[table]
+
+    def _dictionary_column(self, table: str, field, values: List[Optional[str]]):
+        """Encode 1 cột theo dictionary tích luỹ để batch sau chỉ là delta của batch trước"""
+        dictionary = self._dictionaries.setdefault((table, field.name), {})
+        indices = [None if v is None else dictionary.setdefault(v, len(dictionary)) for v in values]
+        return pa.DictionaryArray.from_arrays(pa.array(indices, field.type.index_type),
+                                              pa.array(list(dictionary), pa.string()))
+
+    def _to_table(self, table: str, rows: List[Dict[str, Any]]):
+        schema = self.schemas[table]
+        if self.fmt == 'parquet':
+            return pa.Table.from_pylist(rows, schema=schema)
+        columns = []
+        for field in schema:
+            values = [row.get(field.name) for row in rows]
+            if pa.types.is_dictionary(field.type):
+                columns.append(self._dictionary_column(table, field, values))
+            else:
+                columns.append(pa.array(values, field.type))
+        return pa.Table.from_arrays(columns, schema=schema)
+
+    def _flush(self, table: str):
+        rows = self.pending[table]
+        if not rows:
+            return
+        batch = self._to_table(table, rows)
+        self._writer(table).write_table(batch)
+        self.counts[table] += len(rows)
+        self.pending[table] = []
+
+    def add(self, rows: Dict[str, List[Dict[str, Any]]]):
+        for table, table_rows in rows.items():
+            self.pending[table].extend(table_rows)
+            if len(self.pending[table]) >= self.batch_rows:
+                self._flush(table)
+
+    def close(self):
+        for table in self.schemas:
+            self._flush(table)
+            if table not in self.writers:
+                self._writer(table)  # Bảng rỗng vẫn có file với đúng schema
+        for writer in self.writers.values():
+            writer.close()
+        for sink in self._sinks:
+            sink.close()
+
+
+def export_columnar(input_file: str, output_dir: str = "output/parquet", fmt: str = 'parquet') -> Dict[str, int]:
+    """Export 1 file JSON/JSONL/SQLite thành các bảng cột, trả về số dòng mỗi bảng"""
+    if pa is None:
+        raise RuntimeError("Cần pyarrow để export Parquet/Arrow: pip install pyarrow")
+
+    input_file = str(input_file)
+    print(f"📖 Đang đọc file: {input_file}")
+    writer = ColumnarWriter(output_dir, Path(input_file).stem, fmt)
+    try:
+        for path, module in iter_modules_with_path(input_file):
+            units = module.get('units')
+            if units is None and module.get('content'):
+                # ms_learn_full_crawler: content nằm trực tiếp trong module
+                units = [{'title': module.get('title'), 'url': module.get('url'), 'type': 'module',
+                          'content': module['content']}]
+            for unit_idx, unit in enumerate(units or [], 1):
+                writer.add(unit_rows(path, module, unit, unit_idx))
+    finally:
+        writer.close()
+
+    for table, count in writer.counts.items():
+        print(f"📝 {table}: {count} dòng -> {writer.path(table)}")
+    return writer.counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export dữ liệu crawl sang Parquet/Arrow")
+    parser.add_argument('input', help="File JSON output, journal .jsonl hoặc SQLite .db")
+    parser.add_argument('--format', choices=['parquet', 'arrow'], default='parquet')
+    parser.add_argument('--output-dir', default=os.path.join("output", "parquet"))
+    args = parser.parse_args()
+
+    if pa is None:
+        print("❌ Chưa cài pyarrow: pip install pyarrow")
+        sys.exit(1)
+
+    export_columnar(args.input, args.output_dir, args.format)
+    print("\n✅ Export hoàn tất!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+HTML Snapshot Parser
+Chụp page.content() 1 lần mỗi unit rồi chạy tất cả extractors trên snapshot
+bằng BeautifulSoup (in-process, chạy được trong process pool).
+Output giữ nguyên cấu trúc như các extractor chạy trên live DOM.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from dom_extract import build_full_content, build_code_blocks, build_images
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+
+def make_soup(html: str) -> BeautifulSoup:
+    """Parse HTML bằng lxml nếu có, không thì dùng html.parser"""
+    return BeautifulSoup(html, HTML_PARSER)
+
+
+def _text(elem) -> str:
+    """Tương đương textContent của DOM"""
+    return elem.get_text()
+
+
+def extract_full_content(soup: BeautifulSoup, main_selector: str) -> Dict[str, Any]:
+    """Trích xuất headings, paragraphs, lists, tables từ main content"""
+    main = soup.select_one(main_selector)
+    if not main:
+        return build_full_content(None)
+
+    payload = {
+        'headings': [{'tag': h.name.lower(), 'text': _text(h)}
+                     for h in main.select('h1, h2, h3, h4, h5, h6')],
+        'paragraphs': [_text(p) for p in main.select('p')],
+        'lists': [[_text(li) for li in lst.select('li')] for lst in main.select('ul, ol')],
+        'tables': [[[_text(cell) for cell in row.select('td, th')] for row in table.select('tr')]
+                   for table in main.select('table')]
+    }
+    return build_full_content(payload)
+
+
+def extract_code_blocks(soup: BeautifulSoup) -> List[Dict[str, str]]:
+    """Trích xuất code blocks"""
+    payload = []
+    for elem in soup.select('pre code, .code-block, pre'):
+        cls = elem.get('class')
+        payload.append({
+            'cls': ' '.join(cls) if isinstance(cls, list) else cls,
+            'text': _text(elem)
+        })
+    return build_code_blocks(payload)
+
+
+def extract_images(soup: BeautifulSoup, base_url: str) -> List[Dict[str, str]]:
+    """Trích xuất images"""
+    payload = [{'src': img.get('src'), 'alt': img.get('alt'), 'title': img.get('title')}
+               for img in soup.select('img')]
+    return build_images(payload, base_url)
+
+
+def extract_videos(soup: BeautifulSoup, html: str, base_url: str) -> List[Dict[str, Any]]:
+    """Trích xuất video links (YouTube, Microsoft Stream, direct)"""
+    videos = []
+
+    # 1. YouTube videos
+    for iframe in soup.select('iframe[src*="youtube.com"], iframe[src*="youtu.be"]'):
+        src = iframe.get('src')
+        if src:
+            video_id = None
+            if 'embed/' in src:
+                video_id = src.split('embed/')[-1].split('?')[0]
+            elif 'v=' in src:
+                video_id = src.split('v=')[-1].split('&')[0]
+
+            videos.append({
+                'type': 'youtube',
+                'platform': 'YouTube',
+                'embed_url': src,
+                'video_id': video_id,
+                'watch_url': f"https://www.youtube.com/watch?v={video_id}" if video_id else src,
+                'download_note': 'Use yt-dlp or youtube-dl to download'
+            })
+
+    # 2. Microsoft Stream videos
+    for iframe in soup.select('iframe[src*="microsoft.com/videoplayer"], iframe[src*="msit.microsoftstream.com"], '
+                              'iframe[src*="microsoftstream.com"], iframe[src*="learn-video.azurefd.net"]'):
+        src = iframe.get('src')
+        if src:
+            videos.append({
+                'type': 'microsoft_stream',
+                'platform': 'Microsoft Stream',
+                'embed_url': src,
+                'download_note': 'Requires Microsoft account and Stream Recorder extension'
+            })
+
+    # 3. Direct video URLs
+    for video in soup.select('video'):
+        for source in video.select('source'):
+            src = source.get('src')
+            video_type = source.get('type') or 'video/mp4'
+            if src:
+                full_url = src if src.startswith('http') else f"{base_url}{src}"
+                videos.append({
+                    'type': 'direct',
+                    'platform': 'Direct Download',
+                    'url': full_url,
+                    'mime_type': video_type,
+                    'download_note': 'Direct download available'
+                })
+
+    # 4. Tìm các mp4 links trong HTML
+    mp4_links = re.findall(r'https?://[^\s<>"]+\.mp4', html)
+    for link in set(mp4_links):
+        if not any(v.get('url') == link for v in videos):
+            videos.append({
+                'type': 'direct',
+                'platform': 'Direct Download',
+                'url': link,
+                'mime_type': 'video/mp4',
+                'download_note': 'Direct download available'
+            })
+
+    return videos
+
+
+def extract_exercise(soup: BeautifulSoup) -> Dict[str, Any]:
+    """Trích xuất bài tập/lab"""
+    exercise = {
+        'title': '',
+        'description': '',
+        'duration': '',
+        'steps': [],
+        'requirements': [],
+        'verification': []
+    }
+
+    title_elem = soup.select_one('h1, h2')
+    if title_elem:
+        exercise['title'] = _text(title_elem)
+
+    duration_elem = soup.select_one('[class*="duration"], [data-duration]')
+    if duration_elem:
+        exercise['duration'] = _text(duration_elem)
+
+    desc_elem = soup.select_one('[class*="description"], [class*="overview"], .intro p')
+    if desc_elem:
+        exercise['description'] = _text(desc_elem)
+
+    req_section = soup.select_one('[class*="requirement"], [class*="prerequisite"]')
+    if req_section:
+        for item in req_section.select('li, p'):
+            text = _text(item)
+            if text:
+                exercise['requirements'].append(text.strip())
+
+    # Các bước thực hiện
+    for selector in ['ol li', '[class*="step"]', '[class*="task"] li', 'article li']:
+        steps = soup.select(selector)
+        if len(steps) > 3:  # Đủ steps
+            for idx, step in enumerate(steps, 1):
+                text = _text(step)
+                if text and len(text.strip()) > 15:
+                    code_blocks = [_text(code).strip() for code in step.select('code, pre') if _text(code)]
+                    exercise['steps'].append({
+                        'step_number': idx,
+                        'instruction': text.strip(),
+                        'code_snippets': code_blocks
+                    })
+
+            if exercise['steps']:
+                break
+
+    verify_section = soup.select_one('[class*="verify"], [class*="validation"], [class*="check"]')
+    if verify_section:
+        for item in verify_section.select('li, p'):
+            text = _text(item)
+            if text:
+                exercise['verification'].append(text.strip())
+
+    return exercise
+
+
+def parse_unit_snapshot(html: str, base_url: str, main_selector: str,
+                        with_exercise: bool = False) -> Dict[str, Any]:
+    """
+    Chạy tất cả extractors trên 1 snapshot HTML.
+    Hàm top-level để dùng được với ProcessPoolExecutor.
+    """
+    return parse_unit_snapshot_timed(html, base_url, main_selector, with_exercise)[0]
+
+
+def parse_unit_snapshot_timed(html: str, base_url: str, main_selector: str,
+                              with_exercise: bool = False) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Như parse_unit_snapshot, trả thêm thời gian (giây) của từng extractor"""
+    timings: Dict[str, float] = {}
+
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    soup = timed('parse_html', make_soup, html)
+    content = {
+        'full_content': timed('extract_full_content', extract_full_content, soup, main_selector),
+        'code_blocks': timed('extract_code_blocks', extract_code_blocks, soup),
+        'videos': timed('extract_videos', extract_videos, soup, html, base_url),
+        'images': timed('extract_images', extract_images, soup, base_url),
+    }
+    if with_exercise:
+        content['exercise_steps'] = timed('extract_exercise', extract_exercise, soup)
+    return content, timings
+
+
+def snapshot_path(snapshot_dir: str, url: str) -> str:
+    """Đường dẫn file snapshot cho 1 URL"""
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(snapshot_dir, f"{digest}.html")
+
+
+def save_snapshot(snapshot_dir: str, url: str, html: str) -> str:
+    """Lưu snapshot HTML ra file, trả về đường dẫn"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = snapshot_path(snapshot_dir, url)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return path
+
+
+def load_snapshot(path: str) -> Optional[str]:
+    """Đọc snapshot HTML, None nếu không có"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def reextract_json(json_file: str, base_url: str = "https://learn.microsoft.com",
+                   main_selector: str = 'article, main, .content, [role="main"]'):
+    """Chạy lại extraction cho các units có snapshot, không cần crawl lại"""
+    print(f"📖 Đang đọc file: {json_file}")
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    count = 0
+    for module in data.get('modules', []):
+        for unit in module.get('units', []):
+            html = load_snapshot(unit.get('snapshot', ''))
+            if html is None:
+                continue
+            with_exercise = 'exercise_steps' in unit.get('content', {})
+            unit.setdefault('content', {}).update(
+                parse_unit_snapshot(html, base_url, main_selector, with_exercise)
+            )
+            count += 1
+
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ Re-extract {count} units từ snapshot -> {json_file}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python html_snapshot.py output/sc200_course_full.json")
+        sys.exit(1)
+    reextract_json(sys.argv[1])
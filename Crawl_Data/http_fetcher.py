@@ -0,0 +1,113 @@
+"""
+HTTP Fetcher
+Lấy HTML trực tiếp bằng aiohttp (connection pool, keep-alive, gzip)
+cho các trang Learn được render phía server, không cần mở Chromium
+"""
+
+import time
+from http.cookies import Morsel
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+import aiohttp
+from multidict import CIMultiDict
+from yarl import URL
+
+from crawl_metrics import add_bytes, span
+from rate_limiter import AdaptiveRateLimiter
+
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+
+class HttpFetcher:
+    """1 ClientSession dùng chung, các connection được giữ lại giữa các request"""
+
+    def __init__(self, max_connections: int = 16, timeout: int = 30,
+                 user_agent: str = DEFAULT_USER_AGENT, limiter: AdaptiveRateLimiter = None):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.limiter = limiter
+        self.session = None
+
+    async def open(self):
+        """Tạo session với connection pool"""
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections,
+            keepalive_timeout=60,
+            ttl_dns_cache=300
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={
+                'User-Agent': self.user_agent,
+                'Accept': 'text/html,application/xhtml+xml',
+                'Accept-Encoding': 'gzip, deflate',
+                'Accept-Language': 'en-US,en;q=0.9'
+            }
+        )
+
+    def add_cookies(self, cookies: Iterable[Dict[str, Any]]):
+        """
+        Nạp cookies dạng Playwright (storage state / context.cookies()) vào cookie jar của session,
+        để request aiohttp dùng chung session đăng nhập với browser. Cookie đã hết hạn bị bỏ qua.
+        """
+        now = time.time()
+        for cookie in cookies:
+            expires = cookie.get('expires', -1)
+            if expires != -1 and expires <= now:
+                continue
+            domain = cookie['domain']
+            morsel = Morsel()
+            morsel.set(cookie['name'], cookie['value'], cookie['value'])  # Gửi nguyên giá trị, không quote
+            morsel['path'] = cookie.get('path') or '/'
+            if domain.startswith('.'):
+                morsel['domain'] = domain  # Domain cookie, không có dấu chấm = host-only như trong browser
+            if expires != -1:
+                morsel['max-age'] = str(int(expires - now))
+            if cookie.get('secure'):
+                morsel['secure'] = True
+            self.session.cookie_jar.update_cookies([(cookie['name'], morsel)],
+                                                   URL.build(scheme='https', host=domain.lstrip('.')))
+
+    async def close(self):
+        """Đóng session và connection pool"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def fetch(self, url: str) -> str:
+        """GET url, trả về HTML (aiohttp tự giải nén gzip), qua rate limiter nếu có"""
+        _, html, _ = await self.fetch_conditional(url)
+        return html
+
+    async def fetch_conditional(self, url: str, etag: str = None,
+                                last_modified: str = None) -> Tuple[int, Optional[str], Mapping[str, str]]:
+        """
+        GET kèm If-None-Match/If-Modified-Since (nếu có).
+        Trả về (status, html, headers), html = None khi server trả 304 Not Modified.
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        if self.limiter is None:
+            return await self._request(url, headers=headers)
+        async with self.limiter.request() as ticket:
+            return await self._request(url, ticket, headers)
+
+    async def _request(self, url: str, ticket=None,
+                       headers: Dict[str, str] = None) -> Tuple[int, Optional[str], Mapping[str, str]]:
+        with span('fetch'):
+            async with self.session.get(url, headers=headers) as response:
+                if ticket is not None:
+                    ticket.set_response(response.status, response.headers.get('Retry-After'))
+                response.raise_for_status()
+                html = None if response.status == 304 else await response.text()
+                response_headers = CIMultiDict(response.headers)  # Tra header không phân biệt hoa/thường
+        if html is not None:
+            add_bytes(len(html))
+        return response.status, html, response_headers
@@ -0,0 +1,132 @@
+"""
+Incremental Recrawl
+Lưu validators cho mỗi unit (ETag, Last-Modified, hash text của #module-unit-content)
+để lần crawl sau chỉ extract lại các trang đã thay đổi:
+
+    unit['validators'] = {"etag": "...", "last_modified": "...", "content_hash": "sha1..."}
+
+Lần sau gửi conditional GET (If-None-Match/If-Modified-Since): 304 hoặc hash giống cũ
+thì dùng lại extraction của lần trước. Báo cáo theo module: new/changed/unchanged/removed.
+"""
+
+import hashlib
+import html as html_lib
+import re
+from typing import Any, Dict, List, Mapping, Optional
+
+
+UNIT_CONTENT_ID = 'module-unit-content'
+
+_DIV_TAG = re.compile(r'<(/?)div\b[^>]*>', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+_TAG = re.compile(r'<[^>]*>')
+_SCRIPT = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+
+RECRAWL_STATUSES = ('new', 'changed', 'unchanged', 'removed')
+
+
+def unit_content_html(html: str, element_id: str = UNIT_CONTENT_ID) -> Optional[str]:
+    """
+    Cắt markup của <div id=element_id> bằng cách đếm thẻ div, không cần parse cả trang.
+    Trả về None nếu không có element.
+    """
+    match = re.search(r'<div\b[^>]*\bid=["\']?%s["\'\s>]' % re.escape(element_id), html, re.IGNORECASE)
+    if not match:
+        return None
+    depth = 0
+    for tag in _DIV_TAG.finditer(html, match.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return html[match.start():tag.end()]
+    return html[match.start():]  # Thiếu thẻ đóng: lấy tới hết trang
+
+
+def content_text(html: str) -> str:
+    """Text của #module-unit-content (cả trang nếu không có): bỏ tag/script, decode entity, gộp whitespace"""
+    content = unit_content_html(html)
+    if content is None:
+        content = html
+    text = html_lib.unescape(_TAG.sub(' ', _SCRIPT.sub(' ', content)))
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def content_hash(html: str) -> str:
+    """
+    SHA1 của text trong #module-unit-content. Hash text thay vì markup để HTML gốc (HTTP)
+    và DOM đã render (browser, page.content()) của cùng 1 trang cho cùng 1 hash.
+    """
+    return hashlib.sha1(content_text(html).encode('utf-8')).hexdigest()
+
+
+def make_validators(headers: Mapping[str, str], html: str) -> Dict[str, Optional[str]]:
+    """Validators lưu vào unit['validators'] từ response headers + HTML"""
+    return {
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'content_hash': content_hash(html),
+    }
+
+
+class RecrawlReport:
+    """Trạng thái new/changed/unchanged/removed của từng unit, nhóm theo module"""
+
+    def __init__(self, source: str):
+        self.source = source  # Output/journal của lần crawl trước
+        self.modules: Dict[str, Dict[str, Any]] = {}
+        self.removed_modules: List[Dict[str, str]] = []
+
+    def _module(self, module: Dict[str, Any]) -> Dict[str, Any]:
+        return self.modules.setdefault(module['url'], {
+            'url': module['url'],
+            'title': module.get('title', ''),
+            **{status: [] for status in RECRAWL_STATUSES},
+        })
+
+    def add(self, module: Dict[str, Any], status: str, unit_url: str):
+        self._module(module)[status].append(unit_url)
+
+    def compare_reused(self, module: Dict[str, Any], unit: Dict[str, Any], previous: Optional[Dict[str, Any]]):
+        """Unit lấy từ module cache (không request): so content_hash với lần crawl trước"""
+        if previous is None:
+            state = 'new'
+        else:
+            old = (previous.get('validators') or {}).get('content_hash')
+            new = (unit.get('validators') or {}).get('content_hash')
+            state = 'unchanged' if old and old == new else 'changed'
+        self.add(module, state, unit['url'])
+
+    def compare_units(self, module: Dict[str, Any], previous: Optional[Dict[str, Any]]):
+        """Ghi các unit có ở lần trước nhưng không còn trong module"""
+        entry = self._module(module)
+        if previous is None:
+            return
+        current = {u['url'] for u in module.get('units', [])}
+        entry['removed'].extend(u['url'] for u in previous.get('units', []) if u.get('url') not in current)
+
+    def compare_modules(self, modules: List[Dict[str, Any]], previous_modules: Dict[str, Dict[str, Any]]):
+        """Ghi các module của lần trước không còn trong course"""
+        current = {m['url'] for m in modules}
+        self.removed_modules = [{'url': url, 'title': m.get('title', '')}
+                                for url, m in previous_modules.items() if url not in current]
+
+    def totals(self) -> Dict[str, int]:
+        return {status: sum(len(m[status]) for m in self.modules.values()) for status in RECRAWL_STATUSES}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'source': self.source,
+            'totals': self.totals(),
+            'modules': list(self.modules.values()),
+            'removed_modules': self.removed_modules,
+        }
+
+    def print_summary(self):
+        totals = self.totals()
+        print(f"\n🔁 Incremental so với {self.source}: "
+              + ", ".join(f"{totals[s]} {s}" for s in RECRAWL_STATUSES))
+        for entry in self.modules.values():
+            counts = " ".join(f"{s}={len(entry[s])}" for s in RECRAWL_STATUSES)
+            marker = "  " if not (entry['new'] or entry['changed'] or entry['removed']) else "✏️ "
+            print(f"  {marker}{entry['title'][:50]:<50} {counts}")
+        for module in self.removed_modules:
+            print(f"  🗑️  Module đã bị xoá: {module['title'] or module['url']}")
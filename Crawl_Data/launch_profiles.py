@@ -0,0 +1,76 @@
+"""
+Launch Profiles
+Cấu hình launch Chromium (headless, viewport, args, device scale) theo tên profile,
+chọn qua CLI (--profile) hoặc menu quick_start
+"""
+
+from typing import Any, Dict
+
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+# Args giảm CPU/RAM mỗi page khi chạy nền trên máy Linux không có màn hình
+LEAN_CHROMIUM_ARGS = [
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-dev-shm-usage',
+    '--disable-background-networking',
+    '--disable-background-timer-throttling',
+    '--disable-renderer-backgrounding',
+    '--no-first-run',
+    '--mute-audio',
+]
+
+LAUNCH_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Mặc định cho batch run: không mở cửa sổ, viewport nhỏ
+    'headless': {
+        'headless': True,
+        'viewport': {'width': 1280, 'height': 800},
+        'device_scale_factor': 1,
+        'args': LEAN_CHROMIUM_ARGS,
+    },
+    # Headed dưới xvfb-run: vẫn dùng args tiết kiệm
+    'xvfb': {
+        'headless': False,
+        'viewport': {'width': 1280, 'height': 800},
+        'device_scale_factor': 1,
+        'args': LEAN_CHROMIUM_ARGS,
+    },
+    # Mở cửa sổ như trước để debug selector/quiz
+    'headed': {
+        'headless': False,
+        'viewport': {'width': 1920, 'height': 1080},
+        'device_scale_factor': 1,
+        'args': [],
+    },
+}
+
+DEFAULT_LAUNCH_PROFILE = 'headless'
+
+
+def get_launch_profile(name: str = None, headless: bool = None) -> Dict[str, Any]:
+    """Lấy profile theo tên, headless (nếu có) ghi đè giá trị của profile"""
+    name = name or DEFAULT_LAUNCH_PROFILE
+    if name not in LAUNCH_PROFILES:
+        raise ValueError(f"Unknown launch profile: {name} (có: {', '.join(LAUNCH_PROFILES)})")
+    profile = dict(LAUNCH_PROFILES[name])
+    if headless is not None:
+        profile['headless'] = headless
+    return profile
+
+
+def launch_options(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """kwargs cho playwright.chromium.launch()"""
+    return {
+        'headless': profile['headless'],
+        'args': list(profile.get('args', [])),
+    }
+
+
+def context_options(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """kwargs cho browser.new_context()"""
+    return {
+        'viewport': profile['viewport'],
+        'device_scale_factor': profile.get('device_scale_factor', 1),
+        'user_agent': profile.get('user_agent', USER_AGENT),
+    }
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Module Cache
+Cache các module đã crawl, dùng chung giữa courses/learning paths, giữa các lần chạy và giữa
+các process của batch_crawl.py (1 file SQLite). Key = URL module đã chuẩn hoá (url_frontier) + kind:
+  'units' - module kèm units đã extract (crawler.py)
+  'page'  - content của trang module (ms_learn_full_crawler.py)
+
+Mỗi entry lưu version nội dung (meta updated_at / ms.date của trang module) và thời điểm crawl:
+- Còn trong TTL: dùng lại luôn, không cần request nào
+- Hết TTL: tải lại trang module, version + danh sách units không đổi thì gia hạn entry,
+  khác thì crawl lại
+
+    python module_cache.py output/module_cache.db          # thống kê
+    python module_cache.py output/module_cache.db purge    # xoá entry hết hạn
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from url_frontier import canonical_url
+
+
+DEFAULT_CACHE_PATH = os.path.join("output", "module_cache.db")
+DEFAULT_TTL_HOURS = 7 * 24
+
+# Tăng khi extractors đổi format output -> entry cũ không được dùng lại
+CACHE_FORMAT = 1
+
+# Meta chứa ngày cập nhật nội dung của trang Microsoft Learn, theo thứ tự ưu tiên
+VERSION_META_NAMES = ('updated_at', 'ms.date')
+
+VERSION_JS = """
+(names) => {
+    for (const name of names) {
+        const meta = document.querySelector(`meta[name="${name}"]`);
+        if (meta && meta.content) return meta.content;
+    }
+    return null;
+}
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS modules (
+    url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    version TEXT,
+    format INTEGER NOT NULL,
+    crawled_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL,
+    PRIMARY KEY (url, kind)
+);
+"""
+
+
+def module_version(html: str) -> Optional[str]:
+    """Version nội dung từ HTML trang module (None nếu trang không có meta ngày cập nhật)"""
+    for name in VERSION_META_NAMES:
+        match = re.search(r'<meta\s[^>]*name=["\']%s["\'][^>]*>' % re.escape(name), html, re.IGNORECASE)
+        if match:
+            content = re.search(r'content=["\']([^"\']*)["\']', match.group(0), re.IGNORECASE)
+            if content and content.group(1):
+                return content.group(1)
+    return None
+
+
+async def page_module_version(page) -> Optional[str]:
+    """Như module_version nhưng đọc từ page Playwright đang mở"""
+    try:
+        return await page.evaluate(VERSION_JS, list(VERSION_META_NAMES))
+    except Exception:
+        return None
+
+
+class ModuleCache:
+    """Đọc/ghi module trong cache SQLite (an toàn khi nhiều process cùng dùng 1 file)"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_hours: float = DEFAULT_TTL_HOURS):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # timeout: đợi khi process khác đang ghi
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        return self
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self if self.conn else self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _row(self, url: str, kind: str) -> Optional[sqlite3.Row]:
+        row = self.conn.execute('SELECT * FROM modules WHERE url = ? AND kind = ?',
+                                (canonical_url(url), kind)).fetchone()
+        if row is None or row['format'] != CACHE_FORMAT:
+            return None
+        return row
+
+    def _use(self, row: sqlite3.Row, **updates) -> Dict[str, Any]:
+        sets = ', '.join(['hits = hits + 1'] + [f'{k} = ?' for k in updates])
+        with self.conn:
+            self.conn.execute(f'UPDATE modules SET {sets} WHERE url = ? AND kind = ?',
+                              (*updates.values(), row['url'], row['kind']))
+        return json.loads(row['data'])  # Bản copy mới mỗi lần, caller sửa thoải mái
+
+    def get(self, url: str, kind: str = 'units') -> Optional[Dict[str, Any]]:
+        """Module còn trong TTL, None nếu chưa có hoặc đã hết hạn"""
+        row = self._row(url, kind)
+        if row is None or time.time() - row['crawled_at'] > self.ttl:
+            return None
+        self.hits += 1
+        return self._use(row)
+
+    def revalidate(self, url: str, version: Optional[str], unit_urls: List[str] = None,
+                   kind: str = 'units') -> Optional[Dict[str, Any]]:
+        """
+        Entry hết hạn nhưng trang module vẫn cùng version (và cùng danh sách units):
+        gia hạn thêm 1 TTL và trả về module trong cache. Không có version thì không so được -> None.
+        """
+        row = self._row(url, kind)
+        if row is None or version is None or row['version'] != version:
+            return None
+        module = json.loads(row['data'])
+        if unit_urls is not None and [u.get('url') for u in module.get('units', [])] != unit_urls:
+            return None
+        self.revalidated += 1
+        return self._use(row, crawled_at=time.time())
+
+    def put(self, module: Dict[str, Any], kind: str = 'units'):
+        """Ghi module vừa crawl (version lấy từ module['updated_at'])"""
+        self.misses += 1  # Mỗi lần put = 1 module phải crawl lại
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO modules (url, kind, version, format, crawled_at, hits, data) '
+                'VALUES (?, ?, ?, ?, ?, 0, ?)',
+                (canonical_url(module['url']), kind, module.get('updated_at'), CACHE_FORMAT,
+                 time.time(), json.dumps(module, ensure_ascii=False))
+            )
+
+    def purge(self) -> int:
+        """Xoá entry hết hạn hoặc khác CACHE_FORMAT, trả về số entry đã xoá"""
+        with self.conn:
+            cursor = self.conn.execute('DELETE FROM modules WHERE crawled_at < ? OR format != ?',
+                                       (time.time() - self.ttl, CACHE_FORMAT))
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        row = self.conn.execute('SELECT COUNT(*) AS entries, SUM(hits) AS hits, '
+                                'SUM(crawled_at >= ?) AS fresh FROM modules',
+                                (time.time() - self.ttl,)).fetchone()
+        return {
+            'entries': row['entries'],
+            'fresh': row['fresh'] or 0,
+            'total_hits': row['hits'] or 0,
+            'session': {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses},
+        }
+
+    def print_stats(self):
+        print(f"🗃️  Module cache: {self.hits} hits, {self.revalidated} revalidated, "
+              f"{self.misses} misses ({self.path})")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python module_cache.py output/module_cache.db [purge]")
+        sys.exit(1)
+    with ModuleCache(sys.argv[1]) as cache:
+        if len(sys.argv) > 2 and sys.argv[2] == 'purge':
+            print(f"🗑️  Đã xoá {cache.purge()} entries hết hạn")
+        print(json.dumps(cache.stats(), ensure_ascii=False, indent=2))
@@ -3,6 +3,7 @@ Microsoft Learn Course Crawler
 Crawl toàn bộ course content từ Microsoft Learn
 """
 
+import argparse
 import asyncio
 import itertools
 import json
@@ -12,29 +13,49 @@ from typing import List, Dict, Any
 from datetime import datetime
 import os
 
+from page_readiness import goto_ready, wait_until_ready
+from rate_limiter import AdaptiveRateLimiter
+from request_blocking import RequestBlocker
+from launch_profiles import LAUNCH_PROFILES, DEFAULT_LAUNCH_PROFILE, get_launch_profile, launch_options, context_options
+from checkpoint_store import CheckpointJournal, load_completed
+from dom_extract import (
+    FULL_CONTENT_JS, CODE_BLOCKS_JS, IMAGES_JS,
+    empty_full_content, build_full_content, build_code_blocks, build_images
+)
+
 
 class MicrosoftLearnCrawler:
-    def __init__(self, course_url: str):
+    def __init__(self, course_url: str, blocked_resource_types: List[str] = None,
+                 blocked_url_patterns: List[str] = None, launch_profile: str = DEFAULT_LAUNCH_PROFILE):
         self.course_url = course_url
         self.base_url = "https://learn.microsoft.com"
+        # Mọi navigation đi qua limiter: tự tăng tốc khi server nhanh, giảm khi bị 429/5xx/chậm
+        self.rate_limiter = AdaptiveRateLimiter(max_concurrency=1)
+        # Chặn resource không cần cho DOM (None = dùng danh sách mặc định, rỗng = không chặn)
+        self.request_blocker = RequestBlocker(blocked_resource_types, blocked_url_patterns)
+        self.launch_profile = launch_profile  # Xem launch_profiles.LAUNCH_PROFILES
+        # Checkpoint JSONL: mỗi module xong ghi thêm 1 dòng
+        self.journal_path = os.path.join("output", "crawl_journal.jsonl")
+        self.journal = None
         self.data = {
             "course_url": course_url,
             "crawled_at": datetime.now().isoformat(),
             "modules": []
         }
         
-    async def init_browser(self, headless: bool = False):
-        """Khởi tạo browser với Playwright"""
+    async def init_browser(self, headless: bool = None):
+        """Khởi tạo browser với Playwright theo launch profile (headless ghi đè profile nếu truyền vào)"""
+        profile = get_launch_profile(self.launch_profile, headless=headless)
         self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(headless=headless)
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        )
+        self.browser = await self.playwright.chromium.launch(**launch_options(profile))
+        self.context = await self.browser.new_context(**context_options(profile))
+        await self.request_blocker.install(self.context)  # Chặn images/fonts/media/telemetry
         self.page = await self.context.new_page()
         
     async def close_browser(self):
         """Đóng browser"""
+        if self.request_blocker.blocked:
+            print(f"🚫 Đã chặn {self.request_blocker.blocked} requests (images/fonts/media/telemetry)")
         await self.browser.close()
         await self.playwright.stop()
         
@@ -48,11 +69,7 @@ class MicrosoftLearnCrawler:
     async def get_course_modules(self) -> List[Dict[str, Any]]:
         """Lấy danh sách modules từ course page"""
         print(f"🔍 Đang truy cập course: {self.course_url}")
-        await self.page.goto(self.course_url, wait_until='domcontentloaded')
-        await self.wait_for_load()
-        
-        # Đợi content load
-        await asyncio.sleep(2)
+        await goto_ready(self.page, self.course_url, 'course', limiter=self.rate_limiter)
         
         # Tìm tất cả module links
         modules = []
@@ -112,9 +129,7 @@ class MicrosoftLearnCrawler:
      
     async def get_modules_from_path(self, path_url: str) -> List[Dict[str, Any]]:
         """Lấy modules từ learning path"""
-        await self.page.goto(path_url, wait_until='domcontentloaded')
-        await self.wait_for_load()
-        await asyncio.sleep(2)
+        await goto_ready(self.page, path_url, 'path', limiter=self.rate_limiter)
         
         path_title = await self.page.text_content("h1") or ""
         self.data["learning_path_title"] = path_title.strip()
@@ -161,9 +176,7 @@ class MicrosoftLearnCrawler:
         print(f"\n📖 Đang crawl module: {module['title']}")
         
         try:
-            await self.page.goto(module['url'], wait_until='domcontentloaded')
-            await self.wait_for_load()
-            await asyncio.sleep(2)
+            await goto_ready(self.page, module['url'], 'module', limiter=self.rate_limiter)
 
             module["module_group"] = await self.get_module_group_title()
 
@@ -208,6 +221,7 @@ class MicrosoftLearnCrawler:
             
         except Exception as e:
             print(f"  ❌ Lỗi: {e}")
+            module['error'] = str(e)  # Đánh dấu để --resume crawl lại module này
             import traceback
             traceback.print_exc()
             
@@ -215,74 +229,12 @@ class MicrosoftLearnCrawler:
         
     async def extract_full_content(self) -> Dict[str, Any]:
         """Trích xuất toàn bộ nội dung bài học"""
-        content = {
-            'sections': [],
-            'headings': [],
-            'paragraphs': [],
-            'lists': [],
-            'tables': []
-        }
+        content = empty_full_content()
         
         try:
-            # Lấy main content area
-            main_content = await self.page.query_selector('//*[@id="module-unit-content"]')
-            if not main_content:
-                return content
-            
-            # Lấy tất cả headings
-            headings = await main_content.query_selector_all('h1, h2, h3, h4, h5, h6')
-            for h in headings:
-                tag = await h.evaluate('el => el.tagName.toLowerCase()')
-                text = await h.text_content()
-                if text and text.strip():
-                    content['headings'].append({
-                        'level': tag,
-                        'text': text.strip()
-                    })
-            
-            # Lấy tất cả paragraphs
-            paragraphs = await main_content.query_selector_all('p')
-            for p in paragraphs:
-                text = await p.text_content()
-                if text and len(text.strip()) > 20:  # Bỏ qua đoạn quá ngắn
-                    content['paragraphs'].append(text.strip())
-            
-            # Lấy lists (ul, ol)
-            lists = await main_content.query_selector_all('ul, ol')
-            for lst in lists:
-                items = await lst.query_selector_all('li')
-                list_items = []
-                for item in items:
-                    text = await item.text_content()
-                    if text:
-                        list_items.append(text.strip())
-                if list_items:
-                    content['lists'].append(list_items)
-            
-            # Lấy tables
-            tables = await main_content.query_selector_all('table')
-            for table in tables:
-                rows = await table.query_selector_all('tr')
-                table_data = []
-                for row in rows:
-                    cells = await row.query_selector_all('td, th')
-                    row_data = []
-                    for cell in cells:
-                        text = await cell.text_content()
-                        row_data.append(text.strip() if text else '')
-                    if row_data:
-                        table_data.append(row_data)
-                if table_data:
-                    content['tables'].append(table_data)
-            
-            # Tạo full text từ tất cả nội dung
-            full_text = []
-            for section in content['headings']:
-                full_text.append(f"\n## {section['text']}\n")
-            for para in content['paragraphs']:
-                full_text.append(para)
-            
-            content['full_text'] = '\n\n'.join(full_text)
+            # 1 lần page.evaluate lấy headings, paragraphs, lists, tables của main content
+            payload = await self.page.evaluate(FULL_CONTENT_JS, '#module-unit-content')
+            content = build_full_content(payload)
             
         except Exception as e:
             print(f"      ⚠️ Lỗi extract content: {e}")
@@ -294,26 +246,8 @@ class MicrosoftLearnCrawler:
         code_blocks = []
         
         try:
-            # Tìm code blocks
-            code_elements = await self.page.query_selector_all('pre code, .code-block, pre')
-            
-            for code_elem in code_elements:
-                # Lấy language
-                lang = ''
-                class_attr = await code_elem.get_attribute('class')
-                if class_attr:
-                    # Extract language from class like "language-python"
-                    for cls in class_attr.split():
-                        if 'language-' in cls:
-                            lang = cls.replace('language-', '')
-                            break
-                
-                code_text = await code_elem.text_content()
-                if code_text and len(code_text.strip()) > 10:
-                    code_blocks.append({
-                        'language': lang or 'unknown',
-                        'code': code_text.strip()
-                    })
+            payload = await self.page.evaluate(CODE_BLOCKS_JS)
+            code_blocks = build_code_blocks(payload)
         
         except Exception as e:
             print(f"      ⚠️ Lỗi extract code blocks: {e}")
@@ -325,20 +259,8 @@ class MicrosoftLearnCrawler:
         images = []
         
         try:
-            img_elements = await self.page.query_selector_all('img')
-            
-            for img in img_elements:
-                src = await img.get_attribute('src')
-                alt = await img.get_attribute('alt') or ''
-                title = await img.get_attribute('title') or ''
-                
-                if src and not src.startswith('data:'):  # Bỏ qua base64 images
-                    full_src = src if src.startswith('http') else f"{self.base_url}{src}"
-                    images.append({
-                        'url': full_src.replace('../../', '/en-us/training/'),
-                        'alt': alt,
-                        'title': title
-                    })
+            payload = await self.page.evaluate(IMAGES_JS)
+            images = build_images(payload, self.base_url)
         
         except Exception as e:
             print(f"      ⚠️ Lỗi extract images: {e}")
@@ -432,7 +354,7 @@ class MicrosoftLearnCrawler:
 
         try:
             # Đợi quiz load
-            await asyncio.sleep(2)
+            await wait_until_ready(self.page, 'quiz')
 
             # Click Start/Begin quiz nếu có
             start_buttons = await self.page.query_selector_all(
@@ -441,7 +363,7 @@ class MicrosoftLearnCrawler:
             if start_buttons:
                 try:
                     await start_buttons[0].click()
-                    await asyncio.sleep(3)
+                    await wait_until_ready(self.page, 'quiz_questions')
                 except:
                     pass
 
@@ -491,7 +413,7 @@ class MicrosoftLearnCrawler:
                     "button[data-bi-name='module-unit-module-assessment-submit']"
                 )
                 await submit_btn.click()
-                await asyncio.sleep(1)
+                await wait_until_ready(self.page, 'quiz_result', timeout=5000)
 
                 # Đọc score tổng
                 score_elem = await self.page.query_selector("#module-assessment-result-score")
@@ -502,7 +424,7 @@ class MicrosoftLearnCrawler:
                 if score < 100:
                     # Reload page nếu chưa 100%
                     await self.page.reload()
-                    await asyncio.sleep(2)
+                    await wait_until_ready(self.page, 'quiz_questions')
                     # Lấy lại element + input
                     question_containers = await self.page.query_selector_all("div.quiz-question")
                     for i, q_elem in enumerate(question_containers):
@@ -661,9 +583,18 @@ class MicrosoftLearnCrawler:
         
         return exercise
         
-    async def crawl(self, max_modules: int = None):
-        """Hàm main để crawl toàn bộ course"""
-        await self.init_browser(headless=False)
+    async def crawl(self, max_modules: int = None, resume_from: str = None):
+        """
+        Hàm main để crawl toàn bộ course.
+        resume_from: journal/JSON của lần crawl trước, bỏ qua modules đã crawl xong
+        """
+        done_modules = {}
+        same_journal = bool(resume_from) and os.path.abspath(resume_from) == os.path.abspath(self.journal_path)
+        if resume_from:
+            done_modules, _ = load_completed(resume_from)
+            print(f"♻️  Resume từ {resume_from}: {len(done_modules)} modules đã xong")
+        
+        await self.init_browser()  # Headless hay không theo self.launch_profile
         
         try:
             # 1. Lấy danh sách modules
@@ -684,8 +615,22 @@ class MicrosoftLearnCrawler:
                 modules = modules[:max_modules]
                 print(f"⚠️ Chỉ crawl {max_modules} modules đầu tiên")
                 
+            # Journal checkpoint (append-only), compact bằng checkpoint_store.py nếu crawl bị dừng giữa chừng
+            # Resume thì ghi tiếp vào journal cũ
+            self.journal = CheckpointJournal(self.journal_path)
+            self.journal.open({k: v for k, v in self.data.items() if k != 'modules'},
+                              append=bool(resume_from))
+                
             # 2. Crawl từng module
             for idx, module in enumerate(modules, 1):
+                if module['url'] in done_modules:
+                    self.data['modules'].append(done_modules[module['url']])
+                    # Module lấy từ journal khác thì ghi lại để journal này compact được đầy đủ
+                    if not same_journal:
+                        self.journal.append_module(done_modules[module['url']], idx)
+                    print(f"\n♻️  Bỏ qua module đã crawl: {module['title']}")
+                    continue
+                
                 print(f"\n{'=' * 60}")
                 print(f"📚 MODULE {idx}/{len(modules)}")
                 print(f"{'=' * 60}")
@@ -693,10 +638,9 @@ class MicrosoftLearnCrawler:
                 module = await self.crawl_module_content(module)
                 self.data['modules'].append(module)
                 
-                # Lưu checkpoint sau mỗi module
-                # self.save_data(f"checkpoint_module_{idx}.json")
+                # Checkpoint sau mỗi module (1 dòng JSONL)
+                self.journal.append_module(module, idx)
                 
-                await asyncio.sleep(2)  # Delay giữa các modules
                 
             print("\n" + "=" * 60)
             print("🎉 HOÀN THÀNH CRAWL!")
@@ -708,6 +652,8 @@ class MicrosoftLearnCrawler:
             traceback.print_exc()
             
         finally:
+            if self.journal:
+                self.journal.close()
             await self.close_browser()
             
     def save_data(self, filename: str = "course_data.json"):
@@ -754,11 +700,20 @@ async def main():
     # course_url = "https://learn.microsoft.com/en-us/training/modules/mitigate-incidents-microsoft-365-defender/5-manage-investigate-alerts?ns-enrollment-type=learningpath&ns-enrollment-id=learn.wwl.sc-200-mitigate-threats-using-microsoft-365-defender"
 
     
-    crawler = MicrosoftLearnCrawler(course_url)
+    parser = argparse.ArgumentParser(description="Crawl Microsoft Learn course")
+    parser.add_argument('--resume', nargs='?', const=os.path.join("output", "crawl_journal.jsonl"),
+                        metavar='PATH', help="Tiếp tục từ journal/JSON của lần crawl trước")
+    parser.add_argument('--max-modules', type=int, default=None, help="Giới hạn số modules (để test)")
+    parser.add_argument('--profile', choices=list(LAUNCH_PROFILES), default=DEFAULT_LAUNCH_PROFILE,
+                        help="Launch profile của Chromium (headed = mở cửa sổ để debug)")
+    args = parser.parse_args()
+    
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=args.profile)
 
     # Crawl course
     await crawler.crawl(
-        # max_modules='None'  # Bỏ hoặc set None để crawl tất cả modules
+        max_modules=args.max_modules,  # None để crawl tất cả modules
+        resume_from=args.resume
     )
     
     # Lưu kết quả cuối cùng
@@ -3,39 +3,85 @@ Microsoft Learn Course Crawler
 Crawl toàn bộ course content từ Microsoft Learn
 """
 
+import argparse
 import asyncio
 import itertools
 import json
 import re
 from playwright.async_api import async_playwright, Page
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import os
 
+from page_pool import PagePool
+from page_readiness import goto_ready, reload_ready, wait_until_ready
+from rate_limiter import AdaptiveRateLimiter
+from request_blocking import RequestBlocker
+from launch_profiles import LAUNCH_PROFILES, DEFAULT_LAUNCH_PROFILE, get_launch_profile, launch_options, context_options
+from checkpoint_store import CheckpointJournal, load_completed
+from module_cache import ModuleCache, DEFAULT_CACHE_PATH, DEFAULT_TTL_HOURS, page_module_version
+from url_frontier import CrawlFrontier
+from auth_helper import AuthSession, SESSION_FILE
+from dom_extract import (
+    FULL_CONTENT_JS, CODE_BLOCKS_JS, IMAGES_JS,
+    empty_full_content, build_full_content, build_code_blocks, build_images
+)
+
 
 class MicrosoftLearnCrawler:
-    def __init__(self, course_url: str):
+    def __init__(self, course_url: str, blocked_resource_types: List[str] = None,
+                 blocked_url_patterns: List[str] = None, launch_profile: str = DEFAULT_LAUNCH_PROFILE,
+                 module_cache: str = None, cache_ttl_hours: float = DEFAULT_TTL_HOURS, concurrency: int = 4,
+                 auth: AuthSession = None):
         self.course_url = course_url
         self.base_url = "https://learn.microsoft.com"
+        self.frontier = CrawlFrontier.for_course(course_url)  # Chuẩn hoá URL (locale, /, tracking params)
+        self.concurrency = max(1, concurrency)  # Số learning paths load song song
+        # Mọi navigation đi qua limiter: tự tăng tốc khi server nhanh, giảm khi bị 429/5xx/chậm
+        self.rate_limiter = AdaptiveRateLimiter(max_concurrency=self.concurrency)
+        self.page_pool = None
+        # Chặn resource không cần cho DOM (None = dùng danh sách mặc định, rỗng = không chặn)
+        self.request_blocker = RequestBlocker(blocked_resource_types, blocked_url_patterns)
+        self.launch_profile = launch_profile  # Xem launch_profiles.LAUNCH_PROFILES
+        self.auth = auth  # Dùng lại session đăng nhập (storage state / user-data dir), None = không đăng nhập
+        # Checkpoint JSONL: mỗi module xong ghi thêm 1 dòng
+        self.journal_path = os.path.join("output", "crawl_journal.jsonl")
+        self.journal = None
+        # Module cache (tuỳ chọn): module đã crawl ở path/course khác trong TTL thì dùng lại
+        self.module_cache = ModuleCache(module_cache, cache_ttl_hours) if module_cache else None
         self.data = {
             "course_url": course_url,
             "crawled_at": datetime.now().isoformat(),
             "learning_paths": []
         }
         
-    async def init_browser(self, headless: bool = False):
-        """Khởi tạo browser với Playwright"""
+    async def init_browser(self, headless: bool = None):
+        """Khởi tạo browser với Playwright theo launch profile (headless ghi đè profile nếu truyền vào)"""
+        profile = get_launch_profile(self.launch_profile, headless=headless)
         self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(headless=headless)
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        )
+        if self.auth:
+            # Context mang sẵn session đã lưu, chỉ đăng nhập lại khi session hết hạn
+            self.browser, self.context = await self.auth.launch(self.playwright, profile)
+            await self.auth.ensure(self.context)
+        else:
+            self.browser = await self.playwright.chromium.launch(**launch_options(profile))
+            self.context = await self.browser.new_context(**context_options(profile))
+        await self.request_blocker.install(self.context)  # Chặn images/fonts/media/telemetry
         self.page = await self.context.new_page()
+        # Pages riêng để load learning paths song song với việc crawl modules trên self.page
+        self.page_pool = PagePool(self.context, size=self.concurrency)
+        await self.page_pool.open()
         
     async def close_browser(self):
         """Đóng browser"""
-        await self.browser.close()
+        if self.request_blocker.blocked:
+            print(f"🚫 Đã chặn {self.request_blocker.blocked} requests (images/fonts/media/telemetry)")
+        if self.page_pool:
+            await self.page_pool.close()
+        if self.browser:
+            await self.browser.close()
+        else:
+            await self.context.close()  # Persistent context (user-data dir)
         await self.playwright.stop()
         
     async def wait_for_load(self, timeout: int = 10000):
@@ -45,75 +91,70 @@ class MicrosoftLearnCrawler:
         except:
             await self.page.wait_for_load_state('domcontentloaded', timeout=timeout)
             
-    async def get_course_modules(self) -> List[Dict[str, Any]]:
-        """Lấy danh sách modules từ course page - CRAWL TẤT CẢ LEARNING PATHS"""
+    async def get_path_urls(self) -> List[Tuple[str, str]]:
+        """Mở course page, trả về [(path_url, path_title)] đã chuẩn hoá theo thứ tự trên trang"""
         print(f"🔍 Đang truy cập course: {self.course_url}")
-        await self.page.goto(self.course_url, wait_until='domcontentloaded')
-        await self.wait_for_load()
-        
-        # Đợi content load
-        await asyncio.sleep(2)
-        
-        # Tìm tất cả learning paths
-        learning_paths = []
+        await goto_ready(self.page, self.course_url, 'course', limiter=self.rate_limiter)
         
         print("\n🔄 Đang tìm learning paths...")
+        paths = {}
         try:
             path_links = await self.page.query_selector_all('a[href*="/training/paths/"]')
             print(f"   📋 Found {len(path_links)} learning path links")
             
             # Lấy tất cả URLs của paths trước để tránh stale element
-            path_urls = []
-            path_titles = []
             for link in path_links:
                 href = await link.get_attribute('href')
                 title = await link.text_content() or ""
                 if href:
-                    path_url = href if href.startswith('http') else f"{self.base_url}{href}"
-                    if path_url not in path_urls:  # Tránh duplicate
-                        path_urls.append(path_url)
-                        path_titles.append(title.strip())
-            
-            print(f"   ✓ Unique paths to crawl: {len(path_urls)}")
-            
-            # Crawl từng learning path
-            for i, (path_url, path_title) in enumerate(zip(path_urls, path_titles), 1):
-                print(f"\n{'='*70}")
-                print(f"📚 [{i}/{len(path_urls)}] Đang crawl learning path: {path_title}")
-                print(f"    URL: {path_url}")
-                print(f"{'='*70}")
-                
-                try:
-                    # Lấy modules từ path này
-                    path_modules = await self.get_modules_from_path(path_url, path_title)
-                    
-                    # Tạo learning path object với modules bên trong
-                    learning_path = {
-                        "title": path_title,
-                        "url": path_url,
-                        "module_count": len(path_modules),
-                        "crawled_at": datetime.now().isoformat(),
-                        "modules": path_modules  # Modules nằm trong path
-                    }
-                    
-                    learning_paths.append(learning_path)
-                    
-                    print(f"\n  ✓ Hoàn thành path {i}/{len(path_urls)}")
-                    print(f"  ✓ Found {len(path_modules)} modules in this path")
-                    
-                    # Delay giữa các paths
-                    if i < len(path_urls):
-                        await asyncio.sleep(2)
-                        
-                except Exception as e:
-                    print(f"  ⚠️ Lỗi khi crawl path {path_url}: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    continue
-                    
+                    path_url = self.frontier.canonical(href, self.course_url)
+                    paths.setdefault(path_url, title.strip())  # Tránh duplicate (kể cả khác query string)
+            
+            print(f"   ✓ Unique paths to crawl: {len(paths)}")
+            
         except Exception as e:
             print(f"⚠️ Lỗi khi lấy learning paths: {e}")
         
+        return list(paths.items())
+    
+    async def discover_path(self, i: int, total: int, path_url: str, path_title: str) -> Optional[Dict[str, Any]]:
+        """Load 1 learning path trên 1 page của pool, None nếu lỗi"""
+        try:
+            async with self.page_pool.page() as page:
+                path_modules = await self.get_modules_from_path(path_url, path_title, page)
+        except Exception as e:
+            print(f"  ⚠️ Lỗi khi crawl path {path_url}: {e}")
+            return None
+        
+        # In cả path 1 lần vì các paths load song song
+        print(f"\n📚 [{i}/{total}] Learning path: {path_title} ({len(path_modules)} modules)")
+        print(f"    URL: {path_url}")
+        for module in path_modules:
+            print(f"      + {module['title']}")
+        
+        return {
+            "title": path_title,
+            "url": path_url,
+            "module_count": len(path_modules),
+            "crawled_at": datetime.now().isoformat(),
+            "modules": path_modules  # Modules nằm trong path
+        }
+    
+    async def discover_learning_paths(self) -> List[asyncio.Task]:
+        """
+        Load song song mọi learning path của course trên page pool.
+        Trả về tasks theo thứ tự path trên course page: await task đầu tiên là crawl modules
+        được ngay trong khi các paths sau vẫn đang load (task trả về None nếu path lỗi).
+        """
+        paths = await self.get_path_urls()
+        return [asyncio.create_task(self.discover_path(i, len(paths), path_url, path_title))
+                for i, (path_url, path_title) in enumerate(paths, 1)]
+    
+    async def get_course_modules(self) -> List[Dict[str, Any]]:
+        """Lấy danh sách modules từ course page - CRAWL TẤT CẢ LEARNING PATHS"""
+        tasks = await self.discover_learning_paths()
+        learning_paths = [path for path in await asyncio.gather(*tasks) if path is not None]
+        
         # Lưu learning paths vào data
         self.data["learning_paths"] = learning_paths
         
@@ -137,23 +178,20 @@ class MicrosoftLearnCrawler:
             return ""
         return ""
      
-    async def get_modules_from_path(self, path_url: str, path_title: str) -> List[Dict[str, Any]]:
-        """Lấy modules từ learning path"""
-        await self.page.goto(path_url, wait_until='domcontentloaded')
-        await self.wait_for_load()
-        await asyncio.sleep(2)
+    async def get_modules_from_path(self, path_url: str, path_title: str, page: Page = None) -> List[Dict[str, Any]]:
+        """Lấy modules từ learning path (page: page của pool, mặc định self.page)"""
+        page = page or self.page
+        await goto_ready(page, path_url, 'path', limiter=self.rate_limiter)
         
         modules = []
-        module_links = await self.page.query_selector_all('a[href*="/training/modules/"]')
-        
-        print(f"    🔍 Found {len(module_links)} module links in this path")
+        module_links = await page.query_selector_all('a[href*="/training/modules/"]')
         
         seen_urls = set()
         for link in module_links:
             href = await link.get_attribute('href')
-            if href and href not in seen_urls:
-                full_url = href if href.startswith('http') else f"{self.base_url}{href}"
-                seen_urls.add(href)
+            full_url = self.frontier.canonical(href, path_url) if href else None
+            if full_url and full_url not in seen_urls:
+                seen_urls.add(full_url)
                 
                 title = await link.text_content() or ""
                 title = title.strip()
@@ -169,7 +207,6 @@ class MicrosoftLearnCrawler:
                         'type': self.detect_module_type(title),
                         'content': {}
                     })
-                    print(f"      + {title}")
                     
         return modules
     
@@ -192,9 +229,7 @@ class MicrosoftLearnCrawler:
         print(f"\n📖 Đang crawl module: {module['title']}")
         
         try:
-            await self.page.goto(module['url'], wait_until='domcontentloaded')
-            await self.wait_for_load()
-            await asyncio.sleep(2)
+            await goto_ready(self.page, module['url'], 'module', limiter=self.rate_limiter)
 
             module["module_group"] = await self.get_module_group_title()
 
@@ -215,6 +250,10 @@ class MicrosoftLearnCrawler:
             except:
                 module['duration'] = ""
             
+            version = await page_module_version(self.page)
+            if version:
+                module['updated_at'] = version  # Version nội dung cho module cache
+            
             # Lấy nội dung chi tiết của module
             module['content']['full_content'] = await self.extract_full_content()
             
@@ -239,6 +278,7 @@ class MicrosoftLearnCrawler:
             
         except Exception as e:
             print(f"  ❌ Lỗi: {e}")
+            module['error'] = str(e)  # Đánh dấu để --resume crawl lại module này
             import traceback
             traceback.print_exc()
             
@@ -246,74 +286,12 @@ class MicrosoftLearnCrawler:
         
     async def extract_full_content(self) -> Dict[str, Any]:
         """Trích xuất toàn bộ nội dung bài học"""
-        content = {
-            'sections': [],
-            'headings': [],
-            'paragraphs': [],
-            'lists': [],
-            'tables': []
-        }
+        content = empty_full_content()
         
         try:
-            # Lấy main content area
-            main_content = await self.page.query_selector('//*[@id="module-unit-content"]')
-            if not main_content:
-                return content
-            
-            # Lấy tất cả headings
-            headings = await main_content.query_selector_all('h1, h2, h3, h4, h5, h6')
-            for h in headings:
-                tag = await h.evaluate('el => el.tagName.toLowerCase()')
-                text = await h.text_content()
-                if text and text.strip():
-                    content['headings'].append({
-                        'level': tag,
-                        'text': text.strip()
-                    })
-            
-            # Lấy tất cả paragraphs
-            paragraphs = await main_content.query_selector_all('p')
-            for p in paragraphs:
-                text = await p.text_content()
-                if text and len(text.strip()) > 20:  # Bỏ qua đoạn quá ngắn
-                    content['paragraphs'].append(text.strip())
-            
-            # Lấy lists (ul, ol)
-            lists = await main_content.query_selector_all('ul, ol')
-            for lst in lists:
-                items = await lst.query_selector_all('li')
-                list_items = []
-                for item in items:
-                    text = await item.text_content()
-                    if text:
-                        list_items.append(text.strip())
-                if list_items:
-                    content['lists'].append(list_items)
-            
-            # Lấy tables
-            tables = await main_content.query_selector_all('table')
-            for table in tables:
-                rows = await table.query_selector_all('tr')
-                table_data = []
-                for row in rows:
-                    cells = await row.query_selector_all('td, th')
-                    row_data = []
-                    for cell in cells:
-                        text = await cell.text_content()
-                        row_data.append(text.strip() if text else '')
-                    if row_data:
-                        table_data.append(row_data)
-                if table_data:
-                    content['tables'].append(table_data)
-            
-            # Tạo full text từ tất cả nội dung
-            full_text = []
-            for section in content['headings']:
-                full_text.append(f"\n## {section['text']}\n")
-            for para in content['paragraphs']:
-                full_text.append(para)
-            
-            content['full_text'] = '\n\n'.join(full_text)
+            # 1 lần page.evaluate lấy headings, paragraphs, lists, tables của main content
+            payload = await self.page.evaluate(FULL_CONTENT_JS, '#module-unit-content')
+            content = build_full_content(payload)
             
         except Exception as e:
             print(f"      ⚠️ Lỗi extract content: {e}")
@@ -325,26 +303,8 @@ class MicrosoftLearnCrawler:
         code_blocks = []
         
         try:
-            # Tìm code blocks
-            code_elements = await self.page.query_selector_all('pre code, .code-block, pre')
-            
-            for code_elem in code_elements:
-                # Lấy language
-                lang = ''
-                class_attr = await code_elem.get_attribute('class')
-                if class_attr:
-                    # Extract language from class like "language-python"
-                    for cls in class_attr.split():
-                        if 'language-' in cls:
-                            lang = cls.replace('language-', '')
-                            break
-                
-                code_text = await code_elem.text_content()
-                if code_text and len(code_text.strip()) > 10:
-                    code_blocks.append({
-                        'language': lang or 'unknown',
-                        'code': code_text.strip()
-                    })
+            payload = await self.page.evaluate(CODE_BLOCKS_JS)
+            code_blocks = build_code_blocks(payload)
         
         except Exception as e:
             print(f"      ⚠️ Lỗi extract code blocks: {e}")
@@ -356,20 +316,8 @@ class MicrosoftLearnCrawler:
         images = []
         
         try:
-            img_elements = await self.page.query_selector_all('img')
-            
-            for img in img_elements:
-                src = await img.get_attribute('src')
-                alt = await img.get_attribute('alt') or ''
-                title = await img.get_attribute('title') or ''
-                
-                if src and not src.startswith('data:'):  # Bỏ qua base64 images
-                    full_src = src if src.startswith('http') else f"{self.base_url}{src}"
-                    images.append({
-                        'url': full_src.replace('../../', '/en-us/training/'),
-                        'alt': alt,
-                        'title': title
-                    })
+            payload = await self.page.evaluate(IMAGES_JS)
+            images = build_images(payload, self.base_url)
         
         except Exception as e:
             print(f"      ⚠️ Lỗi extract images: {e}")
@@ -463,7 +411,7 @@ class MicrosoftLearnCrawler:
 
         try:
             # Đợi quiz load
-            await asyncio.sleep(2)
+            await wait_until_ready(self.page, 'quiz')
 
             # Click Start/Begin quiz nếu có
             start_buttons = await self.page.query_selector_all(
@@ -472,7 +420,7 @@ class MicrosoftLearnCrawler:
             if start_buttons:
                 try:
                     await start_buttons[0].click()
-                    await asyncio.sleep(3)
+                    await wait_until_ready(self.page, 'quiz_questions')
                 except:
                     pass
 
@@ -521,8 +469,10 @@ class MicrosoftLearnCrawler:
                 submit_btn = await self.page.query_selector(
                     "button[data-bi-name='module-unit-module-assessment-submit']"
                 )
-                await submit_btn.click()
-                await asyncio.sleep(1)
+                # Submit gửi đáp án lên server -> cũng lấy slot của rate limiter
+                async with self.rate_limiter.request():
+                    await submit_btn.click()
+                await wait_until_ready(self.page, 'quiz_result', timeout=5000)
 
                 # Đọc score tổng
                 score_elem = await self.page.query_selector("#module-assessment-result-score")
@@ -531,9 +481,8 @@ class MicrosoftLearnCrawler:
                 print(f"➡ Tried combo {combo}, score: {score}%")
 
                 if score < 100:
-                    # Reload page nếu chưa 100%
-                    await self.page.reload()
-                    await asyncio.sleep(2)
+                    # Reload page nếu chưa 100% (qua rate limiter như mọi navigation khác)
+                    await reload_ready(self.page, 'quiz_questions', limiter=self.rate_limiter)
                     # Lấy lại element + input
                     question_containers = await self.page.query_selector_all("div.quiz-question")
                     for i, q_elem in enumerate(question_containers):
@@ -659,39 +608,65 @@ class MicrosoftLearnCrawler:
         
         return exercise
         
-    async def crawl(self, max_modules: int = None):
-        """Hàm main để crawl toàn bộ course"""
-        await self.init_browser(headless=False)
+    async def crawl(self, max_modules: int = None, resume_from: str = None):
+        """
+        Hàm main để crawl toàn bộ course.
+        resume_from: journal/JSON của lần crawl trước, bỏ qua modules đã crawl xong
+        """
+        done_modules = {}
+        same_journal = bool(resume_from) and os.path.abspath(resume_from) == os.path.abspath(self.journal_path)
+        if resume_from:
+            done_modules, _ = load_completed(resume_from)
+            done_modules = {self.frontier.canonical(url): m for url, m in done_modules.items()}
+            print(f"♻️  Resume từ {resume_from}: {len(done_modules)} modules đã xong")
+        
+        await self.init_browser()  # Headless hay không theo self.launch_profile
+        path_tasks = []
         
         try:
-            # 1. Lấy danh sách learning paths với modules
+            # 1. Load learning paths song song, path nào có danh sách modules trước thì crawl trước
             print("=" * 60)
             print("🚀 BẮT ĐẦU CRAWL MICROSOFT LEARN COURSE")
             print("=" * 60)
             
-            learning_paths = await self.get_course_modules()
+            path_tasks = await self.discover_learning_paths()
             
-            if not learning_paths:
+            if not path_tasks:
                 print("❌ Không tìm thấy learning paths nào!")
                 return
             
-            total_modules = sum(len(path["modules"]) for path in learning_paths)
-            print(f"\n✅ Tìm thấy {len(learning_paths)} learning paths với tổng {total_modules} modules")
+            # Journal checkpoint (append-only), compact bằng checkpoint_store.py nếu crawl bị dừng giữa chừng
+            # Resume từ chính journal này thì ghi tiếp, resume từ JSON/journal khác thì bắt đầu journal mới
+            self.journal = CheckpointJournal(self.journal_path)
+            self.journal.open({k: v for k, v in self.data.items() if k != 'learning_paths'},
+                              append=same_journal)
+            if self.module_cache:
+                self.module_cache.open()
             
-            # 2. Crawl từng learning path và modules của nó
+            # 2. Crawl modules của từng learning path (theo thứ tự trên course page)
+            learning_paths = self.data["learning_paths"]
             module_counter = 0
-            for path_idx, learning_path in enumerate(learning_paths, 1):
+            crawled = {}  # URL chuẩn hoá -> module đã crawl, module xuất hiện ở nhiều paths chỉ crawl 1 lần
+            for task in path_tasks:
+                learning_path = await task
+                if learning_path is None:
+                    continue
+                learning_paths.append(learning_path)
+                path_idx = len(learning_paths)
+                self.journal.append('path', {k: v for k, v in learning_path.items() if k != 'modules'},
+                                    path_idx=path_idx)
+                
+                # Giới hạn số modules nếu cần (để test), path vẫn được giữ trong output
+                if max_modules and module_counter >= max_modules:
+                    print(f"⚠️ Đã đạt giới hạn {max_modules} modules, bỏ qua path: {learning_path['title']}")
+                    continue
+                
                 print(f"\n{'=' * 70}")
-                print(f"📚 LEARNING PATH {path_idx}/{len(learning_paths)}: {learning_path['title']}")
+                print(f"📚 LEARNING PATH {path_idx}/{len(path_tasks)}: {learning_path['title']}")
                 print(f"{'=' * 70}")
                 
                 modules = learning_path['modules']
                 
-                # Giới hạn số modules nếu cần (để test)
-                if max_modules and module_counter >= max_modules:
-                    print(f"⚠️ Đã đạt giới hạn {max_modules} modules")
-                    break
-                
                 # Crawl từng module trong path này
                 for idx, module in enumerate(modules, 1):
                     module_counter += 1
@@ -699,17 +674,35 @@ class MicrosoftLearnCrawler:
                     if max_modules and module_counter > max_modules:
                         break
                     
+                    if module['url'] in done_modules:
+                        modules[idx - 1] = done_modules[module['url']]
+                        # Module lấy từ journal khác thì ghi lại để journal này compact được đầy đủ
+                        if not same_journal:
+                            self.journal.append_module(modules[idx - 1], idx, path_idx=path_idx)
+                        print(f"\n♻️  Bỏ qua module đã crawl: {module['title']}")
+                        continue
+                    
                     print(f"\n{'=' * 60}")
-                    print(f"📖 MODULE {idx}/{len(modules)} (Tổng: {module_counter}/{total_modules})")
+                    print(f"📖 MODULE {idx}/{len(modules)} (Tổng: {module_counter})")
                     print(f"{'=' * 60}")
                     
-                    module = await self.crawl_module_content(module)
+                    key = self.frontier.canonical(module['url'])
+                    cached = crawled.get(key)
+                    if cached is None and self.module_cache:
+                        cached = self.module_cache.get(module['url'], kind='page')
+                    if cached is not None:
+                        modules[idx - 1] = module = cached if key in crawled else {**cached, 'title': module['title']}
+                        print(f"  🗃️  Dùng lại module đã crawl: {module['title']}")
+                    else:
+                        module = await self.crawl_module_content(module)
+                        if self.module_cache and 'error' not in module:
+                            self.module_cache.put(module, kind='page')
+                    if 'error' not in module:
+                        crawled[key] = module
                     
-                    # Lưu checkpoint sau mỗi 5 modules
-                    if module_counter % 5 == 0:
-                        self.save_data(f"checkpoint_module_{module_counter}.json")
+                    # Checkpoint sau mỗi module (1 dòng JSONL)
+                    self.journal.append_module(module, idx, path_idx=path_idx)
                     
-                    await asyncio.sleep(2)  # Delay giữa các modules
                 
                 print(f"\n✅ Hoàn thành learning path: {learning_path['title']}")
                 
@@ -719,6 +712,10 @@ class MicrosoftLearnCrawler:
             print(f"\n📊 Thống kê:")
             print(f"  - Số learning paths: {len(learning_paths)}")
             print(f"  - Tổng modules đã crawl: {module_counter}")
+            print(f"  - Rate limiter: {self.rate_limiter.current_rate:.2f} req/s, "
+                  f"{self.rate_limiter.throttled} lần bị throttle")
+            if self.module_cache:
+                self.module_cache.print_stats()
             
         except Exception as e:
             print(f"\n❌ Lỗi nghiêm trọng: {e}")
@@ -726,6 +723,13 @@ class MicrosoftLearnCrawler:
             traceback.print_exc()
             
         finally:
+            for task in path_tasks:
+                task.cancel()  # Paths chưa load xong khi dừng sớm
+            await asyncio.gather(*path_tasks, return_exceptions=True)
+            if self.journal:
+                self.journal.close()
+            if self.module_cache:
+                self.module_cache.close()
             await self.close_browser()
             
     def save_data(self, filename: str = "course_data.json"):
@@ -789,14 +793,35 @@ class MicrosoftLearnCrawler:
 
 
 async def main():
+    parser = argparse.ArgumentParser(description="Crawl Microsoft Learn course (tất cả learning paths)")
+    parser.add_argument('--resume', nargs='?', const=os.path.join("output", "crawl_journal.jsonl"),
+                        metavar='PATH', help="Tiếp tục từ journal/JSON của lần crawl trước")
+    parser.add_argument('--max-modules', type=int, default=None, help="Giới hạn số modules (để test)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Số learning paths load song song")
+    parser.add_argument('--profile', choices=list(LAUNCH_PROFILES), default=DEFAULT_LAUNCH_PROFILE,
+                        help="Launch profile của Chromium (headed = mở cửa sổ để debug)")
+    parser.add_argument('--module-cache', nargs='?', const=DEFAULT_CACHE_PATH, metavar='PATH',
+                        help="Dùng lại modules đã crawl ở path/course khác (SQLite cache)")
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL_HOURS, metavar='HOURS',
+                        help="Thời gian module trong cache được dùng lại")
+    parser.add_argument('--auth', nargs='?', const=SESSION_FILE, metavar='PATH',
+                        help="Dùng lại session đã lưu (auth_helper.py), hết hạn thì đăng nhập lại bằng MS_EMAIL/MS_PASSWORD")
+    parser.add_argument('--user-data-dir', metavar='DIR',
+                        help="Chromium profile cố định: giữ session đăng nhập giữa các lần chạy")
+    args = parser.parse_args()
+    auth = AuthSession(args.auth, args.user_data_dir) if args.auth or args.user_data_dir else None
+    
     # URL course cần crawl
     course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
     
-    crawler = MicrosoftLearnCrawler(course_url)
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=args.profile,
+                                    module_cache=args.module_cache, cache_ttl_hours=args.cache_ttl,
+                                    concurrency=args.concurrency, auth=auth)
 
     # Crawl course - Sẽ tự động crawl TẤT CẢ learning paths
     await crawler.crawl(
-        # max_modules=2  # Bỏ hoặc set None để crawl tất cả modules
+        max_modules=args.max_modules,  # None để crawl tất cả modules
+        resume_from=args.resume
     )
     
     # Lưu kết quả cuối cùng
@@ -0,0 +1,75 @@
+"""
+Page Pool
+Quản lý nhiều Playwright page dùng chung 1 browser context để crawl song song
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Iterable, List
+
+from playwright.async_api import BrowserContext, Page
+
+
+class PagePool:
+    """Pool gồm N pages, mỗi worker mượn 1 page rồi trả lại sau khi dùng xong"""
+
+    def __init__(self, context: BrowserContext, size: int = 4):
+        self.context = context
+        self.size = max(1, size)
+        self.pages: List[Page] = []
+        self._idle: asyncio.Queue = asyncio.Queue()
+
+    async def open(self):
+        """Mở sẵn N pages"""
+        for _ in range(self.size):
+            page = await self.context.new_page()
+            self.pages.append(page)
+            self._idle.put_nowait(page)
+
+    async def close(self):
+        """Đóng tất cả pages trong pool"""
+        for page in self.pages:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        self.pages = []
+
+    @asynccontextmanager
+    async def page(self):
+        """Mượn 1 page: `async with pool.page() as page: ...`"""
+        page = await self._idle.get()
+        try:
+            yield page
+        finally:
+            self._idle.put_nowait(page)
+
+
+async def run_work_queue(jobs: Iterable[Any],
+                         handler: Callable[[Any, asyncio.Queue], Awaitable[None]],
+                         workers: int = 4):
+    """
+    Chạy jobs qua asyncio.Queue với N workers.
+    handler(job, queue) có thể put thêm job mới vào queue (vd: module -> units).
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    async def worker():
+        while True:
+            job = await queue.get()
+            try:
+                await handler(job, queue)
+            except Exception as e:
+                print(f"      ❌ Lỗi worker: {e}")
+            finally:
+                queue.task_done()
+
+    tasks = [asyncio.create_task(worker()) for _ in range(max(1, workers))]
+    try:
+        await queue.join()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
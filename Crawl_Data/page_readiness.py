@@ -0,0 +1,103 @@
+"""
+Page Readiness
+Đợi trang sẵn sàng dựa trên selector mà extractor cần, thay cho asyncio.sleep cố định
+"""
+
+import asyncio
+from typing import Dict, List
+
+from playwright.async_api import Page
+
+from crawl_metrics import span
+from rate_limiter import AdaptiveRateLimiter
+
+
+# Selector cần có trên từng loại trang trước khi extract.
+# Trang coi là sẵn sàng khi BẤT KỲ selector nào trong profile xuất hiện.
+READINESS_PROFILES: Dict[str, List[str]] = {
+    'course': [
+        'a[href*="/training/paths/"]',
+        'a[href*="/training/modules/"]',
+    ],
+    'path': [
+        'a[href*="/training/modules/"]',
+    ],
+    'module': [
+        'a.unit-title',
+        '#module-unit-content',
+    ],
+    'unit': [
+        '#module-unit-content',
+        'article',
+        'main',
+    ],
+    'quiz': [
+        'div.quiz-question',
+    ],
+    # Câu hỏi đã render xong kèm các lựa chọn (sau khi bấm Start / reload để làm lại)
+    'quiz_questions': [
+        'div.quiz-question label.quiz-choice',
+        'label.quiz-choice',
+    ],
+    'quiz_result': [
+        '#module-assessment-result-score',
+    ],
+}
+
+
+async def wait_until_ready(page: Page, profile: str, timeout: int = 10000,
+                           fallback_delay: float = 1.0) -> bool:
+    """
+    Đợi tới khi selector của profile xuất hiện trong DOM.
+    Hết timeout thì fallback: đợi networkidle ngắn rồi sleep fallback_delay.
+    Trả về True nếu selector đã xuất hiện.
+    """
+    selectors = READINESS_PROFILES.get(profile)
+    if not selectors:
+        raise ValueError(f"Unknown readiness profile: {profile}")
+
+    try:
+        with span(f'wait:{profile}'):
+            await page.wait_for_load_state('domcontentloaded', timeout=timeout)
+            await page.wait_for_selector(', '.join(selectors), state='attached', timeout=timeout)
+        return True
+    except Exception:
+        print(f"      ⏳ Trang chưa sẵn sàng ({profile}) sau {timeout}ms, dùng fallback")
+
+    with span(f'wait_fallback:{profile}'):
+        try:
+            await page.wait_for_load_state('networkidle', timeout=timeout // 2)
+        except Exception:
+            pass
+        await asyncio.sleep(fallback_delay)
+    return False
+
+
+async def goto_ready(page: Page, url: str, profile: str, timeout: int = 10000,
+                     limiter: AdaptiveRateLimiter = None) -> bool:
+    """Điều hướng tới url rồi đợi trang sẵn sàng theo profile, qua rate limiter nếu có"""
+    if limiter is None:
+        with span('goto'):
+            await page.goto(url, wait_until='domcontentloaded')
+    else:
+        async with limiter.request() as ticket:
+            with span('goto'):
+                response = await page.goto(url, wait_until='domcontentloaded')
+            if response:
+                ticket.set_response(response.status, response.headers.get('retry-after'))
+    return await wait_until_ready(page, profile, timeout=timeout)
+
+
+async def reload_ready(page: Page, profile: str, timeout: int = 10000,
+                       limiter: AdaptiveRateLimiter = None) -> bool:
+    """Reload trang hiện tại rồi đợi sẵn sàng theo profile, qua rate limiter nếu có (giống goto_ready)"""
+    if limiter is None:
+        with span('reload'):
+            await page.reload(wait_until='domcontentloaded')
+    else:
+        async with limiter.request() as ticket:
+            with span('reload'):
+                response = await page.reload(wait_until='domcontentloaded')
+            if response:
+                ticket.set_response(response.status, response.headers.get('retry-after'))
+    return await wait_until_ready(page, profile, timeout=timeout)
@@ -0,0 +1,98 @@
+"""
+Crawl Pipeline
+Pipeline asyncio gồm nhiều stage nối nhau bằng queue có giới hạn:
+
+    discover -> fetch -> extract -> write -> assets
+
+Mỗi stage có N workers riêng. Queue đầy thì stage trước đợi (backpressure), nên số item
+đang nằm giữa các stage (vd. HTML chờ parse) không vượt quá tổng maxsize của các queue:
+extract unit N chạy song song với fetch unit N+1 và ghi unit N-1, RAM không tăng theo course.
+
+    stages = [Stage('fetch', fetch, workers=4), Stage('extract', extract, workers=2), ...]
+    await run_pipeline(jobs, stages)
+
+handler(item, emit): xử lý item, `await emit(x)` để đẩy x sang stage sau (0, 1 hay nhiều lần).
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+
+Emit = Callable[[Any], Awaitable[None]]
+
+
+class Stage:
+    """1 stage của pipeline: queue vào (tối đa maxsize item) + N workers"""
+
+    def __init__(self, name: str, handler: Callable[[Any, Emit], Awaitable[None]],
+                 workers: int = 1, maxsize: int = None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.maxsize = maxsize or 2 * self.workers  # Mặc định mỗi worker có sẵn 1 item chờ
+        self.queue: asyncio.Queue = asyncio.Queue(self.maxsize)
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0.0        # Tổng thời gian workers xử lý item (gồm cả lúc đợi emit)
+        self.peak_depth = 0    # Số item chờ nhiều nhất trong queue
+
+    async def put(self, item: Any):
+        await self.queue.put(item)
+        self.peak_depth = max(self.peak_depth, self.queue.qsize())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'maxsize': self.maxsize,
+            'processed': self.processed,
+            'errors': self.errors,
+            'busy': round(self.busy, 3),
+            'peak_depth': self.peak_depth,
+        }
+
+
+async def _drop(item: Any):
+    """emit của stage cuối"""
+
+
+async def run_pipeline(items: Iterable[Any], stages: List[Stage]):
+    """Đưa items vào stage đầu, đợi đến khi mọi stage xử lý xong"""
+
+    async def worker(stage: Stage, emit: Emit):
+        while True:
+            item = await stage.queue.get()
+            start = time.perf_counter()
+            try:
+                await stage.handler(item, emit)
+                stage.processed += 1
+            except Exception as e:
+                stage.errors += 1
+                print(f"      ❌ Lỗi stage {stage.name}: {e}")
+            finally:
+                stage.busy += time.perf_counter() - start
+                stage.queue.task_done()
+
+    tasks = []
+    for i, stage in enumerate(stages):
+        emit = stages[i + 1].put if i + 1 < len(stages) else _drop
+        tasks += [asyncio.create_task(worker(stage, emit)) for _ in range(stage.workers)]
+    try:
+        for item in items:
+            await stages[0].put(item)
+        # Stage i đã xong thì không còn item nào đi vào stage i+1 nữa
+        for stage in stages:
+            await stage.queue.join()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def print_pipeline_stats(stages: List[Stage]):
+    print(f"\n🧵 Pipeline:")
+    print(f"  {'stage':<12}{'workers':>8}{'queue':>7}{'peak':>6}{'items':>7}{'errors':>7}{'busy s':>9}")
+    for stage in stages:
+        s = stage.stats()
+        print(f"  {stage.name:<12}{s['workers']:>8}{s['maxsize']:>7}{s['peak_depth']:>6}"
+              f"{s['processed']:>7}{s['errors']:>7}{s['busy']:>9.2f}")
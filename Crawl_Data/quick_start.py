@@ -6,6 +6,7 @@ Quick Start Script - Chạy crawler với các cấu hình đơn giản
 import asyncio
 import sys
 from crawler import MicrosoftLearnCrawler
+from launch_profiles import LAUNCH_PROFILES, DEFAULT_LAUNCH_PROFILE
 
 
 def print_banner():
@@ -17,14 +18,14 @@ def print_banner():
 """)
 
 
-async def run_full_crawl():
+async def run_full_crawl(profile: str = DEFAULT_LAUNCH_PROFILE):
     """Crawl TOÀN BỘ course (tất cả modules và units)"""
     print_banner()
     print("🔥 MODE: FULL CRAWL - Crawl tất cả modules và units")
     print("⏱️  Thời gian dự kiến: 1-2 giờ\n")
     
     course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
-    crawler = MicrosoftLearnCrawler(course_url)
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=profile)
     
     await crawler.crawl(
         max_modules=None,      # Crawl TẤT CẢ modules
@@ -35,14 +36,14 @@ async def run_full_crawl():
     print("\n✅ Hoàn thành! Kiểm tra folder output/")
 
 
-async def run_quick_test():
+async def run_quick_test(profile: str = DEFAULT_LAUNCH_PROFILE):
     """Crawl nhanh 5 modules đầu tiên (để test)"""
     print_banner()
     print("⚡ MODE: QUICK TEST - Crawl 5 modules đầu")
     print("⏱️  Thời gian dự kiến: 5-10 phút\n")
     
     course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
-    crawler = MicrosoftLearnCrawler(course_url)
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=profile)
     
     await crawler.crawl(
         max_modules=5,         # Chỉ 5 modules
@@ -53,14 +54,14 @@ async def run_quick_test():
     print("\n✅ Test hoàn thành! Kiểm tra folder output/")
 
 
-async def run_modules_only():
+async def run_modules_only(profile: str = DEFAULT_LAUNCH_PROFILE):
     """Chỉ crawl danh sách modules, không crawl chi tiết units"""
     print_banner()
     print("📋 MODE: MODULES ONLY - Chỉ lấy danh sách modules")
     print("⏱️  Thời gian dự kiến: 1-2 phút\n")
     
     course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
-    crawler = MicrosoftLearnCrawler(course_url)
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=profile)
     
     await crawler.crawl(
         max_modules=None,
@@ -71,7 +72,7 @@ async def run_modules_only():
     print("\n✅ Hoàn thành! Kiểm tra folder output/")
 
 
-async def run_custom():
+async def run_custom(profile: str = DEFAULT_LAUNCH_PROFILE):
     """Tùy chỉnh số lượng modules"""
     print_banner()
     print("🎯 MODE: CUSTOM CRAWL\n")
@@ -87,7 +88,7 @@ async def run_custom():
     max_modules = None if num_modules == 0 else num_modules
     
     course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
-    crawler = MicrosoftLearnCrawler(course_url)
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=profile)
     
     await crawler.crawl(
         max_modules=max_modules,
@@ -99,6 +100,37 @@ async def run_custom():
     print(f"\n✅ Hoàn thành! Kiểm tra output/{filename}")
 
 
+async def run_resume(profile: str = DEFAULT_LAUNCH_PROFILE):
+    """Tiếp tục full crawl bị dừng giữa chừng từ output/crawl_journal.jsonl"""
+    print_banner()
+    print("♻️  MODE: RESUME - Bỏ qua modules đã crawl xong\n")
+    
+    course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=profile)
+    
+    await crawler.crawl(
+        max_modules=None,
+        crawl_units=True,      # Crawl chi tiết units
+        resume_from=crawler.journal_path
+    )
+    
+    crawler.save_data("sc200_full_complete.json")
+    print("\n✅ Hoàn thành! Kiểm tra output/sc200_full_complete.json")
+
+
+def choose_launch_profile() -> str:
+    """Chọn launch profile của Chromium, Enter = mặc định (headless)"""
+    names = list(LAUNCH_PROFILES)
+    print("\nLaunch profile:")
+    for idx, name in enumerate(names, 1):
+        default = " (mặc định)" if name == DEFAULT_LAUNCH_PROFILE else ""
+        print(f"  {idx}. {name}{default}")
+    choice = input("Chọn profile [Enter = mặc định]: ").strip()
+    if choice.isdigit() and 1 <= int(choice) <= len(names):
+        return names[int(choice) - 1]
+    return DEFAULT_LAUNCH_PROFILE
+
+
 def main():
     print_banner()
     print("Chọn chế độ crawl:")
@@ -106,22 +138,26 @@ def main():
     print("  2️⃣  Modules Only (danh sách modules) - Rất nhanh")
     print("  3️⃣  Full Crawl (tất cả modules + units) - Đầy đủ nhất")
     print("  4️⃣  Custom (tùy chỉnh số modules)")
+    print("  5️⃣  Resume (tiếp tục lần crawl bị dừng)")
     print("  0️⃣  Thoát\n")
     
     choice = input("Lựa chọn của bạn: ").strip()
+    profile = choose_launch_profile() if choice not in ("0", "") else DEFAULT_LAUNCH_PROFILE
     
     if choice == "1":
-        asyncio.run(run_quick_test())
+        asyncio.run(run_quick_test(profile))
     elif choice == "2":
-        asyncio.run(run_modules_only())
+        asyncio.run(run_modules_only(profile))
     elif choice == "3":
         confirm = input("⚠️  Full crawl có thể mất 1-2 giờ. Tiếp tục? (y/n): ")
         if confirm.lower() == 'y':
-            asyncio.run(run_full_crawl())
+            asyncio.run(run_full_crawl(profile))
         else:
             print("❌ Đã hủy")
     elif choice == "4":
-        asyncio.run(run_custom())
+        asyncio.run(run_custom(profile))
+    elif choice == "5":
+        asyncio.run(run_resume(profile))
     elif choice == "0":
         print("👋 Tạm biệt!")
     else:
@@ -133,5 +169,7 @@ if __name__ == "__main__":
         main()
     except KeyboardInterrupt:
         print("\n\n⚠️  Đã dừng bởi người dùng")
-        print("💡 Các checkpoint đã được lưu trong folder output/")
+        print("💡 Các checkpoint đã được lưu trong output/crawl_journal.jsonl")
+        print("   Tiếp tục: chọn 5️⃣  Resume, hoặc python crawler.py --resume")
+        print("   Compact: python checkpoint_store.py output/crawl_journal.jsonl")
         sys.exit(0)
@@ -6,6 +6,7 @@ Quick Start Script - Chạy crawler với các cấu hình đơn giản
 import asyncio
 import sys
 from ms_learn_crawler_fixed import MicrosoftLearnCrawler
+from launch_profiles import LAUNCH_PROFILES, DEFAULT_LAUNCH_PROFILE
 
 
 def print_banner():
@@ -17,14 +18,14 @@ def print_banner():
 """)
 
 
-async def run_full_crawl():
+async def run_full_crawl(profile: str = DEFAULT_LAUNCH_PROFILE):
     """Crawl TOÀN BỘ course (tất cả modules)"""
     print_banner()
     print("🔥 MODE: FULL CRAWL - Crawl tất cả modules")
     print("⏱️  Thời gian dự kiến: 30-60 phút\n")
     
     course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
-    crawler = MicrosoftLearnCrawler(course_url)
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=profile)
     
     await crawler.crawl(
         max_modules=None      # Crawl TẤT CẢ modules
@@ -41,14 +42,14 @@ async def run_full_crawl():
     print("   - Markdown: output/sc200_full_complete.md")
 
 
-async def run_quick_test():
+async def run_quick_test(profile: str = DEFAULT_LAUNCH_PROFILE):
     """Crawl nhanh 3 modules đầu tiên (để test)"""
     print_banner()
     print("⚡ MODE: QUICK TEST - Crawl 3 modules đầu")
     print("⏱️  Thời gian dự kiến: 3-5 phút\n")
     
     course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
-    crawler = MicrosoftLearnCrawler(course_url)
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=profile)
     
     await crawler.crawl(
         max_modules=3         # Chỉ 3 modules
@@ -65,14 +66,14 @@ async def run_quick_test():
     print("   - Markdown: output/sc200_test_3modules.md")
 
 
-async def run_single_module():
+async def run_single_module(profile: str = DEFAULT_LAUNCH_PROFILE):
     """Crawl chỉ 1 module để test nhanh"""
     print_banner()
     print("🎯 MODE: SINGLE MODULE - Crawl 1 module")
     print("⏱️  Thời gian dự kiến: 1-2 phút\n")
     
     course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
-    crawler = MicrosoftLearnCrawler(course_url)
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=profile)
     
     await crawler.crawl(
         max_modules=1         # Chỉ 1 module
@@ -89,7 +90,7 @@ async def run_single_module():
     print("   - Markdown: output/sc200_single_module.md")
 
 
-async def run_custom():
+async def run_custom(profile: str = DEFAULT_LAUNCH_PROFILE):
     """Tùy chỉnh số lượng modules"""
     print_banner()
     print("🎯 MODE: CUSTOM CRAWL\n")
@@ -110,7 +111,7 @@ async def run_custom():
         convert_md = 'y'
     
     course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
-    crawler = MicrosoftLearnCrawler(course_url)
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=profile)
     
     await crawler.crawl(
         max_modules=max_modules
@@ -128,7 +129,7 @@ async def run_custom():
     print(f"\n✅ Hoàn thành! Kiểm tra output/{filename_base}.json")
 
 
-async def run_url_custom():
+async def run_url_custom(profile: str = DEFAULT_LAUNCH_PROFILE):
     """Crawl từ URL tùy chỉnh"""
     print_banner()
     print("🌐 MODE: CUSTOM URL\n")
@@ -150,7 +151,7 @@ async def run_url_custom():
     
     max_modules = None if num_modules == 0 else num_modules
     
-    crawler = MicrosoftLearnCrawler(custom_url)
+    crawler = MicrosoftLearnCrawler(custom_url, launch_profile=profile)
     
     await crawler.crawl(max_modules=max_modules)
     
@@ -171,6 +172,36 @@ async def run_url_custom():
     # print(f"   - Markdown: output/{filename_base}.md")
 
 
+async def run_resume(profile: str = DEFAULT_LAUNCH_PROFILE):
+    """Tiếp tục full crawl bị dừng giữa chừng từ output/crawl_journal.jsonl"""
+    print_banner()
+    print("♻️  MODE: RESUME - Bỏ qua modules đã crawl xong\n")
+    
+    course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=profile)
+    
+    await crawler.crawl(
+        max_modules=None,
+        resume_from=crawler.journal_path
+    )
+    
+    crawler.save_data("sc200_full_complete.json")
+    print("\n✅ Hoàn thành! Kiểm tra output/sc200_full_complete.json")
+
+
+def choose_launch_profile() -> str:
+    """Chọn launch profile của Chromium, Enter = mặc định (headless)"""
+    names = list(LAUNCH_PROFILES)
+    print("\nLaunch profile:")
+    for idx, name in enumerate(names, 1):
+        default = " (mặc định)" if name == DEFAULT_LAUNCH_PROFILE else ""
+        print(f"  {idx}. {name}{default}")
+    choice = input("Chọn profile [Enter = mặc định]: ").strip()
+    if choice.isdigit() and 1 <= int(choice) <= len(names):
+        return names[int(choice) - 1]
+    return DEFAULT_LAUNCH_PROFILE
+
+
 def main():
     print_banner()
     print("Chọn chế độ crawl:")
@@ -179,24 +210,28 @@ def main():
     print("  3️⃣  Full Crawl (tất cả modules) - Đầy đủ nhất")
     print("  4️⃣  Custom (tùy chỉnh số modules)")
     print("  5️⃣  Custom URL (crawl course khác)")
+    print("  6️⃣  Resume (tiếp tục lần crawl bị dừng)")
     print("  0️⃣  Thoát\n")
     
     choice = input("Lựa chọn của bạn: ").strip()
+    profile = choose_launch_profile() if choice not in ("0", "") else DEFAULT_LAUNCH_PROFILE
     
     if choice == "1":
-        asyncio.run(run_quick_test())
+        asyncio.run(run_quick_test(profile))
     elif choice == "2":
-        asyncio.run(run_single_module())
+        asyncio.run(run_single_module(profile))
     elif choice == "3":
         confirm = input("⚠️  Full crawl có thể mất 30-60 phút. Tiếp tục? (y/n): ")
         if confirm.lower() == 'y':
-            asyncio.run(run_full_crawl())
+            asyncio.run(run_full_crawl(profile))
         else:
             print("❌ Đã hủy")
     elif choice == "4":
-        asyncio.run(run_custom())
+        asyncio.run(run_custom(profile))
     elif choice == "5":
-        asyncio.run(run_url_custom())
+        asyncio.run(run_url_custom(profile))
+    elif choice == "6":
+        asyncio.run(run_resume(profile))
     elif choice == "0":
         print("👋 Tạm biệt!")
     else:
@@ -208,5 +243,7 @@ if __name__ == "__main__":
         main()
     except KeyboardInterrupt:
         print("\n\n⚠️  Đã dừng bởi người dùng")
-        print("💡 Các checkpoint đã được lưu trong folder output/")
+        print("💡 Các checkpoint đã được lưu trong output/crawl_journal.jsonl")
+        print("   Tiếp tục: chọn 6️⃣  Resume, hoặc python ms_learn_crawler_fixed.py --resume")
+        print("   Compact: python checkpoint_store.py output/crawl_journal.jsonl")
         sys.exit(0)
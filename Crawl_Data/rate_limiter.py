@@ -0,0 +1,185 @@
+"""
+Adaptive Rate Limiter
+Token bucket + AIMD cho mọi request tới learn.microsoft.com:
+- Tăng dần rate/concurrency khi server trả lời nhanh
+- Giảm một nửa khi gặp 429/5xx, lỗi mạng/timeout hoặc response chậm
+- Tôn trọng header Retry-After
+- SharedRateLimit: giới hạn chung cho nhiều process (batch_crawl.py)
+"""
+
+import asyncio
+import multiprocessing
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from crawl_metrics import span
+
+
+class RequestTicket:
+    """Kết quả của 1 request, caller gán status/retry_after sau khi có response"""
+
+    def __init__(self):
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+    def set_response(self, status: Optional[int], retry_after: Optional[str] = None):
+        self.status = status
+        if retry_after:
+            try:
+                self.retry_after = float(retry_after)
+            except ValueError:
+                pass  # Dạng HTTP-date: bỏ qua, dùng backoff mặc định
+
+
+class SharedRateLimit:
+    """
+    Trần request/giây chung cho mọi process (shared memory). Mỗi request lấy 1 slot
+    trong lịch chung: slot kế tiếp cách slot trước 1/rate giây.
+    Truyền vào worker process qua initializer của ProcessPoolExecutor.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = max(rate, 0.01)
+        self._next = multiprocessing.Value('d', 0.0)  # time.time() của slot kế tiếp
+
+    async def acquire(self):
+        with self._next.get_lock():
+            now = time.time()
+            slot = max(now, self._next.value)
+            self._next.value = slot + 1.0 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def pause(self, seconds: float):
+        """Retry-After từ 1 process: mọi process cùng dừng"""
+        with self._next.get_lock():
+            self._next.value = max(self._next.value, time.time() + seconds)
+
+
+class AdaptiveRateLimiter:
+    """
+    Mọi navigation đi qua `async with limiter.request() as ticket`.
+    rate: số request/giây (token bucket), concurrency: số request đang chạy tối đa.
+    shared: SharedRateLimit dùng chung với các process khác (None = chỉ giới hạn trong process này).
+    """
+
+    def __init__(self, rate: float = 2.0, min_rate: float = 0.2, max_rate: float = 10.0,
+                 max_concurrency: int = 4, increase: float = 0.1, decrease: float = 0.5,
+                 slow_threshold: float = 5.0, backoff_cooldown: float = 1.0,
+                 shared: Optional[SharedRateLimit] = None):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency = max(1, self.max_concurrency // 2)
+        self.increase = increase            # Cộng thêm vào rate mỗi request thành công
+        self.decrease = decrease            # Nhân rate/concurrency khi bị throttle
+        self.slow_threshold = slow_threshold  # Giây, response chậm hơn coi như server quá tải
+        self.backoff_cooldown = backoff_cooldown  # Nhiều lỗi cùng lúc chỉ giảm 1 lần
+        self.shared = shared
+
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._last_backoff = 0.0
+        self._paused_until = 0.0
+        self._successes = 0
+        self._token_lock = asyncio.Lock()
+        self._slots = asyncio.Condition()
+
+    @property
+    def current_rate(self) -> float:
+        return self.rate
+
+    def stats(self) -> Dict[str, Any]:
+        """Trạng thái hiện tại để monitoring"""
+        return {
+            'rate': round(self.rate, 2),
+            'concurrency': self.concurrency,
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'throttled': self.throttled,
+        }
+
+    @asynccontextmanager
+    async def request(self):
+        """Đợi slot + token, yield ticket, sau đó cập nhật rate theo kết quả"""
+        with span('rate_limit_wait'):
+            await self._enter()
+            await self._take_token()
+            if self.shared:
+                await self.shared.acquire()
+        ticket = RequestTicket()
+        start = time.monotonic()
+        failed = cancelled = False
+        try:
+            yield ticket
+        except asyncio.CancelledError:
+            cancelled = True  # Worker bị huỷ, không phải lỗi từ server
+            raise
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if not cancelled:
+                self._record(ticket, time.monotonic() - start, failed)
+            await self._exit()
+
+    async def _enter(self):
+        async with self._slots:
+            await self._slots.wait_for(lambda: self.in_flight < self.concurrency)
+            self.in_flight += 1
+
+    async def _exit(self):
+        async with self._slots:
+            self.in_flight -= 1
+            self._slots.notify_all()
+
+    async def _take_token(self):
+        # Giữ lock khi đợi để các request lấy token theo thứ tự
+        async with self._token_lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(1.0, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    def _record(self, ticket: RequestTicket, latency: float, failed: bool):
+        self.requests += 1
+        status = ticket.status
+        if failed or status == 429 or (status is not None and status >= 500):
+            self._backoff(f"HTTP {status}" if status else "lỗi/timeout", ticket.retry_after)
+        elif latency > self.slow_threshold:
+            self._backoff(f"response chậm {latency:.1f}s")
+        else:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            # Tăng concurrency thêm 1 sau mỗi "vòng" request thành công
+            self._successes += 1
+            if self._successes >= self.concurrency:
+                self._successes = 0
+                # Slot mới được báo khi request này _exit()
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+
+    def _backoff(self, reason: str, retry_after: Optional[float] = None):
+        self.throttled += 1
+        now = time.monotonic()
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+            if self.shared:
+                self.shared.pause(retry_after)
+        if now - self._last_backoff < self.backoff_cooldown:
+            return
+        self._last_backoff = now
+        self._successes = 0
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.concurrency = max(1, int(self.concurrency * self.decrease))
+        print(f"      🚦 Giảm tốc ({reason}): {self.rate:.2f} req/s, concurrency {self.concurrency}")
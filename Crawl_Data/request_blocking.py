@@ -0,0 +1,60 @@
+"""
+Request Blocking
+Chặn images, fonts, media và telemetry qua context.route - crawler chỉ cần DOM.
+Attribute src của <img>/<source>/<iframe> vẫn nằm trong DOM nên output extractors không đổi.
+"""
+
+import re
+from typing import Iterable, Optional
+
+from playwright.async_api import BrowserContext, Route
+
+
+# Loại resource không cần tải (theo request.resource_type của Playwright)
+DEFAULT_BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media'}
+
+# Analytics/telemetry beacons trên Learn (regex, match trên URL)
+DEFAULT_BLOCKED_URL_PATTERNS = [
+    r'js\.monitor\.azure\.com',
+    r'dc\.services\.visualstudio\.com',
+    r'browser\.events\.data\.microsoft\.com',
+    r'\.clarity\.ms',
+    r'\.demdex\.net',
+    r'(bat|c)\.bing\.com',
+    r'google-analytics\.com',
+    r'googletagmanager\.com',
+    r'doubleclick\.net',
+]
+
+
+class RequestBlocker:
+    """Route handler chặn request theo resource type và URL pattern"""
+
+    def __init__(self, resource_types: Optional[Iterable[str]] = None,
+                 url_patterns: Optional[Iterable[str]] = None):
+        self.resource_types = set(DEFAULT_BLOCKED_RESOURCE_TYPES if resource_types is None else resource_types)
+        patterns = DEFAULT_BLOCKED_URL_PATTERNS if url_patterns is None else list(url_patterns)
+        self.url_pattern = re.compile('|'.join(f'(?:{p})' for p in patterns)) if patterns else None
+        self.blocked = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.resource_types) or self.url_pattern is not None
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.resource_types:
+            return True
+        return self.url_pattern is not None and self.url_pattern.search(url) is not None
+
+    async def handle(self, route: Route):
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def install(self, context: BrowserContext):
+        """Gắn vào context, áp dụng cho mọi page mở từ context"""
+        if self.enabled:
+            await context.route('**/*', self.handle)
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+SQLite Crawl Store
+Lưu kết quả crawl vào SQLite thay vì giữ toàn bộ course trong self.data:
+mỗi unit xong được ghi trong 1 transaction, content tách thành các bảng
+content_blocks / videos / images / questions (có index theo unit_url, module_url).
+
+Export JSON/Markdown/CSV bằng query streaming, không load cả course vào RAM:
+    python sqlite_store.py output/crawl.db json output/sc200_course_full.json
+    python sqlite_store.py output/crawl.db markdown output/sc200_course.md
+    python sqlite_store.py output/crawl.db csv output/
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS learning_paths (
+    path_idx INTEGER PRIMARY KEY,
+    url TEXT,
+    title TEXT,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS modules (
+    path_idx INTEGER NOT NULL DEFAULT 0,
+    module_idx INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    duration TEXT,
+    error TEXT,
+    data TEXT,
+    PRIMARY KEY (path_idx, module_idx)
+);
+CREATE INDEX IF NOT EXISTS idx_modules_url ON modules(url);
+CREATE TABLE IF NOT EXISTS units (
+    url TEXT PRIMARY KEY,
+    module_url TEXT NOT NULL,
+    unit_idx INTEGER,
+    title TEXT,
+    type TEXT,
+    full_text TEXT,
+    error TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_units_module ON units(module_url, unit_idx);
+CREATE TABLE IF NOT EXISTS content_blocks (
+    unit_url TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    level TEXT,
+    text TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_blocks_unit ON content_blocks(unit_url, kind, seq);
+CREATE TABLE IF NOT EXISTS videos (
+    unit_url TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    type TEXT,
+    platform TEXT,
+    video_id TEXT,
+    url TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_videos_unit ON videos(unit_url, seq);
+CREATE TABLE IF NOT EXISTS images (
+    unit_url TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    url TEXT,
+    alt TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_images_unit ON images(unit_url, seq);
+CREATE TABLE IF NOT EXISTS questions (
+    unit_url TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    question_number INTEGER,
+    type TEXT,
+    question TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_questions_unit ON questions(unit_url, seq);
+"""
+
+# full_content.<key> -> kind trong content_blocks
+BLOCK_KINDS = {'headings': 'heading', 'paragraphs': 'paragraph', 'lists': 'list', 'tables': 'table'}
+# content.<key> -> bảng riêng
+ITEM_TABLES = ('code_blocks', 'videos', 'images', 'questions')
+UNIT_TABLES = ('content_blocks', 'videos', 'images', 'questions')
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+class CrawlStore:
+    """Ghi/đọc course trong 1 file SQLite"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+
+    def open(self, header: Dict[str, Any] = None, reset: bool = False):
+        """
+        Mở (tạo nếu chưa có) database, ghi header (course_url, crawled_at, ...) vào meta.
+        reset=True xoá dữ liệu của lần crawl trước (giống journal khi không resume).
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        if reset:
+            with self.conn:
+                for table in ('meta', 'learning_paths', 'modules', 'units') + UNIT_TABLES:
+                    self.conn.execute(f'DELETE FROM {table}')
+        if header:
+            self.write_meta(**header)
+        return self
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self if self.conn else self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ===== Ghi =====
+
+    def write_meta(self, **values):
+        """Ghi các key cấp course (course_url, crawled_at, recrawl_report, ...)"""
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                                  [(k, _dumps(v)) for k, v in values.items()])
+
+    def write_path(self, learning_path: Dict[str, Any], path_idx: int):
+        """Ghi learning path (không gồm modules)"""
+        data = {k: v for k, v in learning_path.items() if k not in ('url', 'title', 'modules')}
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO learning_paths (path_idx, url, title, data) VALUES (?, ?, ?, ?)',
+                              (path_idx, learning_path.get('url'), learning_path.get('title'), _dumps(data)))
+
+    def write_unit(self, unit: Dict[str, Any], module_url: str, unit_idx: int):
+        """Ghi 1 unit + content của nó trong 1 transaction (ghi đè nếu unit đã có)"""
+        with self.conn:
+            self._write_unit(unit, module_url, unit_idx)
+
+    def _write_unit(self, unit: Dict[str, Any], module_url: str, unit_idx: int):
+        url = unit['url']
+        content = dict(unit.get('content') or {})
+        full_content = dict(content.get('full_content') or {})
+
+        # Giữ thứ tự key để dựng lại đúng unit ban đầu
+        data = {k: v for k, v in unit.items() if k not in ('url', 'title', 'type', 'error', 'content')}
+        data['content_keys'] = list(content)
+        data['full_content_keys'] = list(full_content) if 'full_content' in content else None
+        data['content'] = {k: v for k, v in content.items() if k != 'full_content' and k not in ITEM_TABLES}
+        data['full_content'] = {k: v for k, v in full_content.items() if k != 'full_text' and k not in BLOCK_KINDS}
+
+        for table in UNIT_TABLES:
+            self.conn.execute(f'DELETE FROM {table} WHERE unit_url = ?', (url,))
+        self.conn.execute(
+            'INSERT OR REPLACE INTO units (url, module_url, unit_idx, title, type, full_text, error, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (url, module_url, unit_idx, unit.get('title'), unit.get('type'),
+             full_content.get('full_text'), unit.get('error'), _dumps(data))
+        )
+
+        blocks = []
+        for key, kind in BLOCK_KINDS.items():
+            for seq, item in enumerate(full_content.get(key) or []):
+                if kind == 'heading':
+                    blocks.append((url, seq, kind, item.get('level'), item.get('text'), _dumps(item)))
+                elif kind == 'paragraph':
+                    blocks.append((url, seq, kind, None, item, _dumps(item)))
+                else:
+                    blocks.append((url, seq, kind, None, None, _dumps(item)))
+        for seq, item in enumerate(content.get('code_blocks') or []):
+            blocks.append((url, seq, 'code', item.get('language'), item.get('code'), _dumps(item)))
+        self.conn.executemany('INSERT INTO content_blocks (unit_url, seq, kind, level, text, data) '
+                              'VALUES (?, ?, ?, ?, ?, ?)', blocks)
+
+        self.conn.executemany(
+            'INSERT INTO videos (unit_url, seq, type, platform, video_id, url, data) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(url, seq, v.get('type'), v.get('platform'), v.get('video_id'),
+              v.get('watch_url') or v.get('url') or v.get('embed_url'), _dumps(v))
+             for seq, v in enumerate(content.get('videos') or [])]
+        )
+        self.conn.executemany(
+            'INSERT INTO images (unit_url, seq, url, alt, data) VALUES (?, ?, ?, ?, ?)',
+            [(url, seq, i.get('url'), i.get('alt'), _dumps(i)) for seq, i in enumerate(content.get('images') or [])]
+        )
+        self.conn.executemany(
+            'INSERT INTO questions (unit_url, seq, question_number, type, question, data) VALUES (?, ?, ?, ?, ?, ?)',
+            [(url, seq, q.get('question_number'), q.get('type'), q.get('question'), _dumps(q))
+             for seq, q in enumerate(content.get('questions') or [])]
+        )
+
+    def write_module(self, module: Dict[str, Any], module_idx: int, path_idx: int = None,
+                     with_units: bool = True):
+        """
+        Ghi module. with_units=False khi units đã được ghi riêng bằng write_unit.
+        Units không còn trong module (incremental) bị xoá khỏi store.
+        """
+        units = module.get('units') or []
+        data = {k: v for k, v in module.items()
+                if k not in ('url', 'title', 'description', 'duration', 'error', 'units')}
+        data['has_units'] = 'units' in module
+        if units:
+            # Unit dùng chung giữa nhiều modules chỉ có 1 dòng trong units, module giữ danh sách URL
+            data['unit_urls'] = [u['url'] for u in units]
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO modules (path_idx, module_idx, url, title, description, duration, error, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (path_idx or 0, module_idx, module['url'], module.get('title'), module.get('description'),
+                 module.get('duration'), module.get('error'), _dumps(data))
+            )
+            if with_units:
+                for unit_idx, unit in enumerate(units, 1):
+                    self._write_unit(unit, module['url'], unit_idx)
+            if 'error' not in module:
+                current = [u['url'] for u in units]
+                stale = [row['url'] for row in self.conn.execute('SELECT url FROM units WHERE module_url = ?',
+                                                                 (module['url'],))
+                         if row['url'] not in current]
+                for url in stale:
+                    for table in UNIT_TABLES:
+                        self.conn.execute(f'DELETE FROM {table} WHERE unit_url = ?', (url,))
+                    self.conn.execute('DELETE FROM units WHERE url = ?', (url,))
+
+    # ===== Đọc (streaming) =====
+
+    def header(self) -> Dict[str, Any]:
+        return {row['key']: json.loads(row['value']) for row in self.conn.execute('SELECT key, value FROM meta')}
+
+    def _items(self, table: str, unit_url: str, where: str = '', params: tuple = ()) -> List[Any]:
+        rows = self.conn.execute(f'SELECT data FROM {table} WHERE unit_url = ? {where} ORDER BY seq',
+                                 (unit_url, *params))
+        return [json.loads(row['data']) for row in rows]
+
+    def _unit_from_row(self, row: sqlite3.Row) -> Dict[str, Any]:
+        data = json.loads(row['data'])
+        url = row['url']
+        unit = {'title': row['title'], 'url': url, 'type': row['type']}
+
+        full_content = None
+        if data.get('full_content_keys') is not None:
+            full_content = {}
+            for key in data['full_content_keys']:
+                if key == 'full_text':
+                    full_content[key] = row['full_text']
+                elif key in BLOCK_KINDS:
+                    full_content[key] = self._items('content_blocks', url, 'AND kind = ?', (BLOCK_KINDS[key],))
+                else:
+                    full_content[key] = data['full_content'].get(key)
+
+        content = {}
+        for key in data.get('content_keys', []):
+            if key == 'full_content':
+                content[key] = full_content
+            elif key == 'code_blocks':
+                content[key] = self._items('content_blocks', url, 'AND kind = ?', ('code',))
+            elif key in ITEM_TABLES:
+                content[key] = self._items(key, url)
+            else:
+                content[key] = data['content'].get(key)
+
+        for key, value in data.items():
+            if key not in ('content_keys', 'full_content_keys', 'content', 'full_content'):
+                unit[key] = value
+        unit['content'] = content
+        if row['error'] is not None:
+            unit['error'] = row['error']
+        return unit
+
+    def iter_units(self, module_url: str) -> Iterator[Dict[str, Any]]:
+        """Units của 1 module theo thứ tự (kể cả unit dùng chung với module khác), dựng lại giống dict của crawler"""
+        module = self.conn.execute('SELECT data FROM modules WHERE url = ? LIMIT 1', (module_url,)).fetchone()
+        unit_urls = json.loads(module['data']).get('unit_urls') if module else None
+        if unit_urls is None:
+            rows = self.conn.execute('SELECT * FROM units WHERE module_url = ? ORDER BY unit_idx', (module_url,))
+        else:
+            rows = (self.conn.execute('SELECT * FROM units WHERE url = ?', (url,)).fetchone() for url in unit_urls)
+        for row in rows:
+            if row is not None:
+                yield self._unit_from_row(row)
+
+    def iter_modules(self, path_idx: int = None) -> Iterator[Dict[str, Any]]:
+        """Modules (kèm units) lần lượt từng module, không load cả course"""
+        query, params = 'SELECT * FROM modules ORDER BY path_idx, module_idx', ()
+        if path_idx is not None:
+            query, params = 'SELECT * FROM modules WHERE path_idx = ? ORDER BY module_idx', (path_idx,)
+        for row in self.conn.execute(query, params).fetchall():
+            data = json.loads(row['data'])
+            module = {'title': row['title'], 'url': row['url']}
+            for key in ('description', 'duration'):
+                if row[key] is not None:
+                    module[key] = row[key]
+            has_units = data.pop('has_units', True)
+            data.pop('unit_urls', None)
+            module.update(data)
+            if has_units:
+                module['units'] = list(self.iter_units(row['url']))
+            if row['error'] is not None:
+                module['error'] = row['error']
+            yield module
+
+    def iter_paths(self) -> Iterator[Dict[str, Any]]:
+        for row in self.conn.execute('SELECT * FROM learning_paths ORDER BY path_idx').fetchall():
+            path = {'title': row['title'], 'url': row['url'], **json.loads(row['data'])}
+            path['_idx'] = row['path_idx']
+            yield path
+
+    def load_data(self) -> Dict[str, Any]:
+        """Dựng lại toàn bộ data (dùng cho --resume/--incremental từ file .db)"""
+        data = self.header()
+        paths = list(self.iter_paths())
+        if paths:
+            data['learning_paths'] = []
+            for path in paths:
+                path_idx = path.pop('_idx')
+                data['learning_paths'].append({**path, 'modules': list(self.iter_modules(path_idx))})
+        else:
+            data['modules'] = list(self.iter_modules())
+        return data
+
+    def summary(self) -> Dict[str, int]:
+        """Số modules/units/videos/questions bằng COUNT, không cần đọc content"""
+        count = lambda table: self.conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        return {
+            'total_modules': count('modules'),
+            'total_units': count('units'),
+            'total_videos': count('videos'),
+            'total_questions': count('questions'),
+        }
+
+
+# ===== Export =====
+
+def export_json(store: CrawlStore, output_path: str):
+    """Ghi JSON cùng cấu trúc với save_data, từng module một"""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    def write_modules(f, modules: Iterator[Dict[str, Any]], indent: str):
+        f.write('[')
+        for idx, module in enumerate(modules):
+            text = json.dumps(module, ensure_ascii=False, indent=2).replace('\n', '\n' + indent + '  ')
+            f.write((',' if idx else '') + '\n' + indent + '  ' + text)
+        f.write('\n' + indent + ']')
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('{')
+        for key, value in store.header().items():
+            f.write(f'\n  {_dumps(key)}: ' + json.dumps(value, ensure_ascii=False, indent=2).replace('\n', '\n  ') + ',')
+        paths = list(store.iter_paths())
+        if paths:
+            f.write('\n  "learning_paths": [')
+            for idx, path in enumerate(paths):
+                path_idx = path.pop('_idx')
+                head = json.dumps(path, ensure_ascii=False, indent=2)[:-2].replace('\n', '\n    ')
+                f.write((',' if idx else '') + '\n    ' + head + ',\n      "modules": ')
+                write_modules(f, store.iter_modules(path_idx), '      ')
+                f.write('\n    }')
+            f.write('\n  ]\n}\n')
+        else:
+            f.write('\n  "modules": ')
+            write_modules(f, store.iter_modules(), '  ')
+            f.write('\n}\n')
+    print(f"💾 Export JSON -> {output_path}")
+
+
+def _markdown_unit(unit: Dict[str, Any]) -> List[str]:
+    lines = [f"### {unit.get('title', '')}", "", f"🔗 {unit.get('url', '')}", ""]
+    content = unit.get('content') or {}
+    full_content = content.get('full_content') or {}
+    for heading in full_content.get('headings', []):
+        lines.append(f"- {heading.get('text', '')}")
+    if full_content.get('headings'):
+        lines.append("")
+    for para in full_content.get('paragraphs', []):
+        lines += [para, ""]
+    for items in full_content.get('lists', []):
+        lines += [f"- {item}" for item in items] + [""]
+    for rows in full_content.get('tables', []):
+        if rows:
+            lines.append("| " + " | ".join(rows[0]) + " |")
+            lines.append("|" + " --- |" * len(rows[0]))
+            lines += ["| " + " | ".join(row) + " |" for row in rows[1:]] + [""]
+    for block in content.get('code_blocks', []):
+        lines += [f"```{block.get('language', '')}", block.get('code', ''), "```", ""]
+    for video in content.get('videos', []):
+        lines.append(f"🎥 {video.get('watch_url') or video.get('url') or video.get('embed_url', '')}")
+    if content.get('videos'):
+        lines.append("")
+    for question in content.get('questions', []):
+        lines.append(f"**{question.get('question_number', '')}. {question.get('question', '')}**")
+        correct = set(question.get('correct_answers', []))
+        lines += [f"- [{'x' if option in correct else ' '}] {option}" for option in question.get('options', [])]
+        if question.get('explanation'):
+            lines.append(f"> {question['explanation']}")
+        lines.append("")
+    return lines
+
+
+def export_markdown(store: CrawlStore, output_path: str):
+    """Ghi 1 file Markdown: module -> units, từng module một"""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    header = store.header()
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(f"# {header.get('course_url', 'Course')}\n\n")
+        for module in store.iter_modules():
+            lines = [f"## {module.get('title', '')}", ""]
+            if module.get('description'):
+                lines += [module['description'], ""]
+            for unit in module.get('units', []):
+                lines += _markdown_unit(unit)
+            f.write('\n'.join(lines) + '\n')
+    print(f"💾 Export Markdown -> {output_path}")
+
+
+def export_csv(store: CrawlStore, output_dir: str, base_name: str = None):
+    """Các file CSV giống export_csv.py, đọc từng module một từ DB"""
+    from export_csv import export_modules
+    base_name = base_name or os.path.splitext(os.path.basename(store.path))[0]
+    export_modules(store.iter_modules(), output_dir, base_name)
+    print(f"✅ Export CSV -> {output_dir}/")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[2] not in ('json', 'markdown', 'csv'):
+        print("Usage: python sqlite_store.py <crawl.db> json|markdown|csv <output>")
+        sys.exit(1)
+    with CrawlStore(sys.argv[1]) as store:
+        {'json': export_json, 'markdown': export_markdown, 'csv': export_csv}[sys.argv[2]](store, sys.argv[3])
@@ -3,6 +3,7 @@ Microsoft Learn Course Crawler with Markdown Output
 Crawl course content và xuất ra định dạng Markdown
 """
 
+import argparse
 import asyncio
 import itertools
 import json
@@ -12,11 +13,25 @@ from typing import List, Dict, Any
 from datetime import datetime
 import os
 
+from page_readiness import goto_ready, wait_until_ready
+from rate_limiter import AdaptiveRateLimiter
+from request_blocking import RequestBlocker
+from launch_profiles import LAUNCH_PROFILES, DEFAULT_LAUNCH_PROFILE, get_launch_profile, launch_options, context_options
+from url_frontier import CrawlFrontier
+
 
 class MicrosoftLearnCrawler:
-    def __init__(self, course_url: str):
+    def __init__(self, course_url: str, blocked_resource_types: List[str] = None,
+                 blocked_url_patterns: List[str] = None, launch_profile: str = DEFAULT_LAUNCH_PROFILE):
         self.course_url = course_url
         self.base_url = "https://learn.microsoft.com"
+        # URL chuẩn hoá + module/unit nằm ở nhiều paths chỉ crawl 1 lần
+        self.frontier = CrawlFrontier.for_course(course_url)
+        # Mọi navigation đi qua limiter: tự tăng tốc khi server nhanh, giảm khi bị 429/5xx/chậm
+        self.rate_limiter = AdaptiveRateLimiter(max_concurrency=1)
+        # Chặn resource không cần cho DOM (None = dùng danh sách mặc định, rỗng = không chặn)
+        self.request_blocker = RequestBlocker(blocked_resource_types, blocked_url_patterns)
+        self.launch_profile = launch_profile  # Xem launch_profiles.LAUNCH_PROFILES
         self.data = {
             "course_url": course_url,
             "course_title": "",
@@ -25,18 +40,19 @@ class MicrosoftLearnCrawler:
             "learning_paths": []
         }
         
-    async def init_browser(self, headless: bool = False):
-        """Khởi tạo browser với Playwright"""
+    async def init_browser(self, headless: bool = None):
+        """Khởi tạo browser với Playwright theo launch profile (headless ghi đè profile nếu truyền vào)"""
+        profile = get_launch_profile(self.launch_profile, headless=headless)
         self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(headless=headless)
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        )
+        self.browser = await self.playwright.chromium.launch(**launch_options(profile))
+        self.context = await self.browser.new_context(**context_options(profile))
+        await self.request_blocker.install(self.context)  # Chặn images/fonts/media/telemetry
         self.page = await self.context.new_page()
         
     async def close_browser(self):
         """Đóng browser"""
+        if self.request_blocker.blocked:
+            print(f"🚫 Đã chặn {self.request_blocker.blocked} requests (images/fonts/media/telemetry)")
         await self.browser.close()
         await self.playwright.stop()
         
@@ -50,9 +66,7 @@ class MicrosoftLearnCrawler:
     async def get_course_info(self):
         """Lấy thông tin course"""
         print(f"📚 Đang lấy thông tin course...")
-        await self.page.goto(self.course_url, wait_until='domcontentloaded')
-        await self.wait_for_load()
-        await asyncio.sleep(2)
+        await goto_ready(self.page, self.course_url, 'course', limiter=self.rate_limiter)
         
         try:
             # Lấy course title
@@ -108,9 +122,7 @@ class MicrosoftLearnCrawler:
                     # Lấy path URL
                     path_link = await section.query_selector('a[href*="/training/paths/"]')
                     if path_link:
-                        path_url = await path_link.get_attribute('href')
-                        if not path_url.startswith('http'):
-                            path_url = f"{self.base_url}{path_url}"
+                        path_url = self.frontier.canonical(await path_link.get_attribute('href'), self.course_url)
                         
                         # Lấy modules từ path
                         modules = await self.get_modules_from_path(path_url, title)
@@ -143,9 +155,9 @@ class MicrosoftLearnCrawler:
         seen_urls = set()
         for link in module_links:
             href = await link.get_attribute('href')
-            if href and href not in seen_urls:
-                full_url = href if href.startswith('http') else f"{self.base_url}{href}"
-                seen_urls.add(href)
+            full_url = self.frontier.canonical(href, self.course_url) if href else None
+            if full_url and full_url not in seen_urls:
+                seen_urls.add(full_url)
                 
                 title = (await link.text_content()).strip()
                 if title:
@@ -165,29 +177,25 @@ class MicrosoftLearnCrawler:
         seen_urls = set()
         for link in module_links:
             href = await link.get_attribute('href')
-            if href and href not in seen_urls:
-                # Chỉ lấy base module URL (không có unit)
-                base_href = href.split('?')[0]
-                if base_href not in seen_urls:
-                    full_url = base_href if base_href.startswith('http') else f"{self.base_url}{base_href}"
-                    seen_urls.add(base_href)
-                    
-                    title = (await link.text_content()).strip()
-                    if title and '/training/modules/' in href:
-                        modules.append({
-                            'title': title,
-                            'url': full_url,
-                            'units': []
-                        })
+            # URL chuẩn hoá đã bỏ query string (ns-enrollment-*)
+            full_url = self.frontier.canonical(href, page_url) if href else None
+            if full_url and full_url not in seen_urls:
+                seen_urls.add(full_url)
+                
+                title = (await link.text_content()).strip()
+                if title and '/training/modules/' in href:
+                    modules.append({
+                        'title': title,
+                        'url': full_url,
+                        'units': []
+                    })
         
         return modules
             
     async def get_modules_from_path(self, path_url: str, path_title: str) -> List[Dict[str, Any]]:
         """Lấy modules từ learning path"""
         print(f"  📖 Đang crawl learning path: {path_title}")
-        await self.page.goto(path_url, wait_until='domcontentloaded')
-        await self.wait_for_load()
-        await asyncio.sleep(2)
+        await goto_ready(self.page, path_url, 'path', limiter=self.rate_limiter)
         
         return await self.get_modules_from_page(path_url)
     
@@ -195,10 +203,15 @@ class MicrosoftLearnCrawler:
         """Crawl một module và tất cả units của nó"""
         print(f"\n📦 Đang crawl module: {module['title']}")
         
+        waiting = self.frontier.claim(module['url'])
+        if waiting is not None:
+            # Module đã crawl ở learning path khác
+            module.update({k: v for k, v in (await waiting).items() if k != 'title'})
+            print(f"  🔗 Dùng lại module đã crawl")
+            return module
+        
         try:
-            await self.page.goto(module['url'], wait_until='domcontentloaded')
-            await self.wait_for_load()
-            await asyncio.sleep(2)
+            await goto_ready(self.page, module['url'], 'module', limiter=self.rate_limiter)
             
             # Lấy module description
             desc_elem = await self.page.query_selector('meta[name="description"]')
@@ -211,13 +224,21 @@ class MicrosoftLearnCrawler:
             # Crawl từng unit
             for idx, unit in enumerate(module['units'], 1):
                 print(f"  📄 Unit {idx}/{len(module['units'])}: {unit['title']}")
-                await self.crawl_unit(unit)
-                await asyncio.sleep(1)
+                waiting = self.frontier.claim(unit['url'])
+                if waiting is not None:
+                    unit['content'] = (await waiting).get('content', {})
+                    continue
+                try:
+                    await self.crawl_unit(unit)
+                finally:
+                    self.frontier.complete(unit['url'], unit)
             
             print(f"  ✅ Hoàn thành module")
             
         except Exception as e:
             print(f"  ❌ Lỗi crawl module: {e}")
+        finally:
+            self.frontier.complete(module['url'], module)
         
         return module
     
@@ -232,11 +253,11 @@ class MicrosoftLearnCrawler:
             seen_urls = set()
             for item in nav_items:
                 href = await item.get_attribute('href')
-                if href and '/training/modules/' in href and href not in seen_urls:
-                    seen_urls.add(href)
+                full_url = self.frontier.canonical(href, self.page.url) if href else None
+                if full_url and '/training/modules/' in href and full_url not in seen_urls:
+                    seen_urls.add(full_url)
                     
                     title = (await item.text_content()).strip()
-                    full_url = href if href.startswith('http') else f"{self.base_url}{href}"
                     
                     # Xác định loại unit
                     unit_type = self.detect_unit_type(title, href)
@@ -272,9 +293,7 @@ class MicrosoftLearnCrawler:
     async def crawl_unit(self, unit: Dict[str, Any]):
         """Crawl nội dung của một unit"""
         try:
-            await self.page.goto(unit['url'], wait_until='domcontentloaded')
-            await self.wait_for_load()
-            await asyncio.sleep(2)
+            await goto_ready(self.page, unit['url'], 'unit', limiter=self.rate_limiter)
             
             # Lấy nội dung chính
             unit['content'] = await self.extract_unit_content()
@@ -463,7 +482,7 @@ class MicrosoftLearnCrawler:
         correct_answers_found = []
 
         try:
-            await asyncio.sleep(2)
+            await wait_until_ready(self.page, 'quiz')
 
             # Click Start quiz nếu có
             start_buttons = await self.page.query_selector_all(
@@ -472,7 +491,7 @@ class MicrosoftLearnCrawler:
             if start_buttons:
                 try:
                     await start_buttons[0].click()
-                    await asyncio.sleep(3)
+                    await wait_until_ready(self.page, 'quiz_questions')
                 except:
                     pass
 
@@ -528,7 +547,7 @@ class MicrosoftLearnCrawler:
                 )
                 if submit_btn:
                     await submit_btn.click()
-                    await asyncio.sleep(1)
+                    await wait_until_ready(self.page, 'quiz_result', timeout=5000)
 
                 # Đọc score
                 score_elem = await self.page.query_selector("#module-assessment-result-score")
@@ -537,7 +556,7 @@ class MicrosoftLearnCrawler:
 
                 if score < 100:
                     await self.page.reload()
-                    await asyncio.sleep(2)
+                    await wait_until_ready(self.page, 'quiz_questions')
                     question_containers = await self.page.query_selector_all("div.quiz-question")
                     for i, q_elem in enumerate(question_containers):
                         questions_options[i]["element"] = q_elem
@@ -712,7 +731,7 @@ class MicrosoftLearnCrawler:
     
     async def crawl(self, max_paths: int = None, max_modules_per_path: int = None):
         """Hàm main để crawl toàn bộ course"""
-        await self.init_browser(headless=False)
+        await self.init_browser()  # Headless hay không theo self.launch_profile
         
         try:
             print("=" * 60)
@@ -749,7 +768,6 @@ class MicrosoftLearnCrawler:
                 for mod_idx, module in enumerate(modules, 1):
                     print(f"\n📦 Module {mod_idx}/{len(modules)}")
                     await self.crawl_module(module)
-                    await asyncio.sleep(2)
                 
                 self.data['learning_paths'].append(path)
             
@@ -813,6 +831,10 @@ async def main():
     """
     Main function để chạy crawler
     """
+    parser = argparse.ArgumentParser(description="Crawl Microsoft Learn course -> JSON + Markdown")
+    parser.add_argument('--profile', choices=list(LAUNCH_PROFILES), default=DEFAULT_LAUNCH_PROFILE,
+                        help="Launch profile của Chromium (headed = mở cửa sổ để debug)")
+    args = parser.parse_args()
     
     # URL course cần crawl
     course_url = "https://learn.microsoft.com/en-us/training/courses/sc-200t00"
@@ -823,7 +845,7 @@ async def main():
     # Hoặc crawl trực tiếp một module
     # course_url = "https://learn.microsoft.com/en-us/training/modules/introduction-microsoft-365-threat-protection/"
     
-    crawler = MicrosoftLearnCrawler(course_url)
+    crawler = MicrosoftLearnCrawler(course_url, launch_profile=args.profile)
     
     # Crawl course
     # Bỏ max_paths và max_modules_per_path để crawl toàn bộ
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Các module của Crawl_Data import lẫn nhau theo tên phẳng (from page_pool import ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,43 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import auth_helper
+from auth_helper import AuthSession, save_session
+
+
+def test_save_session_replaces_file_atomically(tmp_path):
+    session_file = tmp_path / '.auth' / 'session.json'
+    states = [{'cookies': [{'name': 'ESTSAUTH', 'value': str(i) * 5000}], 'origins': []} for i in range(8)]
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda state: save_session(state, str(session_file)), states))
+
+    # Luôn là 1 bản JSON đầy đủ của 1 lần ghi, không còn file tạm
+    assert json.loads(session_file.read_text()) in states
+    assert os.listdir(session_file.parent) == ['session.json']
+
+
+class _ExpiredContext:
+    async def cookies(self):
+        return []
+
+
+def test_ensure_without_relogin_does_not_login(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_login(*args, **kwargs):
+        calls.append(args)
+        return True
+
+    monkeypatch.setattr(auth_helper, 'login_in_context', fake_login)
+    session_file = str(tmp_path / 'session.json')
+
+    worker = AuthSession(session_file, email='a@example.com', password='x', relogin=False)
+    assert asyncio.run(worker.ensure(_ExpiredContext())) is False
+    assert calls == []
+
+    parent = AuthSession(session_file, email='a@example.com', password='x')
+    assert asyncio.run(parent.ensure(_ExpiredContext())) is True
+    assert len(calls) == 1
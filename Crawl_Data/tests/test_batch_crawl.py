@@ -0,0 +1,32 @@
+import batch_crawl
+
+
+def test_run_batch_defaults_cover_crawl_options(tmp_path, monkeypatch):
+    captured = {}
+
+    class FakeExecutor:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def submit(self, fn, url, slug, output_dir, options):
+            captured.update(options)
+            raise RuntimeError("stop")
+
+    monkeypatch.setattr(batch_crawl, 'ProcessPoolExecutor', FakeExecutor)
+    try:
+        batch_crawl.run_batch(['https://learn.microsoft.com/en-us/training/courses/x'],
+                              str(tmp_path), processes=1, options={'concurrency': 2})
+    except RuntimeError:
+        pass
+
+    # _crawl_course đọc các key này bằng options[...]
+    for key in ('concurrency', 'fetch_mode', 'profile', 'max_modules', 'incremental',
+                'module_cache', 'cache_ttl', 'auth'):
+        assert key in captured
+    assert captured['auth'] is None
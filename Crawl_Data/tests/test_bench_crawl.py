@@ -0,0 +1,24 @@
+import argparse
+import json
+
+import bench_crawl
+
+
+def test_failed_units_mark_run_as_error(tmp_path, monkeypatch):
+    modules = [
+        {'url': 'm1', 'units': [{'url': 'u1'}, {'url': 'u2', 'error': 'Chromium launch failed'}]},
+        {'url': 'm2', 'error': 'timeout', 'units': []},
+    ]
+    assert bench_crawl.count_failed(modules) == 2
+
+    async def fake_run_target(target, args):
+        return {'modules': 2, 'units': 2, 'failed': bench_crawl.count_failed(modules)}
+
+    monkeypatch.setattr(bench_crawl, 'run_target', fake_run_target)
+    monkeypatch.setattr(bench_crawl, 'instrument', lambda probe: None)
+    out = tmp_path / 'result.json'
+    bench_crawl.child_main(argparse.Namespace(child='crawler-http', workdir=str(tmp_path), out=str(out)))
+
+    result = json.loads(out.read_text())
+    assert result['failed'] == 2
+    assert result['error']
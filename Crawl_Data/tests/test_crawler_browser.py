@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+import crawler
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.stopped = 0
+        self.chromium = self
+
+    async def launch(self, **kwargs):
+        raise RuntimeError("Executable doesn't exist")
+
+    async def stop(self):
+        self.stopped += 1
+
+
+def test_failed_lazy_launch_stops_playwright(monkeypatch):
+    started = []
+
+    class Starter:
+        async def start(self):
+            started.append(FakePlaywright())
+            return started[-1]
+
+    monkeypatch.setattr(crawler, 'async_playwright', Starter)
+    c = crawler.MicrosoftLearnCrawler('https://learn.microsoft.com/en-us/training/courses/x', fetch_mode='http')
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await c.ensure_browser()
+        await c.close_browser()
+
+    asyncio.run(run())
+    # Mỗi lần thử start 1 driver mới và driver đó được dừng
+    assert [p.stopped for p in started] == [1, 1]
+    assert c.playwright is None and c.context is None
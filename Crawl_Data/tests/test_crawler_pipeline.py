@@ -0,0 +1,25 @@
+import asyncio
+
+import crawler
+from checkpoint_store import load_journal
+
+
+def test_discover_failure_records_module(tmp_path, monkeypatch):
+    async def fake_modules(self):
+        return [{'title': f'M{i}', 'url': f'https://learn.microsoft.com/en-us/training/modules/m{i}/', 'units': []}
+                for i in (1, 2)]
+
+    async def failing_module_content(self, module, page=None):
+        if module['title'] == 'M1':
+            raise RuntimeError("database is locked")  # Lỗi ngoài try của crawl_module_content thật
+
+    monkeypatch.setattr(crawler.MicrosoftLearnCrawler, 'get_course_modules', fake_modules)
+    monkeypatch.setattr(crawler.MicrosoftLearnCrawler, 'crawl_module_content', failing_module_content)
+    c = crawler.MicrosoftLearnCrawler('https://learn.microsoft.com/en-us/training/courses/x', fetch_mode='http',
+                                      parse_workers=0, output_dir=str(tmp_path))
+    asyncio.run(c.crawl())
+
+    assert [m['title'] for m in c.data['modules']] == ['M1', 'M2']
+    assert c.data['modules'][0]['error'] == 'database is locked'
+    journaled = [r['data']['title'] for r in load_journal(c.journal_path) if r['kind'] == 'module']
+    assert sorted(journaled) == ['M1', 'M2']
@@ -0,0 +1,35 @@
+import asyncio
+import json
+
+import crawler
+from checkpoint_store import compact_journal
+
+
+COURSE = 'https://learn.microsoft.com/en-us/training/courses/x'
+MODULE = 'https://learn.microsoft.com/en-us/training/modules/m1/'
+UNIT = 'https://learn.microsoft.com/en-us/training/modules/m1/1-intro'
+
+
+def _crawl(tmp_path, monkeypatch, resume_from):
+    async def fake_modules(self):
+        return [{'title': 'M1', 'url': MODULE, 'units': [{'title': 'Intro', 'url': UNIT, 'type': 'unit'}]}]
+
+    monkeypatch.setattr(crawler.MicrosoftLearnCrawler, 'get_course_modules', fake_modules)
+    c = crawler.MicrosoftLearnCrawler(COURSE, fetch_mode='http', parse_workers=0, output_dir=str(tmp_path))
+    asyncio.run(c.crawl(resume_from=resume_from))
+    return c
+
+
+def test_resume_from_json_journals_restored_units(tmp_path, monkeypatch):
+    previous = tmp_path / 'previous.json'
+    unit = {'title': 'Intro', 'url': UNIT, 'type': 'unit', 'content': {'full_content': 'Nội dung'}}
+    previous.write_text(json.dumps({'modules': [{'title': 'M1', 'url': MODULE, 'units': [unit]}]}))
+    # Journal cũ của 1 course khác không được ghi tiếp
+    (tmp_path / 'crawl_journal.jsonl').write_text(
+        json.dumps({'kind': 'module', 'module_idx': 9, 'data': {'url': 'stale', 'units': []}}) + '\n')
+
+    c = _crawl(tmp_path, monkeypatch, str(previous))
+
+    data = compact_journal(c.journal_path, str(tmp_path / 'compacted.json'))
+    assert [m['url'] for m in data['modules']] == [MODULE]
+    assert data['modules'][0]['units'][0]['content'] == unit['content']
@@ -0,0 +1,52 @@
+import asyncio
+
+import crawler
+from incremental import make_validators
+
+
+HTML = '<html><body><div id="module-unit-content"><p>Nội dung unit</p></div></body></html>'
+
+
+class FakePage:
+    async def content(self):
+        return HTML
+
+
+def _unit(**extra):
+    return {'title': 'Introduction', 'type': 'unit', 'url': 'https://learn.microsoft.com/x/1-intro',
+            'content': {}, **extra}
+
+
+def test_browser_snapshot_records_content_hash(monkeypatch):
+    async def fake_goto_ready(page, url, profile, **kwargs):
+        pass
+
+    monkeypatch.setattr(crawler, 'goto_ready', fake_goto_ready)
+    c = crawler.MicrosoftLearnCrawler('https://learn.microsoft.com/en-us/training/courses/x', fetch_mode='browser')
+
+    unit = _unit()
+    assert asyncio.run(c.fetch_unit(unit, FakePage())) == HTML
+    # Cùng baseline với fetch_mode='http' (không có ETag/Last-Modified)
+    assert unit['validators'] == make_validators({}, HTML)
+
+    # Incremental: giữ validators có ETag mà check_unit đã lưu
+    checked = {'etag': '"abc"', 'last_modified': None, 'content_hash': 'old'}
+    unit = _unit(validators=checked)
+    asyncio.run(c.fetch_unit(unit, FakePage()))
+    assert unit['validators'] is checked
+
+
+def test_rendered_dom_hashes_like_raw_html():
+    raw = ('<html><head><script>var x = 1;</script></head><body>'
+           '<div id="module-unit-content" class="content"><h2 id="a">Tổng quan</h2>\n'
+           '<p>Microsoft Sentinel &amp; Defender&nbsp;XDR</p><div><img src="../../media/a.png" alt="a"></div>'
+           '</div><footer>Footer</footer></body></html>')
+    # page.content(): attribute thêm bởi JS, entity đã decode, whitespace khác, script mới ngoài unit
+    rendered = ('<!DOCTYPE html><html lang="en"><head><script src="/_themes/x.js"></script></head><body>'
+                '<div class="content" id="module-unit-content" data-bi-name="content">'
+                '<h2 id="a" class="heading-anchor">Tổng quan</h2>'
+                '<p>Microsoft Sentinel &amp; Defender\xa0XDR</p><div><img src="../../media/a.png" alt="a" loading="lazy">'
+                '</div></div><footer>Footer mới</footer></body></html>')
+    assert make_validators({}, rendered)['content_hash'] == make_validators({}, raw)['content_hash']
+    changed = raw.replace('Tổng quan', 'Giới thiệu')
+    assert make_validators({}, changed)['content_hash'] != make_validators({}, raw)['content_hash']
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import os
+import stat
+import sys
+
+from download_videos import VideoDownloader, dedup_videos
+
+
+FAKE_YTDLP = """#!{python}
+import sys
+# Ghi nhiều stderr trước khi có progress: pipe stderr riêng sẽ đầy (~64KB) nếu không ai đọc
+sys.stderr.write("WARNING: chatty\\n" * 20000)
+sys.stderr.flush()
+out = sys.argv[sys.argv.index('-o') + 1].replace('%(ext)s', 'mp4')
+for n in (100, 200):
+    print(n, flush=True)
+open(out, 'wb').write(b'x' * 200)
+"""
+
+
+def _fake_ytdlp(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    script = bin_dir / 'yt-dlp'
+    script.write_text(FAKE_YTDLP.format(python=sys.executable))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+def _run(downloader, videos):
+    async def main():
+        await downloader.open(len(videos))
+        try:
+            for video in videos:
+                await asyncio.wait_for(downloader.download(video), timeout=30)
+        finally:
+            await downloader.close()
+    asyncio.run(main())
+
+
+def test_youtube_chatty_stderr_does_not_block(tmp_path, monkeypatch):
+    _fake_ytdlp(tmp_path, monkeypatch)
+    downloader = VideoDownloader(str(tmp_path / 'videos'))
+    videos = dedup_videos([{'type': 'youtube', 'video_id': 'abc',
+                            'watch_url': 'https://www.youtube.com/watch?v=abc'}])
+
+    _run(downloader, videos)
+
+    assert downloader.progress.done == 1
+    assert (tmp_path / 'videos' / 'abc.mp4').stat().st_size == 200
+
+
+def test_bad_entries_do_not_stop_batch(tmp_path, monkeypatch):
+    _fake_ytdlp(tmp_path, monkeypatch)
+    downloader = VideoDownloader(str(tmp_path / 'videos'))
+    videos = [
+        {'type': 'youtube', 'video_id': None, 'watch_url': 'https://www.youtube.com/watch?v=none'},
+        {'type': 'direct'},  # Không có video_id lẫn URL
+        {'type': 'youtube', 'video_id': 'ok', 'watch_url': 'https://www.youtube.com/watch?v=ok', 'key': 'youtube:ok'},
+    ]
+
+    _run(downloader, videos)
+
+    assert downloader.progress.done == 1
+    assert downloader.progress.failed == 1
+    assert downloader.progress.skipped == 1
+    manifest = json.loads((tmp_path / 'videos' / 'manifest.json').read_text())
+    assert any(entry.get('status') == 'failed' for entry in manifest.values())
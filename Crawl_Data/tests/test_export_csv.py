@@ -0,0 +1,93 @@
+import csv
+import json
+
+from checkpoint_store import CheckpointJournal
+from export_csv import export_modules, export_to_csv, iter_journal_modules, iter_json_modules
+
+
+def _rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))[1:]
+
+
+def test_module_level_content_exported(tmp_path):
+    # ms_learn_full_crawler/ms_learn_crawler_fixed: content nằm trực tiếp trong module, không có units
+    course = {'modules': [{
+        'title': 'Module 1',
+        'url': 'https://learn.microsoft.com/en-us/training/modules/m1/',
+        'content': {
+            'videos': [{'type': 'youtube', 'url': 'https://www.youtube.com/watch?v=x'}],
+            'questions': [{'question_number': 1, 'question': 'Q?', 'options': ['A', 'B']}],
+            'exercise_steps': {'steps': [{'step_number': 1, 'instruction': 'Open the portal'}]},
+        },
+    }]}
+    source = tmp_path / 'course.json'
+    source.write_text(json.dumps(course), encoding='utf-8')
+
+    counts = export_to_csv(str(source), str(tmp_path))
+
+    assert counts['videos_rows'] == 1
+    assert counts['questions_rows'] == 1
+    assert counts['exercises_rows'] == 1
+    assert _rows(tmp_path / 'course_videos.csv')[0][-1] == 'https://www.youtube.com/watch?v=x'
+
+
+def test_chunk_size_does_not_change_output(tmp_path):
+    # Số (3.25, 1e-3...) bị cắt ngang ở ranh giới chunk phải được đọc lại trọn vẹn
+    course = {
+        'course_url': 'https://learn.microsoft.com/en-us/training/courses/x',
+        'q': 3.25,
+        'learning_paths': [{
+            'title': 'Path 1',
+            'score': -12.5e-3,
+            'modules': [{
+                'title': f'Module {i}',
+                'url': f'https://learn.microsoft.com/en-us/training/modules/m{i}/',
+                'duration': 1234.5678,
+                'units': [{
+                    'title': f'Unit {i}.{j}',
+                    'type': 'content',
+                    'url': f'https://learn.microsoft.com/en-us/training/modules/m{i}/{j}-unit',
+                    'content': {
+                        'videos': [{'type': 'direct', 'url': f'https://x/{i}{j}.mp4', 'size': 10.75}],
+                        'questions': [{'question_number': j, 'question': 'Q "quoted"?',
+                                       'options': ['Ä', 'B'], 'correct_answers': ['B']}],
+                    },
+                } for j in range(3)],
+            } for i in range(3)],
+        }],
+    }
+    source = tmp_path / 'course.json'
+    source.write_text(json.dumps(course, ensure_ascii=False), encoding='utf-8')
+
+    def export(chunk_size):
+        out = tmp_path / f'out_{chunk_size}'
+        modules = (module for _, module in iter_json_modules(str(source), chunk_size))
+        counts = export_modules(modules, str(out), 'course')
+        files = {path.name: path.read_text(encoding='utf-8') for path in sorted(out.iterdir())}
+        return counts, files
+
+    expected = export(1 << 16)
+    assert expected[0]['units_rows'] == 9
+    for chunk_size in (1, 2, 3, 5, 7, 11, 13, 31, 64):
+        assert export(chunk_size) == expected, f"chunk_size={chunk_size}"
+
+
+def test_journal_shared_units_and_course_order(tmp_path):
+    shared = {'title': 'Shared', 'url': 'u-shared', 'type': 'unit',
+              'content': {'videos': [{'type': 'direct', 'url': 'https://x/v.mp4'}]}}
+    other = {'title': 'Other', 'url': 'u-other', 'type': 'unit', 'content': {}}
+    journal = CheckpointJournal(str(tmp_path / 'crawl_journal.jsonl'))
+    journal.open({'course_url': 'c'})
+    # Module 2 xong trước module 1; unit dùng chung chỉ được journal 1 lần (frontier)
+    journal.append_unit(shared, 2, 1)
+    journal.append_unit(other, 2, 2)
+    journal.append_module({'title': 'M2', 'url': 'm2', 'units': [shared, other]}, 2, journaled_units=True)
+    journal.append_module({'title': 'M1', 'url': 'm1', 'units': [shared]}, 1, journaled_units=True)
+    journal.close()
+
+    modules = [module for _, module in iter_journal_modules(journal.path)]
+
+    assert [m['title'] for m in modules] == ['M1', 'M2']
+    assert modules[0]['units'][0]['content'] == shared['content']
+    assert modules[1]['units'] == [shared, other]
@@ -0,0 +1,58 @@
+import asyncio
+import json
+import time
+
+from yarl import URL
+
+from http_fetcher import HttpFetcher
+
+
+def test_add_cookies_from_storage_state():
+    later = time.time() + 3600
+    cookies = [
+        {'name': 'ESTSAUTH', 'value': 'a.b-c_d', 'domain': '.microsoft.com', 'path': '/', 'expires': later,
+         'secure': True},
+        {'name': 'learn_session', 'value': 'abc', 'domain': 'learn.microsoft.com', 'path': '/', 'expires': -1},
+        {'name': 'old', 'value': 'x', 'domain': '.microsoft.com', 'path': '/', 'expires': time.time() - 10},
+    ]
+
+    async def run():
+        fetcher = HttpFetcher()
+        await fetcher.open()
+        try:
+            fetcher.add_cookies(cookies)
+            jar = fetcher.session.cookie_jar
+            learn = jar.filter_cookies(URL('https://learn.microsoft.com/en-us/training/'))
+            other = jar.filter_cookies(URL('https://www.microsoft.com/'))
+            return ({k: m.value for k, m in learn.items()}, set(other))
+        finally:
+            await fetcher.close()
+
+    learn, other = asyncio.run(run())
+    assert learn == {'ESTSAUTH': 'a.b-c_d', 'learn_session': 'abc'}
+    # Cookie host-only của Learn không gửi sang host khác
+    assert other == {'ESTSAUTH'}
+
+
+def test_http_mode_shares_saved_session(tmp_path):
+    import crawler
+    from auth_helper import AuthSession
+
+    session_file = tmp_path / 'session.json'
+    session_file.write_text(json.dumps({'cookies': [
+        {'name': 'ESTSAUTH', 'value': 'token', 'domain': '.microsoft.com', 'path': '/', 'expires': -1}]}))
+    c = crawler.MicrosoftLearnCrawler('https://learn.microsoft.com/en-us/training/courses/x', fetch_mode='http',
+                                      auth=AuthSession(str(session_file)))
+
+    async def run():
+        c.fetcher = HttpFetcher()
+        await c.fetcher.open()
+        try:
+            await c.share_session()  # Cookie còn hạn -> không cần mở browser
+            return {k: m.value for k, m in c.fetcher.session.cookie_jar.filter_cookies(
+                URL('https://learn.microsoft.com/')).items()}
+        finally:
+            await c.fetcher.close()
+
+    assert asyncio.run(run()) == {'ESTSAUTH': 'token'}
+    assert c.context is None
@@ -0,0 +1,71 @@
+import ast
+import asyncio
+import glob
+import os
+
+import page_readiness
+from page_readiness import READINESS_PROFILES, reload_ready
+from rate_limiter import AdaptiveRateLimiter
+
+
+CRAWL_DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(CRAWL_DATA_DIR)
+# Vị trí tham số profile của mỗi hàm
+PROFILE_ARG = {'wait_until_ready': 1, 'goto_ready': 2, 'reload_ready': 1}
+
+
+def _call_site_profiles():
+    """(file, dòng, profile) của mọi lời gọi wait_until_ready/goto_ready/reload_ready với profile là hằng string"""
+    sources = glob.glob(os.path.join(CRAWL_DATA_DIR, '*.py')) + glob.glob(os.path.join(ROOT_DIR, '*.py'))
+    for path in sources:
+        with open(path, encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call):
+                continue
+            func = node.func.id if isinstance(node.func, ast.Name) else getattr(node.func, 'attr', None)
+            if func not in PROFILE_ARG:
+                continue
+            args = [kw.value for kw in node.keywords if kw.arg == 'profile']
+            if len(node.args) > PROFILE_ARG[func]:
+                args.append(node.args[PROFILE_ARG[func]])
+            for arg in args:
+                if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                    yield os.path.basename(path), node.lineno, arg.value
+
+
+def test_call_site_profiles_exist():
+    found = list(_call_site_profiles())
+    assert found, "Không tìm thấy call site nào"
+    missing = [f"{name}:{lineno} '{profile}'" for name, lineno, profile in found
+               if profile not in READINESS_PROFILES]
+    assert not missing, f"Profile không có trong READINESS_PROFILES: {missing}"
+
+
+def test_quiz_profiles_present():
+    for profile in ('quiz', 'quiz_questions', 'quiz_result'):
+        assert READINESS_PROFILES[profile]
+
+
+def test_reload_goes_through_rate_limiter(monkeypatch):
+    class Response:
+        status = 429
+        headers = {'retry-after': '7'}
+
+    class FakePage:
+        reloads = 0
+
+        async def reload(self, **kwargs):
+            self.reloads += 1
+            return Response()
+
+    async def ready(page, profile, timeout=10000):
+        return True
+
+    monkeypatch.setattr(page_readiness, 'wait_until_ready', ready)
+    limiter = AdaptiveRateLimiter(rate=100, max_rate=100)
+    page = FakePage()
+    assert asyncio.run(reload_ready(page, 'quiz_questions', limiter=limiter))
+    assert page.reloads == 1
+    # 429 + Retry-After được đưa về limiter như goto_ready
+    assert limiter.requests == 1 and limiter.throttled == 1
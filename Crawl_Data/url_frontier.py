@@ -0,0 +1,100 @@
+"""
+URL Frontier
+Chuẩn hoá URL Microsoft Learn + frontier dùng chung cho cả lần crawl.
+
+canonical_url():
+- Locale viết thường; URL thiếu locale (/training/...) hoặc khác locale của course được đưa về locale của course
+- Bỏ fragment và tracking params (ns-enrollment-type/id, utm_*, WT.mc_id, ...), sort các params còn lại
+- Trang course/path/module kết thúc bằng '/', unit thì không (giống <link rel="canonical"> của Learn)
+- Path viết thường (Learn không phân biệt hoa thường)
+
+CrawlFrontier: mỗi trang (theo URL chuẩn hoá) chỉ được fetch 1 lần trong 1 lần chạy,
+các lần gặp lại đợi và dùng kết quả của lần đầu.
+"""
+
+import asyncio
+import re
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+
+LEARN_ORIGIN = "https://learn.microsoft.com"
+
+TRACKING_PARAMS = {'ns-enrollment-type', 'ns-enrollment-id', 'wt.mc_id', 'ocid', 'source', 'sharingid'}
+TRACKING_PREFIXES = ('utm_', 'ns-enrollment-')
+
+_LOCALE = re.compile(r'^[a-z]{2,3}(-[a-z0-9]{2,4}){1,2}$', re.IGNORECASE)  # en-us, zh-cn, sr-latn-rs
+
+
+def locale_of(url: str) -> Optional[str]:
+    """Locale trong URL Learn (vd. 'en-us'), None nếu không có"""
+    segments = [s for s in urlsplit(url).path.split('/') if s]
+    if len(segments) >= 2 and _LOCALE.match(segments[0]):
+        return segments[0].lower()
+    return None
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(href: str, base_url: str = LEARN_ORIGIN, locale: str = None) -> str:
+    """
+    URL tuyệt đối đã chuẩn hoá. href tương đối được resolve theo base_url (URL của trang chứa link).
+    locale: locale của lần crawl, None = giữ locale trong URL (chỉ viết thường).
+    """
+    parts = urlsplit(urljoin(base_url, href.strip()))
+    path = parts.path
+    segments = [s for s in path.split('/') if s]
+    if 'training' in [s.lower() for s in segments]:
+        segments = [s.lower() for s in segments]
+        if segments[0] == 'training':
+            if locale:
+                segments.insert(0, locale.lower())
+        elif locale and _LOCALE.match(segments[0]):
+            segments[0] = locale.lower()
+        # training/<kind>/<slug> là trang gốc (course/path/module), sâu hơn là unit
+        depth = len(segments) - segments.index('training') - 1
+        path = '/' + '/'.join(segments) + ('/' if depth <= 2 else '')
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+class CrawlFrontier:
+    """
+    URL chuẩn hoá -> kết quả crawl của lần chạy hiện tại.
+    Worker đầu tiên claim() 1 URL thì fetch rồi complete(); worker gặp lại URL đó
+    (unit/module nằm ở nhiều chỗ, link khác query string) đợi và dùng lại kết quả.
+    """
+
+    def __init__(self, base_url: str = LEARN_ORIGIN, locale: str = None):
+        self.base_url = base_url
+        self.locale = locale
+        self._results: Dict[str, asyncio.Future] = {}
+        self.duplicates = 0
+
+    @classmethod
+    def for_course(cls, course_url: str) -> 'CrawlFrontier':
+        """Frontier theo locale của course URL"""
+        return cls(course_url, locale_of(course_url))
+
+    def canonical(self, href: str, page_url: str = None) -> str:
+        return canonical_url(href, page_url or self.base_url, self.locale)
+
+    def claim(self, url: str) -> Optional[asyncio.Future]:
+        """None nếu URL chưa được fetch (caller fetch rồi gọi complete), ngược lại Future kết quả lần trước"""
+        key = self.canonical(url)
+        if key in self._results:
+            self.duplicates += 1
+            return self._results[key]
+        self._results[key] = asyncio.get_running_loop().create_future()
+        return None
+
+    def complete(self, url: str, result: Any):
+        future = self._results.get(self.canonical(url))
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, int]:
+        return {'pages': len(self._results), 'duplicates': self.duplicates}
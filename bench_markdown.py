@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Markdown Converter Benchmark
+So sánh 2 cách convert #module-unit-content sang markdown (html_markdown.py):
+- tokenizer: html_to_markdown(), 1 lượt qua token HTML
+- regex: render_markdown_regex(), BeautifulSoup select + re.sub từng paragraph (cách cũ)
+
+Fixture: các file .md trong output_markdown.zip (output thật của crawler) được dựng ngược
+lại thành HTML giống markup của Learn (codeHeader, class lang-*, link có data-linktype,
+entities, list lồng nhau, ảnh ../../media). Đo:
+- Tốc độ: thời gian convert toàn bộ fixture (lấy lần nhanh nhất trong --repeat lần), MB HTML/s
+- Chất lượng: số đoạn text của fixture có trong output, link giữ được, entity/tag còn sót,
+  dòng bị lặp (text của element lồng nhau xuất hiện 2 lần)
+
+    python bench_markdown.py
+    python bench_markdown.py --zip output_markdown.zip --repeat 5 --show 06_SC-200
+"""
+
+import argparse
+import html
+import re
+import time
+import zipfile
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from html_markdown import CONVERTERS, LEARN_ORIGIN
+
+
+FENCE = re.compile(r'^```(\w*)$')
+HEADING = re.compile(r'^(#{1,6}) (.*)$')
+LIST_ITEM = re.compile(r'^(\s*)(-|\d+\.) (.*)$')
+IMAGE = re.compile(r'^!\[(.*?)\]\((.*?)\)$')
+VIDEO = re.compile(r'^🎥 \*\*Video\*\*: \[(.*?)\]')
+
+_LINK = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+_CODE = re.compile(r'`([^`]+)`')
+_BOLD = re.compile(r'\*\*(.+?)\*\*')
+_ITALIC = re.compile(r'(?<![*\w])\*([^*]+)\*(?![*\w])')
+_LEAK = re.compile(r'&(?:amp|lt|gt|quot|#\d+);|</?[a-z][^>]*>')
+_MARKUP = re.compile(r'!?\[([^\]]*)\]\([^)]*\)|[*`#>|]|^\s*(?:-|\d+\.)\s')
+
+
+def load_fixtures(zip_path: str) -> List[Tuple[str, str]]:
+    """Đọc các file .md trong zip, trả về [(tên file, nội dung unit)] (bỏ front matter, title, footer)"""
+    fixtures = []
+    with zipfile.ZipFile(zip_path) as zf:
+        for name in sorted(zf.namelist()):
+            if not name.endswith('.md'):
+                continue
+            text = zf.read(name).decode('utf-8')
+            body = text.split('\n---\n', 1)[-1]
+            body = body.rsplit('\n---\n', 1)[0]
+            # Bỏ "# title" và "> description" của trang, chỉ giữ phần #module-unit-content
+            lines = body.strip('\n').split('\n')
+            while lines and (not lines[0].strip() or lines[0].startswith(('# ', '> '))):
+                lines.pop(0)
+            fixtures.append((name, '\n'.join(lines)))
+    return fixtures
+
+
+def inline_html(text: str) -> str:
+    """Inline markdown -> HTML kiểu Learn (escape entities, link có thêm attribute)"""
+    text = html.escape(text, quote=False)
+    text = _CODE.sub(r'<code>\1</code>', text)
+    text = _BOLD.sub(r'<strong>\1</strong>', text)
+    text = _ITALIC.sub(r'<em>\1</em>', text)
+    return _LINK.sub(r'<a href="\2" data-linktype="external">\1</a>', text)
+
+
+def image_html(alt: str, src: str) -> str:
+    src = src.replace(f"{LEARN_ORIGIN}/training/", '../../')
+    return (f'<p><span class="mx-imgBorder"><img src="{html.escape(src)}" '
+            f'alt="{html.escape(alt)}" data-linktype="relative-path"></span></p>')
+
+
+def list_html(items: List[Tuple[int, str, str]]) -> str:
+    """[(indent, marker, text)] -> ul/ol lồng nhau theo indent"""
+    out = []
+    stack = []  # (indent, tag)
+    for indent, marker, text in items:
+        tag = 'ol' if marker[0].isdigit() else 'ul'
+        while stack and (indent < stack[-1][0] or (indent == stack[-1][0] and tag != stack[-1][1])):
+            out.append(f'</li></{stack.pop()[1]}>')
+        if stack and indent == stack[-1][0]:
+            out.append('</li>')
+        else:
+            out.append(f'<{tag}>')
+            stack.append((indent, tag))
+        out.append(f'<li><p>{inline_html(text)}</p>')
+    while stack:
+        out.append(f'</li></{stack.pop()[1]}>')
+    return ''.join(out)
+
+
+def table_html(rows: List[str]) -> str:
+    cells = [[c.strip() for c in row.strip().strip('|').split(' | ')] for row in rows
+             if not set(row.replace('|', '').split()) <= {'---'}]
+    head, body = cells[0], cells[1:]
+    out = ['<div class="table-wrapper"><table><thead><tr>']
+    out += [f'<th>{inline_html(c)}</th>' for c in head]
+    out.append('</tr></thead><tbody>')
+    for row in body:
+        out.append('<tr>' + ''.join(f'<td>{inline_html(c)}</td>' for c in row) + '</tr>')
+    out.append('</tbody></table></div>')
+    return ''.join(out)
+
+
+def markdown_to_learn_html(body: str) -> str:
+    """Dựng lại HTML của #module-unit-content từ markdown của fixture"""
+    out = []
+    lines = body.split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        fence = FENCE.match(stripped)
+        if fence:
+            lang = fence.group(1) or 'text'
+            code = []
+            i += 1
+            while i < len(lines) and lines[i].strip() != '```':
+                code.append(lines[i])
+                i += 1
+            out.append(f'<div class="codeHeader"><span class="language">{lang}</span>'
+                       f'<button class="action"><span>Copy</span></button></div>'
+                       f'<pre tabindex="0"><code class="lang-{lang}">{html.escape(chr(10).join(code), quote=False)}</code></pre>')
+        elif LIST_ITEM.match(line):
+            items = []
+            while i < len(lines) and LIST_ITEM.match(lines[i]):
+                indent, marker, text = LIST_ITEM.match(lines[i]).groups()
+                items.append((len(indent), marker, text))
+                i += 1
+            out.append(list_html(items))
+            continue
+        elif stripped.startswith('|'):
+            rows = []
+            while i < len(lines) and lines[i].strip().startswith('|'):
+                rows.append(lines[i])
+                i += 1
+            out.append(table_html(rows))
+            continue
+        elif HEADING.match(stripped):
+            level, text = HEADING.match(stripped).groups()
+            slug = re.sub(r'\W+', '-', text.lower()).strip('-')
+            out.append(f'<h{len(level)} id="{slug}">{inline_html(text)}</h{len(level)}>')
+        elif stripped.startswith('> '):
+            out.append(f'<div class="NOTE"><p>Note</p><p>{inline_html(stripped[2:])}</p></div>')
+        elif IMAGE.match(stripped):
+            out.append(image_html(*IMAGE.match(stripped).groups()))
+        elif VIDEO.match(stripped):
+            out.append(f'<iframe src="{html.escape(VIDEO.match(stripped).group(1))}" allowfullscreen></iframe>')
+        elif stripped:
+            out.append(f'<p>{inline_html(stripped)}</p>')
+        i += 1
+    return '\n'.join(out)
+
+
+def plain(text: str) -> str:
+    """Text không có markup markdown, dùng để so nội dung"""
+    return ' '.join(_MARKUP.sub(r'\1', text).split())
+
+
+def _leaks(text: str) -> int:
+    return len(_LEAK.findall(text))
+
+
+def _duplicates(text: str) -> int:
+    # So text không markup: fixture cũ có item lặp lại với marker khác ("- x" và "1. x")
+    lines = [plain(line) for line in text.split('\n') if len(plain(line)) > 4]
+    return sum(n - 1 for n in Counter(lines).values() if n > 1)
+
+
+def quality(source: str, markdown: str) -> Dict[str, int]:
+    """So output với markdown gốc; leaks/duplicates chỉ tính phần vượt quá số có sẵn trong fixture"""
+    expected = [plain(line) for line in source.split('\n') if plain(line)]
+    output = plain(markdown.replace('\n', ' \n '))
+    return {
+        'blocks': len(expected),
+        'found': sum(1 for text in expected if text in output),
+        'links_in': len(_LINK.findall(source)),
+        'links_out': len(_LINK.findall(markdown)),
+        'leaks': max(0, _leaks(markdown) - _leaks(source)),
+        'duplicates': max(0, _duplicates(markdown) - _duplicates(source)),
+    }
+
+
+def bench(fixtures: List[Tuple[str, str]], repeat: int) -> Dict[str, Dict]:
+    pages = [(name, body, markdown_to_learn_html(body)) for name, body in fixtures]
+    size = sum(len(page.encode('utf-8')) for _, _, page in pages)
+    results = {}
+    for name, convert in CONVERTERS.items():
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs = [convert(page, LEARN_ORIGIN) for _, _, page in pages]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        totals = Counter()
+        for (_, body, _), markdown in zip(pages, outputs):
+            totals.update(quality(body, markdown))
+        results[name] = {'seconds': best, 'mb_per_s': size / best / 1e6, 'quality': dict(totals), 'outputs': outputs}
+    return {'pages': pages, 'size': size, 'results': results}
+
+
+def print_report(report: Dict):
+    pages, results = report['pages'], report['results']
+    print(f"\n📊 {len(pages)} units, {report['size'] / 1e6:.2f} MB HTML")
+    print(f"  {'converter':<11}{'total ms':>10}{'µs/unit':>9}{'MB/s':>7}{'text':>8}{'links':>11}{'leaks':>7}{'dup':>6}")
+    for name, r in results.items():
+        q = r['quality']
+        print(f"  {name:<11}{r['seconds'] * 1000:>10.1f}{r['seconds'] / len(pages) * 1e6:>9.0f}{r['mb_per_s']:>7.1f}"
+              f"{q['found'] / max(q['blocks'], 1):>8.1%}{q['links_out']:>5}/{q['links_in']:<5}{q['leaks']:>7}{q['duplicates']:>6}")
+    if 'regex' in results and 'tokenizer' in results:
+        print(f"\n⚡ tokenizer nhanh hơn regex {results['regex']['seconds'] / results['tokenizer']['seconds']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML -> Markdown converters trên output_markdown fixtures")
+    parser.add_argument('--zip', default='output_markdown.zip', help="Zip chứa các file .md đã crawl")
+    parser.add_argument('--repeat', type=int, default=3, help="Số lần chạy mỗi converter (lấy lần nhanh nhất)")
+    parser.add_argument('--show', help="In HTML + output của unit đầu tiên có tên chứa chuỗi này")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.zip)
+    report = bench(fixtures, max(1, args.repeat))
+    print_report(report)
+
+    if args.show:
+        for idx, (name, _, page) in enumerate(report['pages']):
+            if args.show in name:
+                print(f"\n📄 {name}\n{page}")
+                for converter, r in report['results'].items():
+                    print(f"\n--- {converter} ---\n{r['outputs'][idx]}")
+                break
+
+
+if __name__ == "__main__":
+    main()
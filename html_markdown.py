@@ -0,0 +1,556 @@
+"""
+HTML -> Markdown cho nội dung Microsoft Learn (#module-unit-content)
+
+html_to_markdown(): converter 1 lượt dựa trên tokenizer (html.parser.HTMLParser), không dựng cây DOM:
+- Headings, paragraphs, lists lồng nhau (ul/ol), tables, code fences, blockquotes/alerts, images, video/iframe
+- Inline: strong/b, em/i, code, links (a có bao nhiêu attribute cũng được), br
+- Entities được decode (&amp;, &nbsp;, &#39;...), whitespace gộp như trình duyệt
+- Mỗi đoạn text chỉ xuất hiện 1 lần (không lặp lại text của element lồng nhau)
+
+render_markdown_regex(): cách cũ (BeautifulSoup select + re.sub từng paragraph), giữ lại để
+so sánh bằng bench_markdown.py và chọn được qua converter='regex'.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+
+LEARN_ORIGIN = "https://learn.microsoft.com"
+
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+# Các tag chia block: gặp thẻ mở/đóng thì kết thúc đoạn text đang gom
+BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'main', 'header', 'footer', 'aside', 'figure', 'figcaption',
+    'dl', 'dt', 'dd', 'details', 'summary', 'caption',
+}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'button', 'svg', 'form', 'select', 'textarea'}
+# Thanh "Kusto | Copy" phía trên code block, text chỉ dành cho screen reader
+SKIP_CLASSES = {'codeHeader', 'visually-hidden'}
+# Alert của Learn (<div class="NOTE">, <div class="alert is-info">) render thành blockquote
+ALERT_CLASSES = {'alert', 'NOTE', 'TIP', 'IMPORTANT', 'WARNING', 'CAUTION'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+INLINE_MARKERS = {'strong': '**', 'b': '**', 'em': '*', 'i': '*'}
+
+BR = '\x00'  # <br> trong lúc gom text (whitespace thường bị gộp, BR thì không)
+_SPACES = re.compile(r'\s+')
+_BACKTICKS = re.compile(r'`+')
+
+
+def fix_image_path(url: str, base_url: str) -> str:
+    """Sửa đường dẫn ảnh: thay ../../ thành /training/"""
+    if '../../' in url:
+        url = url.replace('../../', '/training/')
+
+    # Nếu chưa có domain thì thêm base_url
+    if not url.startswith('http'):
+        if url.startswith('/'):
+            url = f"{base_url}{url}"
+        else:
+            url = f"{base_url}/training/{url}"
+
+    return url
+
+
+def _backtick_fence(code: str, minimum: int) -> str:
+    """Chuỗi backtick dài hơn mọi chuỗi backtick trong code, để code không đóng fence giữa chừng"""
+    longest = max((len(run) for run in _BACKTICKS.findall(code)), default=0)
+    return '`' * max(minimum, longest + 1)
+
+
+def _code_language(classes: List[str]) -> str:
+    for cls in classes:
+        for prefix in ('language-', 'lang-'):
+            if cls.startswith(prefix):
+                return cls[len(prefix):]
+    return 'text'
+
+
+class MarkdownConverter(HTMLParser):
+    """Duyệt token HTML 1 lần, gom text inline rồi xuất block markdown theo ngữ cảnh (list, quote, table)"""
+
+    def __init__(self, base_url: str = LEARN_ORIGIN):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.blocks: List[Dict[str, Any]] = []
+        self.inline: List[str] = []
+        self.open_inline: List[tuple] = []     # (tag, vị trí trong inline, href)
+        self.lists: List[Dict[str, Any]] = []  # {'tag', 'n', 'width', 'pending'}
+        self.list_run = 0                      # Block trong cùng 1 list liền nhau xuống dòng đơn
+        self.quote_depth = 0
+        self.quote_run = 0                     # Block trong cùng 1 blockquote nối bằng dòng '>'
+        self.quote_tags: List[tuple] = []      # (tag, div_depth) đã mở quote: blockquote hoặc div alert
+        self.heading: Optional[int] = None
+        self.pre: Optional[Dict[str, Any]] = None
+        self.table: Optional[Dict[str, Any]] = None
+        self.video: Optional[bool] = None      # Trong <video>: đã lấy được source chưa
+        self.skip_depth = 0
+        self.div_depth = 0
+
+    # --- Xuất block -----------------------------------------------------------
+
+    def _prefix(self, first: bool) -> str:
+        """Prefix cho dòng đầu (marker list nếu item chưa có block nào) hoặc các dòng sau của block"""
+        quote = '> ' * self.quote_depth
+        if not self.lists:
+            return quote
+        indent = sum(frame['width'] for frame in self.lists[:-1])
+        top = self.lists[-1]
+        if first and top['pending']:
+            top['pending'] = False
+            marker = f"{top['n']}. " if top['tag'] == 'ol' else '- '
+            top['width'] = len(marker)
+            return quote + ' ' * indent + marker
+        return quote + ' ' * (indent + top['width'])
+
+    def _emit(self, text: str):
+        lines = text.split('\n')
+        first = self._prefix(True)
+        rest = self._prefix(False)
+        body = '\n'.join([first + lines[0]] + [(rest + line) if line else rest.rstrip() for line in lines[1:]])
+        self.blocks.append({
+            'text': body,
+            'run': self.list_run if self.lists else None,
+            'quote': (self.quote_run, self.quote_depth) if self.quote_depth else None,
+        })
+
+    def _flush(self):
+        """Kết thúc đoạn text inline đang gom (nếu có) thành 1 block"""
+        if not self.inline:
+            return
+        text = ''.join(self.inline)
+        self.inline = []
+        self.open_inline = []
+        if self.table is not None and self.table['cell'] is not None:
+            self.table['cell'].append(text)  # Trong ô table: block chỉ là khoảng trắng
+            return
+        lines = [_SPACES.sub(' ', line).strip() for line in text.split(BR)]
+        lines = [line for line in lines if line]
+        if not lines:
+            return
+        if self.heading:
+            text = '#' * self.heading + ' ' + ' '.join(lines)
+        else:
+            text = '  \n'.join(lines)  # <br>: hard line break
+        self._emit(text)
+
+    # --- Inline markup ----------------------------------------------------------
+
+    def _open_inline(self, tag: str, href: str = None):
+        self.open_inline.append((tag, len(self.inline), href))
+
+    def _close_inline(self, tag: str):
+        """Bọc text từ lúc mở tag bằng marker, khoảng trắng đầu/cuối đưa ra ngoài marker"""
+        for i in range(len(self.open_inline) - 1, -1, -1):
+            if self.open_inline[i][0] == tag:
+                break
+        else:
+            return
+        _, start, href = self.open_inline.pop(i)
+        del self.open_inline[i:]
+        content = ''.join(self.inline[start:])
+        del self.inline[start:]
+        inner = content.strip()
+        lead = content[:len(content) - len(content.lstrip())]
+        trail = content[len(content.rstrip()):]
+        if tag == 'a':
+            if not href:
+                self.inline.append(content)
+                return
+            inner = _SPACES.sub(' ', inner) or href
+            self.inline += [lead, f"[{inner}]({href})", trail]
+        elif not inner:
+            self.inline.append(content)
+        elif tag == 'code':
+            fence = _backtick_fence(inner, 1)
+            self.inline += [lead, f"{fence}{inner}{fence}", trail]
+        else:
+            marker = INLINE_MARKERS[tag]
+            self.inline += [lead, f"{marker}{inner}{marker}", trail]
+
+    def _link(self, href: Optional[str]) -> Optional[str]:
+        if not href or href.startswith(('#', 'javascript:')):
+            return None
+        return f"{self.base_url}{href}" if href.startswith('/') and not href.startswith('//') else href
+
+    # --- Table ------------------------------------------------------------------
+
+    def _end_table(self):
+        rows = [row for row in self.table['rows'] if row]
+        self.table = None
+        if not rows:
+            return
+        width = max(len(row) for row in rows)
+        lines = []
+        for row_idx, row in enumerate(rows):
+            cells = row + [''] * (width - len(row))
+            lines.append("| " + " | ".join(cells) + " |")
+            if row_idx == 0:
+                lines.append("| " + " | ".join(["---"] * width) + " |")
+        self._emit('\n'.join(lines))
+
+    def _end_cell(self):
+        table = self.table
+        if table['cell'] is None:
+            return
+        text = ''.join(table['cell'] + self.inline)
+        self.inline = []
+        self.open_inline = []
+        text = _SPACES.sub(' ', text.replace(BR, ' ')).strip().replace('|', '\\|')
+        table['rows'][-1].append(text)
+        table['cell'] = None
+
+    # --- HTMLParser callbacks -----------------------------------------------------
+
+    def handle_starttag(self, tag: str, attrs):
+        if self.skip_depth:
+            if tag not in VOID_TAGS:
+                self.skip_depth += 1
+            return
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        if tag in SKIP_TAGS or SKIP_CLASSES.intersection(classes) or 'hidden' in attrs:
+            if tag not in VOID_TAGS:
+                self.skip_depth = 1
+            return
+
+        if self.pre is not None:
+            if tag == 'code' and not self.pre['parts']:
+                self.pre['lang'] = _code_language(classes) if classes else self.pre['lang']
+            elif tag == 'br':
+                self.pre['parts'].append('\n')
+            return
+
+        if tag in INLINE_MARKERS or tag == 'code':
+            self._open_inline(tag)
+        elif tag == 'a':
+            self._open_inline('a', self._link(attrs.get('href')))
+        elif tag == 'br':
+            self.inline.append(BR)
+        elif tag == 'img':
+            src = attrs.get('src')
+            if src:
+                alt = _SPACES.sub(' ', attrs.get('alt') or 'image').strip()
+                self.inline.append(f"![{alt}]({fix_image_path(src, self.base_url)})")
+        elif tag in HEADING_TAGS:
+            self._flush()
+            self.heading = int(tag[1])
+        elif tag in ('ul', 'ol'):
+            self._flush()
+            if not self.lists:
+                self.list_run += 1
+            start = attrs.get('start')
+            n = int(start) - 1 if start and start.isdigit() else 0
+            self.lists.append({'tag': tag, 'n': n, 'width': 2, 'pending': False})
+        elif tag == 'li':
+            self._flush()
+            if self.lists:
+                top = self.lists[-1]
+                top['n'] += 1
+                top['pending'] = True
+        elif tag == 'pre':
+            self._flush()
+            self.pre = {'lang': 'text', 'parts': []}
+        elif tag == 'table':
+            self._flush()
+            if self.table is None:
+                self.table = {'rows': [], 'cell': None, 'depth': 1}
+            else:
+                self.table['depth'] += 1  # Table lồng nhau: gộp vào ô hiện tại
+        elif self.table is not None and self.table['depth'] == 1 and tag == 'tr':
+            self._end_cell()
+            self.table['rows'].append([])
+        elif self.table is not None and self.table['depth'] == 1 and tag in ('td', 'th'):
+            self._end_cell()
+            if not self.table['rows']:
+                self.table['rows'].append([])
+            self.table['cell'] = []
+        elif tag == 'blockquote' or (tag == 'div' and ALERT_CLASSES.intersection(classes)):
+            self._flush()
+            if not self.quote_depth:
+                self.quote_run += 1
+            self.quote_depth += 1
+            self.quote_tags.append((tag, self.div_depth))
+            if tag == 'div':
+                self.div_depth += 1
+        elif tag == 'hr':
+            self._flush()
+            self._emit('---')
+        elif tag == 'iframe':
+            self._flush()
+            src = attrs.get('src')
+            if src:
+                if 'youtube' in src or 'youtu.be' in src:
+                    self._emit(f"🎥 **Video**: [{src}]({src})")
+                else:
+                    self._emit(f"📺 **Embedded Content**: [{src}]({src})")
+        elif tag == 'video' or (tag == 'source' and self.video is not None):
+            if tag == 'video':
+                self._flush()
+                self.video = False
+            src = attrs.get('src')
+            if src and not self.video:
+                # Chỉ lấy source đầu tiên của 1 video
+                self.video = True
+                if not src.startswith('http'):
+                    src = f"{self.base_url}{src}"
+                self._emit(f"🎥 **Video**: [{src}]({src})")
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            if tag == 'div':
+                self.div_depth += 1
+
+    def handle_startendtag(self, tag: str, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str):
+        if self.skip_depth:
+            if tag not in VOID_TAGS:
+                self.skip_depth -= 1
+            return
+
+        if self.pre is not None:
+            if tag == 'pre':
+                code = ''.join(self.pre['parts']).strip('\n')
+                lang = self.pre['lang']
+                self.pre = None
+                if self.table is not None and self.table['cell'] is not None:
+                    self.table['cell'].append(code)
+                else:
+                    fence = _backtick_fence(code, 3)
+                    self._emit(f"{fence}{lang}\n{code}\n{fence}")
+            return
+
+        if tag in INLINE_MARKERS or tag in ('code', 'a'):
+            self._close_inline(tag)
+        elif tag in HEADING_TAGS:
+            self._flush()
+            self.heading = None
+        elif tag in ('ul', 'ol'):
+            self._flush()
+            if self.lists:
+                self.lists.pop()
+        elif tag == 'li':
+            self._flush()
+        elif tag == 'table' and self.table is not None:
+            self.table['depth'] -= 1
+            if self.table['depth'] == 0:
+                self._end_cell()
+                self._end_table()
+        elif self.table is not None and self.table['depth'] == 1 and tag in ('td', 'th'):
+            self._end_cell()
+        elif tag == 'blockquote' or (tag == 'div' and self.quote_tags and self.quote_tags[-1] == ('div', self.div_depth - 1)):
+            self._flush()
+            if self.quote_tags:
+                self.quote_tags.pop()
+                self.quote_depth -= 1
+            if tag == 'div':
+                self.div_depth -= 1
+        elif tag == 'video':
+            self.video = None
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            if tag == 'div':
+                self.div_depth -= 1
+
+    def handle_data(self, data: str):
+        if self.skip_depth:
+            return
+        if self.pre is not None:
+            self.pre['parts'].append(data)
+        else:
+            self.inline.append(data)
+
+    # --- Kết quả ------------------------------------------------------------------
+
+    def markdown(self) -> str:
+        self._flush()
+        if self.table is not None:
+            self._end_cell()
+            self._end_table()
+        parts = []
+        previous = None
+        for block in self.blocks:
+            if previous is not None:
+                quote = block['quote'] and previous['quote'] and block['quote'][0] == previous['quote'][0]
+                if block['run'] is not None and block['run'] == previous['run']:
+                    parts.append('\n')
+                elif quote:
+                    depth = min(block['quote'][1], previous['quote'][1])
+                    parts.append('\n' + '>' * depth + '\n')
+                else:
+                    parts.append('\n\n')
+            parts.append(block['text'])
+            previous = block
+        return ''.join(parts) + '\n' if parts else ''
+
+
+def html_to_markdown(fragment: str, base_url: str = LEARN_ORIGIN) -> str:
+    """Convert fragment HTML (innerHTML của #module-unit-content) sang markdown trong 1 lượt"""
+    converter = MarkdownConverter(base_url)
+    converter.feed(fragment)
+    converter.close()
+    return converter.markdown()
+
+
+# --- Cách cũ: BeautifulSoup select + regex ---------------------------------------------
+
+# Các element được convert, theo thứ tự xuất hiện trong #module-unit-content
+CONTENT_SELECTOR = 'h1, h2, h3, h4, h5, h6, p, ul, ol, pre, table, blockquote, img, video, iframe'
+
+
+def convert_html_to_markdown(html: str) -> str:
+    """Convert simple HTML to markdown"""
+    # Strong/Bold
+    html = re.sub(r'<strong>(.*?)</strong>', r'**\1**', html)
+    html = re.sub(r'<b>(.*?)</b>', r'**\1**', html)
+
+    # Em/Italic
+    html = re.sub(r'<em>(.*?)</em>', r'*\1*', html)
+    html = re.sub(r'<i>(.*?)</i>', r'*\1*', html)
+
+    # Code
+    html = re.sub(r'<code>(.*?)</code>', r'`\1`', html)
+
+    # Links
+    html = re.sub(r'<a href="(.*?)">(.*?)</a>', r'[\2](\1)', html)
+
+    # Remove remaining tags
+    html = re.sub(r'<[^>]+>', '', html)
+
+    return html.strip()
+
+
+def list_to_markdown(list_elem, list_type: str) -> str:
+    """Convert list thành markdown"""
+    lines = []
+
+    for i, item in enumerate(list_elem.select('li'), 1):
+        text = item.get_text()
+        if text:
+            prefix = f"{i}." if list_type == 'ol' else "-"
+            lines.append(f"{prefix} {text.strip()}")
+
+    lines.append("")  # Empty line after list
+    return "\n".join(lines)
+
+
+def table_to_markdown(table_elem) -> str:
+    """Convert table thành markdown"""
+    lines = []
+
+    for row_idx, row in enumerate(table_elem.select('tr')):
+        row_data = [cell.get_text().strip() for cell in row.select('td, th')]
+
+        if row_data:
+            lines.append("| " + " | ".join(row_data) + " |")
+
+            # Add separator after header row
+            if row_idx == 0:
+                lines.append("| " + " | ".join(["---"] * len(row_data)) + " |")
+
+    lines.append("")  # Empty line after table
+    return "\n".join(lines)
+
+
+def render_markdown_regex(fragment: str, base_url: str = LEARN_ORIGIN) -> str:
+    """
+    Convert HTML của #module-unit-content sang markdown theo cách cũ: select từng element
+    (kể cả element lồng nhau) rồi chạy regex trên HTML của mỗi paragraph.
+    """
+    markdown_lines = []
+
+    try:
+        soup = BeautifulSoup(fragment, 'html.parser')
+
+        # Lấy tất cả elements con theo thứ tự
+        for elem in soup.select(CONTENT_SELECTOR):
+            tag = elem.name
+
+            # Headings
+            if tag in HEADING_TAGS:
+                level = int(tag[1])
+                text = elem.get_text()
+                if text and text.strip():
+                    markdown_lines.append(f"\n{'#' * level} {text.strip()}\n")
+
+            # Paragraphs
+            elif tag == 'p':
+                text = elem.get_text()
+                if text and len(text.strip()) > 10:
+                    # Xử lý inline code
+                    text = convert_html_to_markdown(elem.decode_contents())
+                    markdown_lines.append(f"{text}\n")
+
+            # Lists
+            elif tag in ['ul', 'ol']:
+                markdown_lines.append(list_to_markdown(elem, tag))
+
+            # Code blocks
+            elif tag == 'pre':
+                code_elem = elem.select_one('code')
+                if code_elem:
+                    code_text = code_elem.get_text()
+
+                    # Lấy language
+                    lang = 'text'
+                    for cls in code_elem.get('class') or []:
+                        if 'language-' in cls:
+                            lang = cls.replace('language-', '')
+                            break
+
+                    markdown_lines.append(f"\n```{lang}")
+                    markdown_lines.append(code_text.strip())
+                    markdown_lines.append("```\n")
+
+            # Tables
+            elif tag == 'table':
+                markdown_lines.append(table_to_markdown(elem))
+
+            # Blockquotes
+            elif tag == 'blockquote':
+                text = elem.get_text()
+                if text:
+                    for line in text.strip().split('\n'):
+                        markdown_lines.append(f"> {line.strip()}")
+                    markdown_lines.append("")
+
+            # Images - SỬA ĐƯỜNG DẪN ẢNH Ở ĐÂY
+            elif tag == 'img':
+                src = elem.get('src')
+                alt = elem.get('alt') or 'image'
+                if src:
+                    markdown_lines.append(f"\n![{alt}]({fix_image_path(src, base_url)})\n")
+
+            # Videos
+            elif tag == 'video':
+                source = elem.select_one('source')
+                src = source.get('src') if source else None
+                if src:
+                    if not src.startswith('http'):
+                        src = f"{base_url}{src}"
+                    markdown_lines.append(f"\n🎥 **Video**: [{src}]({src})\n")
+
+            # iframes (YouTube, etc)
+            elif tag == 'iframe':
+                src = elem.get('src')
+                if src:
+                    if 'youtube' in src or 'youtu.be' in src:
+                        markdown_lines.append(f"\n🎥 **Video**: [{src}]({src})\n")
+                    else:
+                        markdown_lines.append(f"\n📺 **Embedded Content**: [{src}]({src})\n")
+
+    except Exception as e:
+        print(f"      ⚠️ Lỗi extract content: {e}")
+
+    return "\n".join(markdown_lines)
+
+
+CONVERTERS = {
+    'tokenizer': html_to_markdown,
+    'regex': render_markdown_regex,
+}
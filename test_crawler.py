@@ -11,14 +11,37 @@ from playwright.async_api import async_playwright, Page
 from typing import List, Dict, Any
 from datetime import datetime
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
 import markdownify
 
+from html_markdown import CONVERTERS, fix_image_path
+
+# Readiness profiles dùng chung với các crawler trong Crawl_Data
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Crawl_Data'))
+from page_readiness import goto_ready, reload_ready, wait_until_ready  # noqa: E402
+
+
+def write_text(path: str, content: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+async def write_text_async(path: str, content: str):
+    """Ghi file trong thread pool để event loop tiếp tục điều khiển browser"""
+    await asyncio.get_running_loop().run_in_executor(None, write_text, path, content)
+
 
 class MicrosoftLearnCrawler:
-    def __init__(self, course_url: str):
+    def __init__(self, course_url: str, render_workers: int = 2, converter: str = 'tokenizer'):
         self.course_url = course_url
         self.base_url = "https://learn.microsoft.com"
         self.output_dir = "output_markdown"
+        self.render_workers = render_workers  # Số process convert HTML -> markdown (0 = ngay trên event loop)
+        self.render_executor = None
+        self.render_content = CONVERTERS[converter]  # 'tokenizer' (1 lượt) hoặc 'regex' (cách cũ)
+        self.request_delay = 0.5  # Delay lịch sự giữa các request (giây), trang đã được đợi theo selector
         self.data = {
             "course_url": course_url,
             "crawled_at": datetime.now().isoformat(),
@@ -55,24 +78,12 @@ class MicrosoftLearnCrawler:
     
     def fix_image_path(self, url: str) -> str:
         """Sửa đường dẫn ảnh: thay ../../ thành /training/"""
-        if '../../' in url:
-            url = url.replace('../../', '/training/')
-        
-        # Nếu chưa có domain thì thêm base_url
-        if not url.startswith('http'):
-            if url.startswith('/'):
-                url = f"{self.base_url}{url}"
-            else:
-                url = f"{self.base_url}/training/{url}"
-        
-        return url
+        return fix_image_path(url, self.base_url)
             
     async def get_course_modules(self) -> List[Dict[str, Any]]:
         """Lấy danh sách modules từ course page"""
         print(f"🔍 Đang truy cập course: {self.course_url}")
-        await self.page.goto(self.course_url, wait_until='domcontentloaded')
-        await self.wait_for_load()
-        await asyncio.sleep(2)
+        await goto_ready(self.page, self.course_url, 'course')
         
         learning_paths = []
         
@@ -117,7 +128,7 @@ class MicrosoftLearnCrawler:
                     print(f"  ✓ Found {len(path_modules)} modules in this path")
                     
                     if i < len(path_urls):
-                        await asyncio.sleep(2)
+                        await asyncio.sleep(self.request_delay)
                         
                 except Exception as e:
                     print(f"  ⚠️ Lỗi khi crawl path {path_url}: {e}")
@@ -151,9 +162,7 @@ class MicrosoftLearnCrawler:
      
     async def get_modules_from_path(self, path_url: str, path_title: str) -> List[Dict[str, Any]]:
         """Lấy modules từ learning path"""
-        await self.page.goto(path_url, wait_until='domcontentloaded')
-        await self.wait_for_load()
-        await asyncio.sleep(2)
+        await goto_ready(self.page, path_url, 'path')
         
         modules = []
         module_links = await self.page.query_selector_all('a[href*="/training/modules/"]')
@@ -197,16 +206,18 @@ class MicrosoftLearnCrawler:
         else:
             return 'content'
         
-    async def crawl_module_to_markdown(self, module: Dict[str, Any], path_title: str, module_idx: int) -> str:
-        """Crawl module và convert sang markdown"""
+    async def capture_module(self, module: Dict[str, Any], path_title: str, module_idx: int) -> Dict[str, Any]:
+        """
+        Phần cần browser của 1 module: metadata, HTML của #module-unit-content và quiz.
+        lines chứa None ở vị trí nội dung chính, render_module thay bằng markdown của fragment.
+        """
         print(f"\n📖 Đang crawl module: {module['title']}")
         
         markdown_content = []
+        capture = {'lines': markdown_content, 'fragment': None}
         
         try:
-            await self.page.goto(module['url'], wait_until='domcontentloaded')
-            await self.wait_for_load()
-            await asyncio.sleep(2)
+            await goto_ready(self.page, module['url'], 'module')
 
             # Header với metadata
             markdown_content.append(f"---")
@@ -241,12 +252,11 @@ class MicrosoftLearnCrawler:
             except:
                 pass
             
-            # Lấy nội dung chính
+            # Lấy nội dung chính: chỉ chụp HTML 1 lần, convert sau trong process pool
             main_content = await self.page.query_selector('#module-unit-content')
             if main_content:
-                # Xử lý các thành phần theo thứ tự
-                content_md = await self.extract_content_as_markdown(main_content)
-                markdown_content.append(content_md)
+                capture['fragment'] = await main_content.inner_html()
+                markdown_content.append(None)
             
             # Nếu là quiz, xử lý riêng
             if module['type'] == 'quiz' or 'knowledge check' in module['title'].lower():
@@ -266,162 +276,36 @@ class MicrosoftLearnCrawler:
             traceback.print_exc()
             markdown_content.append(f"\n\n**Error crawling this module: {str(e)}**\n")
             
-        return "\n".join(markdown_content)
-    
-    async def extract_content_as_markdown(self, container) -> str:
-        """Trích xuất nội dung thành markdown"""
-        markdown_lines = []
-        
-        try:
-            # Lấy tất cả elements con theo thứ tự
-            elements = await container.query_selector_all('h1, h2, h3, h4, h5, h6, p, ul, ol, pre, table, blockquote, img, video, iframe')
-            
-            for elem in elements:
-                tag = await elem.evaluate('el => el.tagName.toLowerCase()')
-                
-                # Headings
-                if tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                    level = int(tag[1])
-                    text = await elem.text_content()
-                    if text and text.strip():
-                        markdown_lines.append(f"\n{'#' * level} {text.strip()}\n")
-                
-                # Paragraphs
-                elif tag == 'p':
-                    text = await elem.text_content()
-                    if text and len(text.strip()) > 10:
-                        # Xử lý inline code
-                        inner_html = await elem.inner_html()
-                        text = await self.convert_html_to_markdown(inner_html)
-                        markdown_lines.append(f"{text}\n")
-                
-                # Lists
-                elif tag in ['ul', 'ol']:
-                    list_md = await self.extract_list_as_markdown(elem, tag)
-                    markdown_lines.append(list_md)
-                
-                # Code blocks
-                elif tag == 'pre':
-                    code_elem = await elem.query_selector('code')
-                    if code_elem:
-                        code_text = await code_elem.text_content()
-                        
-                        # Lấy language
-                        lang = 'text'
-                        class_attr = await code_elem.get_attribute('class')
-                        if class_attr:
-                            for cls in class_attr.split():
-                                if 'language-' in cls:
-                                    lang = cls.replace('language-', '')
-                                    break
-                        
-                        markdown_lines.append(f"\n```{lang}")
-                        markdown_lines.append(code_text.strip())
-                        markdown_lines.append("```\n")
-                
-                # Tables
-                elif tag == 'table':
-                    table_md = await self.extract_table_as_markdown(elem)
-                    markdown_lines.append(table_md)
-                
-                # Blockquotes
-                elif tag == 'blockquote':
-                    text = await elem.text_content()
-                    if text:
-                        lines = text.strip().split('\n')
-                        for line in lines:
-                            markdown_lines.append(f"> {line.strip()}")
-                        markdown_lines.append("")
-                
-                # Images - SỬA ĐƯỜNG DẪN ẢNH Ở ĐÂY
-                elif tag == 'img':
-                    src = await elem.get_attribute('src')
-                    alt = await elem.get_attribute('alt') or 'image'
-                    if src:
-                        # Sửa đường dẫn ảnh
-                        src = self.fix_image_path(src)
-                        markdown_lines.append(f"\n![{alt}]({src})\n")
-                
-                # Videos
-                elif tag == 'video':
-                    sources = await elem.query_selector_all('source')
-                    if sources:
-                        src = await sources[0].get_attribute('src')
-                        if src:
-                            if not src.startswith('http'):
-                                src = f"{self.base_url}{src}"
-                            markdown_lines.append(f"\n🎥 **Video**: [{src}]({src})\n")
-                
-                # iframes (YouTube, etc)
-                elif tag == 'iframe':
-                    src = await elem.get_attribute('src')
-                    if src:
-                        if 'youtube' in src or 'youtu.be' in src:
-                            markdown_lines.append(f"\n🎥 **Video**: [{src}]({src})\n")
-                        else:
-                            markdown_lines.append(f"\n📺 **Embedded Content**: [{src}]({src})\n")
-        
-        except Exception as e:
-            print(f"      ⚠️ Lỗi extract content: {e}")
-        
-        return "\n".join(markdown_lines)
+        return capture
     
-    async def convert_html_to_markdown(self, html: str) -> str:
-        """Convert simple HTML to markdown"""
-        # Strong/Bold
-        html = re.sub(r'<strong>(.*?)</strong>', r'**\1**', html)
-        html = re.sub(r'<b>(.*?)</b>', r'**\1**', html)
-        
-        # Em/Italic
-        html = re.sub(r'<em>(.*?)</em>', r'*\1*', html)
-        html = re.sub(r'<i>(.*?)</i>', r'*\1*', html)
-        
-        # Code
-        html = re.sub(r'<code>(.*?)</code>', r'`\1`', html)
-        
-        # Links
-        html = re.sub(r'<a href="(.*?)">(.*?)</a>', r'[\2](\1)', html)
-        
-        # Remove remaining tags
-        html = re.sub(r'<[^>]+>', '', html)
-        
-        return html.strip()
+    async def render_markdown(self, fragment: str) -> str:
+        """Convert fragment HTML sang markdown trong process pool (không có pool thì chạy trực tiếp)"""
+        if self.render_executor is None:
+            return self.render_content(fragment, self.base_url)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.render_executor, self.render_content, fragment, self.base_url)
     
-    async def extract_list_as_markdown(self, list_elem, list_type: str) -> str:
-        """Trích xuất list thành markdown"""
-        lines = []
-        items = await list_elem.query_selector_all('li')
-        
-        for i, item in enumerate(items, 1):
-            text = await item.text_content()
-            if text:
-                prefix = f"{i}." if list_type == 'ol' else "-"
-                lines.append(f"{prefix} {text.strip()}")
-        
-        lines.append("")  # Empty line after list
+    async def render_module(self, capture: Dict[str, Any]) -> str:
+        """Ghép markdown của module từ kết quả capture_module"""
+        lines = capture['lines']
+        if capture['fragment'] is not None:
+            content_md = await self.render_markdown(capture['fragment'])
+            lines = [content_md if line is None else line for line in lines]
         return "\n".join(lines)
     
-    async def extract_table_as_markdown(self, table_elem) -> str:
-        """Trích xuất table thành markdown"""
-        lines = []
-        rows = await table_elem.query_selector_all('tr')
-        
-        for row_idx, row in enumerate(rows):
-            cells = await row.query_selector_all('td, th')
-            row_data = []
-            for cell in cells:
-                text = await cell.text_content()
-                row_data.append(text.strip() if text else '')
-            
-            if row_data:
-                lines.append("| " + " | ".join(row_data) + " |")
-                
-                # Add separator after header row
-                if row_idx == 0:
-                    lines.append("| " + " | ".join(["---"] * len(row_data)) + " |")
-        
-        lines.append("")  # Empty line after table
-        return "\n".join(lines)
+    async def crawl_module_to_markdown(self, module: Dict[str, Any], path_title: str, module_idx: int) -> str:
+        """Crawl module và convert sang markdown"""
+        return await self.render_module(await self.capture_module(module, path_title, module_idx))
+    
+    async def save_module(self, capture: Dict[str, Any], filepath: str):
+        """Render + ghi file .md, chạy nền trong lúc browser chuyển sang module sau"""
+        markdown_content = await self.render_module(capture)
+        await write_text_async(filepath, markdown_content)
+        print(f"  💾 Saved: {filepath}")
+    
+    async def extract_content_as_markdown(self, container) -> str:
+        """Trích xuất nội dung thành markdown"""
+        return await self.render_markdown(await container.inner_html())
     
     async def extract_quiz_questions_enhanced(self) -> List[Dict[str, Any]]:
         """
@@ -432,7 +316,7 @@ class MicrosoftLearnCrawler:
 
         try:
             # Đợi quiz load
-            await asyncio.sleep(2)
+            await wait_until_ready(self.page, 'quiz')
 
             # Click Start/Begin quiz nếu có
             start_buttons = await self.page.query_selector_all(
@@ -441,7 +325,7 @@ class MicrosoftLearnCrawler:
             if start_buttons:
                 try:
                     await start_buttons[0].click()
-                    await asyncio.sleep(3)
+                    await wait_until_ready(self.page, 'quiz_questions')
                 except:
                     pass
 
@@ -491,7 +375,7 @@ class MicrosoftLearnCrawler:
                     "button[data-bi-name='module-unit-module-assessment-submit']"
                 )
                 await submit_btn.click()
-                await asyncio.sleep(1)
+                await wait_until_ready(self.page, 'quiz_result', timeout=5000)
 
                 # Đọc score tổng
                 score_elem = await self.page.query_selector("#module-assessment-result-score")
@@ -501,8 +385,7 @@ class MicrosoftLearnCrawler:
 
                 if score < 100:
                     # Reload page nếu chưa 100%
-                    await self.page.reload()
-                    await asyncio.sleep(2)
+                    await reload_ready(self.page, 'quiz_questions')
                     # Lấy lại element + input
                     question_containers = await self.page.query_selector_all("div.quiz-question")
                     for i, q_elem in enumerate(question_containers):
@@ -590,6 +473,9 @@ class MicrosoftLearnCrawler:
     async def crawl(self, max_modules: int = None):
         """Hàm main để crawl toàn bộ course"""
         await self.init_browser(headless=False)
+        if self.render_workers > 0:
+            self.render_executor = ProcessPoolExecutor(max_workers=self.render_workers)
+        pending = []  # Module đang render/ghi file trong lúc browser crawl module tiếp theo
         
         try:
             print("=" * 60)
@@ -651,8 +537,8 @@ class MicrosoftLearnCrawler:
                     print(f"📖 MODULE {idx}/{len(modules)} (Tổng: {module_counter}/{total_modules})")
                     print(f"{'=' * 60}")
                     
-                    # Crawl module thành markdown
-                    markdown_content = await self.crawl_module_to_markdown(
+                    # Browser chỉ chụp HTML, convert markdown + ghi file chạy nền
+                    capture = await self.capture_module(
                         module, 
                         learning_path['title'],
                         idx
@@ -662,23 +548,25 @@ class MicrosoftLearnCrawler:
                     module_filename = f"{idx:02d}_{self.sanitize_filename(module['title'])}.md"
                     module_filepath = os.path.join(path_dir, module_filename)
                     
-                    with open(module_filepath, 'w', encoding='utf-8') as f:
-                        f.write(markdown_content)
-                    
-                    print(f"  💾 Saved: {module_filepath}")
+                    # Giới hạn số module chờ render để không giữ quá nhiều HTML trong RAM
+                    if len(pending) >= 2 * max(1, self.render_workers):
+                        await pending.pop(0)
+                    pending.append(asyncio.create_task(self.save_module(capture, module_filepath)))
                     
                     # Thêm vào index
                     index_content.append(f"  {idx}. [{module['title']}]({path_dir}/{module_filename})\n")
                     
-                    await asyncio.sleep(2)
+                    await asyncio.sleep(self.request_delay)
                 
                 index_content.append("\n")
                 print(f"\n✅ Hoàn thành learning path: {learning_path['title']}")
                 
+            await asyncio.gather(*pending)
+            pending = []
+            
             # Lưu file index
             index_path = os.path.join(self.output_dir, "README.md")
-            with open(index_path, 'w', encoding='utf-8') as f:
-                f.write("".join(index_content))
+            await write_text_async(index_path, "".join(index_content))
             
             print("\n" + "=" * 60)
             print("🎉 HOÀN THÀNH CRAWL!")
@@ -695,6 +583,11 @@ class MicrosoftLearnCrawler:
             traceback.print_exc()
             
         finally:
+            # Module đã crawl xong vẫn được ghi ra file khi crawl dừng giữa chừng
+            await asyncio.gather(*pending, return_exceptions=True)
+            if self.render_executor:
+                self.render_executor.shutdown()
+                self.render_executor = None
             await self.close_browser()
 
 